@@ -1,3 +1,7 @@
+from eth_typing import BLSSignature, ChecksumAddress
+from sw_utils import ProtocolConfig
+
+
 class Singleton(type):
     _instances: dict = {}
 
@@ -10,5 +14,8 @@ class Singleton(type):
 class AppState(metaclass=Singleton):
     def __init__(self) -> None:
         self.last_price_updated_timestamp: int | None = None
-        self.force_exits_updated_timestamp: int | None = None
-        self.ltv_updated_timestamp: int | None = None
+        self.protocol_config: ProtocolConfig | None = None
+        # (oracle, validator index, share) of the exit signature shares that failed verification
+        self.invalid_exit_shares: set[tuple[ChecksumAddress, int, BLSSignature]] = set()
+        # validator index to the exit signature shares that recovered no valid signature
+        self.unrecoverable_exit_shares: dict[int, dict[int, BLSSignature]] = {}
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from eth_typing import HexStr
+from web3 import Web3
+
+from src.common.contracts import multicall_contract
+from src.common.transaction import TransactionRevertedError, tx_manager
+from src.common.typings import MulticallCall
+from src.config.settings import TRANSACTION_BUNDLE_GAS_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BundledAction:
+    """Keeper action executed atomically, e.g. a vault state update with the claim."""
+
+    calls: list[MulticallCall]
+    description: str
+    gas: int = 0
+    # hash of the confirmed transaction that executed the action
+    tx_hash: HexStr | None = None
+
+
+class TransactionBundler:
+    """
+    Packs the independent keeper actions of one task run into multicall transactions.
+
+    Every action is estimated on its own first, so an action that reverts is dropped
+    before bundling. The rest are packed in order into bundles of at most `gas_limit` gas.
+    A bundle that reverts on simulation is split in halves until the failing action
+    is isolated, so it does not hold back the other actions.
+    """
+
+    def __init__(self, gas_limit: int = TRANSACTION_BUNDLE_GAS_LIMIT) -> None:
+        self.gas_limit = gas_limit
+        self._actions: list[BundledAction] = []
+
+    def add(self, calls: list[MulticallCall], description: str) -> BundledAction:
+        action = BundledAction(calls=calls, description=description)
+        self._actions.append(action)
+        return action
+
+    async def execute(self) -> None:
+        """Executes the added actions, their `tx_hash` is set on success."""
+        actions, self._actions = self._actions, []
+        if not actions:
+            return
+
+        estimated = await asyncio.gather(*[self._estimate_gas(action) for action in actions])
+        actions = [action for action, succeeded in zip(actions, estimated) if succeeded]
+        bundles = self._pack(actions)
+        logger.info('Executing %d actions in %d transactions...', len(actions), len(bundles))
+        await asyncio.gather(*[self._transact(bundle) for bundle in bundles])
+
+    async def _estimate_gas(self, action: BundledAction) -> bool:
+        tx_function = multicall_contract.functions.aggregate(action.calls)
+        try:
+            action.gas = await tx_function.estimate_gas()
+        except Exception as e:
+            logger.error('Failed to estimate gas for %s: %s', action.description, repr(e))
+            return False
+        return True
+
+    def _pack(self, actions: list[BundledAction]) -> list[list[BundledAction]]:
+        bundles: list[list[BundledAction]] = []
+        bundle_gas = 0
+        for action in actions:
+            if not bundles or bundle_gas + action.gas > self.gas_limit:
+                # an action above the limit is sent on its own
+                bundles.append([])
+                bundle_gas = 0
+            bundles[-1].append(action)
+            bundle_gas += action.gas
+        return bundles
+
+    async def _transact(self, bundle: list[BundledAction]) -> None:
+        calls = _get_unique_calls(bundle)
+        try:
+            tx_receipt = await tx_manager.transact(multicall_contract.functions.aggregate(calls))
+        except TransactionRevertedError as e:
+            if len(bundle) == 1:
+                logger.error('Failed to execute %s: %s', bundle[0].description, e.reason)
+                return
+            # the actions state changed after the estimation, isolate the failing one
+            middle = len(bundle) // 2
+            await self._transact(bundle[:middle])
+            await self._transact(bundle[middle:])
+            return
+        except Exception as e:
+            logger.error('Failed to execute %d actions: %s', len(bundle), repr(e))
+            return
+
+        if tx_receipt is None:
+            logger.error('Failed to confirm the transaction of %d actions', len(bundle))
+            return
+
+        tx_hash = Web3.to_hex(tx_receipt['transactionHash'])
+        for action in bundle:
+            action.tx_hash = tx_hash
+
+
+def _get_unique_calls(bundle: list[BundledAction]) -> list[MulticallCall]:
+    # actions on the same vault share the vault state update, it must run once
+    calls: list[MulticallCall] = []
+    for action in bundle:
+        for call in action.calls:
+            if call not in calls:
+                calls.append(call)
+    return calls
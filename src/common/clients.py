@@ -1,3 +1,13 @@
+from types import SimpleNamespace
+
+from aiohttp import (
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionReuseconnParams,
+)
 from sw_utils import GasManager, get_consensus_client, get_execution_client
 from sw_utils.graph.client import GraphClient
 from sw_utils.ipfs import IpfsFetchClient
@@ -8,9 +18,72 @@ from src.common.accounts import keeper_account
 from src.config import settings
 from src.config.settings import (
     MAX_FEE_PER_GAS_GWEI,
+    NETWORK,
+    ORACLE_CONNECTIONS_LIMIT,
+    ORACLE_CONNECTIONS_LIMIT_PER_HOST,
+    ORACLE_DNS_CACHE_TTL,
+    ORACLE_KEEPALIVE_TIMEOUT,
+    ORACLE_TIMEOUT,
     PRIORITY_FEE_NUM_BLOCKS,
     PRIORITY_FEE_PERCENTILE,
 )
+from src.metrics import metrics
+
+
+class SessionManager:
+    """
+    Owns a long-lived aiohttp session shared by all the oracle requests.
+    Connections are kept alive between blocks, limited per host,
+    and resolved hosts are cached, so that a request to an oracle
+    rarely pays for a new TCP and TLS handshake.
+    """
+
+    def __init__(self) -> None:
+        self._session: ClientSession | None = None
+
+    @property
+    def session(self) -> ClientSession:
+        if self._session is None:
+            raise RuntimeError('Session manager is not set up')
+        return self._session
+
+    async def setup(self) -> None:
+        trace_config = TraceConfig()
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+
+        connector = TCPConnector(
+            limit=ORACLE_CONNECTIONS_LIMIT,
+            limit_per_host=ORACLE_CONNECTIONS_LIMIT_PER_HOST,
+            keepalive_timeout=ORACLE_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=ORACLE_DNS_CACHE_TTL,
+        )
+        self._session = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(ORACLE_TIMEOUT),
+            trace_configs=[trace_config],
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    async def _on_connection_reused(
+        _session: ClientSession,
+        _context: SimpleNamespace,
+        _params: TraceConnectionReuseconnParams,
+    ) -> None:
+        metrics.http_pool_connections.labels(network=NETWORK, result='hit').inc()
+
+    @staticmethod
+    async def _on_connection_created(
+        _session: ClientSession,
+        _context: SimpleNamespace,
+        _params: TraceConnectionCreateEndParams,
+    ) -> None:
+        metrics.http_pool_connections.labels(network=NETWORK, result='miss').inc()
 
 
 def build_execution_client() -> AsyncWeb3:
@@ -35,12 +108,14 @@ async def setup_execution_client(w3: AsyncWeb3) -> None:
 async def setup_clients() -> None:
     await setup_execution_client(execution_client)
     await graph_client.setup()
+    await oracle_session_manager.setup()
 
 
 async def close_clients() -> None:
     await consensus_client.disconnect()
     await execution_client.provider.disconnect()
     await graph_client.disconnect()
+    await oracle_session_manager.close()
 
 
 def build_gas_manager() -> GasManager:
@@ -68,6 +143,8 @@ consensus_client = get_consensus_client(
 )
 gas_manager = build_gas_manager()
 
+oracle_session_manager = SessionManager()
+
 
 ipfs_fetch_client = IpfsFetchClient(
     settings.IPFS_FETCH_ENDPOINTS,
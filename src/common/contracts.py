@@ -13,7 +13,7 @@ from web3.types import EventData, TxReceipt, Wei
 
 from src.common.clients import execution_client
 from src.common.transaction import tx_manager
-from src.common.typings import HarvestParams
+from src.common.typings import HarvestParams, MulticallCall
 from src.config.settings import (
     EVENTS_CONCURRENCY,
     EVENTS_RANGE_SEC,
@@ -48,6 +48,24 @@ class ContractWrapper:
     def encode_abi(self, fn_name: str, args: list | None = None) -> HexStr:
         return self.contract.encode_abi(fn_name, args=args)
 
+    async def get_eip712_domain(self) -> dict:
+        """Returns the EIP-712 domain the contract verifies the signatures with."""
+        (
+            _,
+            name,
+            version,
+            chain_id,
+            verifying_contract,
+            _,
+            _,
+        ) = await self.contract.functions.eip712Domain().call()
+        return {
+            'name': name,
+            'version': version,
+            'chainId': chain_id,
+            'verifyingContract': verifying_contract,
+        }
+
     @staticmethod
     def _get_zero_harvest_params() -> HarvestParams:
         return HarvestParams(
@@ -230,24 +248,27 @@ class VaultUserLTVTrackerContract(ContractWrapper):
             ),
         ).call()
 
-    async def update_vault_max_ltv_user(
+    def get_update_vault_max_ltv_user_call(
         self, vault: ChecksumAddress, user: ChecksumAddress, harvest_params: HarvestParams | None
-    ) -> TxReceipt | None:
+    ) -> MulticallCall:
         # Create zero harvest params in case the vault has no rewards yet
         if harvest_params is None:
             harvest_params = self._get_zero_harvest_params()
 
-        tx_function = self.contract.functions.updateVaultMaxLtvUser(
-            vault,
-            user,
-            (
-                harvest_params.rewards_root,
-                harvest_params.reward,
-                harvest_params.unlocked_mev_reward,
-                harvest_params.proof,
-            ),
+        update_call = self.encode_abi(
+            fn_name='updateVaultMaxLtvUser',
+            args=[
+                vault,
+                user,
+                (
+                    harvest_params.rewards_root,
+                    harvest_params.reward,
+                    harvest_params.unlocked_mev_reward,
+                    harvest_params.proof,
+                ),
+            ],
         )
-        return await tx_manager.transact(tx_function)
+        return self.address, update_call
 
 
 merkle_distributor_contract = MerkleDistributorContract(
@@ -0,0 +1,125 @@
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from eth_typing import BlockNumber
+from web3.types import TxParams, Wei
+
+from src.common.clients import execution_client
+from src.config.settings import (
+    NETWORK,
+    NETWORK_CONFIG,
+    PRIORITY_FEE_NUM_BLOCKS,
+    PRIORITY_FEE_PERCENTILE,
+)
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# EIP-1559 parameters
+BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+ELASTICITY_MULTIPLIER = 2
+
+# quotes are not served from a window that was not updated for longer
+MAX_QUOTE_AGE_BLOCKS = 3
+
+
+@dataclass
+class BlockFees:
+    number: BlockNumber
+    base_fee_per_gas: Wei
+    gas_used_ratio: float
+    # priority fee paid at `PRIORITY_FEE_PERCENTILE` of the block transactions
+    reward: Wei
+
+
+class FeeOracle:
+    """
+    Serves the high priority fees from a rolling window of the latest blocks fee history.
+
+    The window is updated on every new head with `eth_feeHistory` for the new blocks only.
+    The next base fee is predicted from the last block with the EIP-1559 formula,
+    and the prediction error is exported once the block is seen.
+    Quotes are computed from memory, so a submission does not wait for the node.
+    """
+
+    def __init__(self, num_blocks: int = PRIORITY_FEE_NUM_BLOCKS) -> None:
+        self.window: deque[BlockFees] = deque(maxlen=num_blocks)
+        self._updated_at: float | None = None
+
+    async def update(self, head: BlockNumber) -> None:
+        last_block = self.window[-1].number if self.window else None
+        if last_block is not None and head <= last_block:
+            return
+
+        block_count = self.window.maxlen or 1
+        if last_block is not None:
+            block_count = min(block_count, head - last_block)
+        fee_history = await execution_client.eth.fee_history(
+            block_count, head, [PRIORITY_FEE_PERCENTILE]
+        )
+
+        oldest_block = fee_history['oldestBlock']
+        for index, gas_used_ratio in enumerate(fee_history['gasUsedRatio']):
+            block_fees = BlockFees(
+                number=BlockNumber(oldest_block + index),
+                base_fee_per_gas=fee_history['baseFeePerGas'][index],
+                gas_used_ratio=gas_used_ratio,
+                reward=fee_history['reward'][index][0],
+            )
+            self._observe_prediction_error(block_fees)
+            self.window.append(block_fees)
+        self._updated_at = time.time()
+
+    def predict_base_fee(self) -> Wei | None:
+        """Predicts the base fee of the block following the window."""
+        if not self.window:
+            return None
+        return predict_next_base_fee(self.window[-1])
+
+    def get_high_priority_tx_params(self) -> TxParams | None:
+        """
+        Returns the fees built the same way as `GasManager.get_high_priority_tx_params`
+        or None when the window is empty or stale.
+        """
+        if self._updated_at is None or not self.window:
+            return None
+        if time.time() - self._updated_at > MAX_QUOTE_AGE_BLOCKS * NETWORK_CONFIG.SECONDS_PER_BLOCK:
+            return None
+
+        rewards = [block_fees.reward for block_fees in self.window if block_fees.reward]
+        priority_fee_per_gas = int(statistics.median(rewards)) if rewards else 0
+        priority_fee_per_gas = max(
+            priority_fee_per_gas, NETWORK_CONFIG.MIN_EFFECTIVE_PRIORITY_FEE_PER_GAS
+        )
+        base_fee_per_gas = predict_next_base_fee(self.window[-1])
+        return {
+            'maxFeePerGas': Wei(2 * base_fee_per_gas + priority_fee_per_gas),
+            'maxPriorityFeePerGas': Wei(priority_fee_per_gas),
+        }
+
+    def _observe_prediction_error(self, block_fees: BlockFees) -> None:
+        if not self.window or self.window[-1].number != block_fees.number - 1:
+            return
+        if not block_fees.base_fee_per_gas:
+            return
+        predicted = predict_next_base_fee(self.window[-1])
+        error = abs(predicted - block_fees.base_fee_per_gas) / block_fees.base_fee_per_gas
+        metrics.base_fee_prediction_error.labels(network=NETWORK).observe(error)
+
+
+def predict_next_base_fee(block_fees: BlockFees) -> Wei:
+    """Applies the EIP-1559 base fee update rule to the block."""
+    base_fee = block_fees.base_fee_per_gas
+    # the ratio is relative to the gas limit, the target is its half
+    target_ratio = 1 / ELASTICITY_MULTIPLIER
+    delta_ratio = (block_fees.gas_used_ratio - target_ratio) / target_ratio
+    delta = int(base_fee * abs(delta_ratio)) // BASE_FEE_MAX_CHANGE_DENOMINATOR
+    if delta_ratio > 0:
+        return Wei(base_fee + max(delta, 1))
+    return Wei(base_fee - delta)
+
+
+fee_oracle = FeeOracle()
@@ -5,23 +5,40 @@ from gql import gql
 
 from src.common.clients import execution_client, graph_client
 from src.common.typings import Vault
+from src.config.settings import (
+    FORCE_EXITS_SUPPORTED_NETWORKS,
+    NETWORK,
+    SKIP_FORCE_EXITS,
+    SKIP_UPDATE_LTV,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def is_graph_used() -> bool:
+    if NETWORK in FORCE_EXITS_SUPPORTED_NETWORKS and not SKIP_FORCE_EXITS:
+        return True
+    if not SKIP_UPDATE_LTV:
+        return True
+    return False
+
+
 async def check_for_graph_node_sync_to_block(
     block_identifier: BlockIdentifier,
+    graph_block_number: BlockNumber | None = None,
 ) -> None:
     """
     Check if graph node is available and synced to the specified block number of execution node.
     Useful for checking against latest block.
+    The graph node is only queried when its synced block number is not passed.
     """
-    try:
-        graph_block_number = await graph_get_latest_block()
-    except Exception as e:
-        raise ConnectionError(
-            f'The graph node located at {graph_client.endpoint} ' f'is not available: {str(e)}',
-        ) from e
+    if graph_block_number is None:
+        try:
+            graph_block_number = await graph_get_latest_block()
+        except Exception as e:
+            raise ConnectionError(
+                f'The graph node located at {graph_client.endpoint} ' f'is not available: {str(e)}',
+            ) from e
 
     if isinstance(block_identifier, int):
         # Fixed block number
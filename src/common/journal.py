@@ -0,0 +1,89 @@
+import asyncio
+import json
+import logging
+import os
+
+from eth_typing import ChecksumAddress
+from web3.types import TxParams, Wei
+
+from src.config.settings import NETWORK
+
+logger = logging.getLogger(__name__)
+
+
+class NonceJournal:
+    """
+    Journal of the fees last broadcast for every pending nonce of the keeper wallet.
+
+    Every record is appended as a json line and fsynced before the call returns,
+    so a transaction broadcast before a crash or a redeploy can be replaced
+    with bumped fees on the first attempt after the restart.
+    The journal is rewritten without the mined nonces when they are forgotten.
+    The records are scoped to the wallet and network, the records
+    of another wallet or network are ignored on load.
+    The file is written in a thread, one write at a time.
+    """
+
+    def __init__(self, path: str, address: ChecksumAddress, network: str = NETWORK) -> None:
+        self.path = path
+        self.address = address
+        self.network = network
+        self._lock = asyncio.Lock()
+
+    def load(self) -> dict[int, TxParams]:
+        """Replays the journal, the last record of every nonce wins."""
+        nonce_to_tx_params: dict[int, TxParams] = {}
+        if not os.path.exists(self.path):
+            return nonce_to_tx_params
+
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    if record['address'] != self.address or record['network'] != self.network:
+                        continue
+                    nonce_to_tx_params[int(record['nonce'])] = {
+                        'maxFeePerGas': Wei(int(record['maxFeePerGas'])),
+                        'maxPriorityFeePerGas': Wei(int(record['maxPriorityFeePerGas'])),
+                    }
+                except (ValueError, KeyError, TypeError) as e:
+                    # the last line may be torn by a crash during the write
+                    logger.warning('Skipping invalid nonce journal record: %s', repr(e))
+        return nonce_to_tx_params
+
+    async def record(self, nonce: int, tx_params: TxParams) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._append, self._to_line(nonce, tx_params))
+
+    async def rewrite(self, nonce_to_tx_params: dict[int, TxParams]) -> None:
+        """Replaces the journal atomically with the given records."""
+        lines = [
+            self._to_line(nonce, tx_params)
+            for nonce, tx_params in sorted(nonce_to_tx_params.items())
+        ]
+        async with self._lock:
+            await asyncio.to_thread(self._replace, lines)
+
+    def _append(self, line: str) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _replace(self, lines: list[str]) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _to_line(self, nonce: int, tx_params: TxParams) -> str:
+        record = {
+            'address': self.address,
+            'network': self.network,
+            'nonce': nonce,
+            'maxFeePerGas': int(tx_params['maxFeePerGas']),
+            'maxPriorityFeePerGas': int(tx_params['maxPriorityFeePerGas']),
+        }
+        return json.dumps(record) + '\n'
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import cast
+
+from eth_typing import BlockNumber
+from hexbytes import HexBytes
+from web3.exceptions import TransactionNotFound
+from web3.types import TxReceipt
+
+from src.common.clients import execution_client
+from src.config.settings import HEAD_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# blocks checked at most on a single poll, e.g. after the node was unavailable
+MAX_BLOCKS_PER_POLL = 64
+
+
+@dataclass
+class ReceiptWaiter:
+    # hashes of the transaction and its replacements, may be appended while waiting
+    tx_hashes: list[HexBytes]
+    future: asyncio.Future[TxReceipt]
+    # whether the receipts were looked up directly since the waiter joined or blocks were skipped
+    looked_up: bool = False
+
+
+class ReceiptTracker:
+    """
+    Waits for the receipts of the keeper transactions with a single block watcher.
+
+    While there are waiters, one background task polls the latest block number
+    and fetches every new block with its transaction hashes once.
+    Receipts are fetched only for the awaited transactions found in the blocks,
+    so the waiters cost one request per block instead of one per transaction per poll.
+
+    A transaction may be mined in a block the watcher does not fetch: before
+    the waiter joined or in the blocks skipped after a long gap. The receipts of
+    the waiter are then looked up directly once, and again before timing out.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: list[ReceiptWaiter] = []
+        # mined transactions whose receipts the node did not return yet
+        self._mined: set[HexBytes] = set()
+        self._last_block: BlockNumber | None = None
+        self._task: asyncio.Task | None = None
+
+    async def wait(self, tx_hashes: list[HexBytes], timeout: float) -> TxReceipt:
+        """
+        Returns the receipt of the first mined transaction of `tx_hashes`.
+        Hashes appended to the list while waiting are watched too.
+        Raises `TimeoutError` when none is mined within the timeout.
+        """
+        waiter = ReceiptWaiter(
+            tx_hashes=tx_hashes, future=asyncio.get_running_loop().create_future()
+        )
+        self._waiters.append(waiter)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        except TimeoutError:
+            # the transaction may be mined in a block the watcher did not fetch
+            try:
+                tx_receipt = await _get_first_receipt(list(tx_hashes))
+            except Exception as e:
+                logger.warning('Failed to fetch transaction receipt: %s', repr(e))
+                tx_receipt = None
+            if tx_receipt is not None:
+                return tx_receipt
+            raise
+        finally:
+            self._waiters.remove(waiter)
+
+    async def _watch(self) -> None:
+        while self._waiters:
+            try:
+                await self._poll()
+            except Exception as e:
+                logger.warning('Failed to poll transaction receipts: %s', repr(e))
+            await asyncio.sleep(HEAD_POLL_INTERVAL)
+        # the blocks are not followed without waiters
+        self._last_block = None
+        self._mined.clear()
+
+    async def _poll(self) -> None:
+        block_number = await execution_client.eth.block_number
+        if self._last_block is None:
+            # the transactions were broadcast after the previous block
+            self._last_block = BlockNumber(block_number - 1)
+
+        from_block = self._last_block + 1
+        if block_number - from_block >= MAX_BLOCKS_PER_POLL:
+            from_block = block_number - MAX_BLOCKS_PER_POLL + 1
+            # the skipped blocks are not fetched, the receipts are looked up directly
+            for waiter in self._waiters:
+                waiter.looked_up = False
+
+        for number in range(from_block, block_number + 1):
+            block = await execution_client.eth.get_block(BlockNumber(number))
+            awaited = {tx_hash for waiter in self._waiters for tx_hash in waiter.tx_hashes}
+            # the block is fetched without the full transactions
+            tx_hashes = cast(Sequence[HexBytes], block['transactions'])
+            self._mined.update(HexBytes(tx_hash) for tx_hash in tx_hashes if tx_hash in awaited)
+            self._last_block = BlockNumber(number)
+
+        for tx_hash in list(self._mined):
+            try:
+                tx_receipt = await execution_client.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            self._mined.discard(tx_hash)
+            self._resolve(tx_hash, tx_receipt)
+
+        for waiter in list(self._waiters):
+            if waiter.looked_up or waiter.future.done():
+                continue
+            waiter.looked_up = True
+            first_receipt = await _get_first_receipt(list(waiter.tx_hashes))
+            if first_receipt is not None and not waiter.future.done():
+                waiter.future.set_result(first_receipt)
+
+    def _resolve(self, tx_hash: HexBytes, tx_receipt: TxReceipt) -> None:
+        for waiter in self._waiters:
+            if tx_hash in waiter.tx_hashes and not waiter.future.done():
+                waiter.future.set_result(tx_receipt)
+
+
+async def _get_first_receipt(tx_hashes: list[HexBytes]) -> TxReceipt | None:
+    for tx_hash in tx_hashes:
+        try:
+            return await execution_client.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            continue
+    return None
+
+
+receipt_tracker = ReceiptTracker()
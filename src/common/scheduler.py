@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable
+
+from eth_typing import BlockNumber
+from sw_utils import InterruptHandler, get_chain_latest_head
+from sw_utils.typings import ChainHead
+from web3 import AsyncWeb3, WebSocketProvider
+from web3.types import BlockData
+
+from src.common.clients import consensus_client, execution_client
+from src.common.graph import graph_get_latest_block, is_graph_used
+from src.common.tracing import service_name
+from src.common.typings import ChainContext
+from src.config.settings import (
+    EXECUTION_WS_ENDPOINT,
+    HEAD_POLL_INTERVAL,
+    NETWORK,
+    NETWORK_CONFIG,
+    TASK_MAX_BACKOFF,
+    TASK_TIMEOUT,
+)
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# chain context of the scheduled task run in the current context
+current_chain_context: ContextVar[ChainContext | None] = ContextVar(
+    'current_chain_context', default=None
+)
+
+
+class Checkpoint(Enum):
+    """Chain checkpoint a scheduled task depends on."""
+
+    HEAD = 'head'
+    FINALIZED = 'finalized'
+
+
+@dataclass
+class ScheduledTask:
+    name: str
+    func: Callable[[ChainContext], Awaitable[None]]
+    checkpoint: Checkpoint
+    # minimum delay in seconds between the start of two successful runs
+    interval: float
+    # the run is cancelled when it does not complete within the timeout
+    timeout: float
+    # checkpoint block the task was last started for
+    last_block: BlockNumber | None = None
+    # number of consecutive failed runs, used for the backoff
+    failures: int = 0
+
+    @property
+    def backoff(self) -> float:
+        if not self.failures:
+            return 0
+        delay = NETWORK_CONFIG.SECONDS_PER_BLOCK * 2 ** (self.failures - 1)
+        return min(delay, TASK_MAX_BACKOFF)
+
+
+class BlockScheduler:
+    """
+    Runs every task as an independent long-lived coroutine that is woken up
+    when the chain checkpoint it depends on has moved.
+
+    New heads are received from the execution node websocket subscription
+    when `EXECUTION_WS_ENDPOINT` is set, otherwise by polling `eth_blockNumber`.
+    On every new head the chain context is fetched once and passed
+    to all the tasks woken up for it.
+
+    Each task has its own interval, timeout and backoff, so a slow or stuck task
+    never delays the next run of the others.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: list[ScheduledTask] = []
+        self._checkpoints: dict[Checkpoint, BlockNumber] = {}
+        self._trigger_times: dict[Checkpoint, float] = {}
+        self._chain_contexts: dict[Checkpoint, ChainContext] = {}
+        self._checkpoints_changed = asyncio.Condition()
+        self._exit = False
+
+    # pylint: disable-next=too-many-arguments
+    def add_task(
+        self,
+        name: str,
+        func: Callable[[ChainContext], Awaitable[None]],
+        checkpoint: Checkpoint = Checkpoint.HEAD,
+        interval: float = 0,
+        timeout: float = TASK_TIMEOUT,
+    ) -> None:
+        self._tasks.append(
+            ScheduledTask(
+                name=name, func=func, checkpoint=checkpoint, interval=interval, timeout=timeout
+            )
+        )
+
+    async def run(self, interrupt_handler: InterruptHandler) -> None:
+        runners = [
+            asyncio.create_task(self._run_task(task, interrupt_handler)) for task in self._tasks
+        ]
+        try:
+            async for head in self._new_heads(interrupt_handler):
+                try:
+                    await self._update_checkpoints(head)
+                except Exception as e:
+                    logger.exception(e)
+        finally:
+            await self._stop()
+            await asyncio.gather(*runners, return_exceptions=True)
+
+    async def _stop(self) -> None:
+        # let the running tasks complete and wake up the idle ones
+        async with self._checkpoints_changed:
+            self._exit = True
+            self._checkpoints_changed.notify_all()
+
+    async def _update_checkpoints(self, head: BlockNumber) -> None:
+        trigger_time = time.time()
+        chain_context = await fetch_chain_context(head)
+        checkpoints = {
+            Checkpoint.HEAD: chain_context.head_block,
+            Checkpoint.FINALIZED: chain_context.finalized_block,
+        }
+
+        async with self._checkpoints_changed:
+            for checkpoint, block_number in checkpoints.items():
+                if self._checkpoints.get(checkpoint) == block_number:
+                    continue
+                self._checkpoints[checkpoint] = block_number
+                self._trigger_times[checkpoint] = trigger_time
+                self._chain_contexts[checkpoint] = chain_context
+            self._checkpoints_changed.notify_all()
+
+    async def _wait_for_checkpoint(self, task: ScheduledTask) -> tuple[float, ChainContext] | None:
+        """
+        Waits until the task checkpoint moves past the block of its last run.
+        Returns the checkpoint trigger time and chain context
+        or None when the scheduler is stopping.
+        """
+        async with self._checkpoints_changed:
+            await self._checkpoints_changed.wait_for(
+                lambda: self._exit
+                or self._checkpoints.get(task.checkpoint, task.last_block) != task.last_block
+            )
+            if self._exit:
+                return None
+            task.last_block = self._checkpoints[task.checkpoint]
+            return self._trigger_times[task.checkpoint], self._chain_contexts[task.checkpoint]
+
+    async def _run_task(self, task: ScheduledTask, interrupt_handler: InterruptHandler) -> None:
+        # the transactions of the task are traced with its name
+        service_name.set(task.name)
+        while not interrupt_handler.exit:
+            checkpoint = await self._wait_for_checkpoint(task)
+            if checkpoint is None:
+                return
+            trigger_time, chain_context = checkpoint
+            current_chain_context.set(chain_context)
+
+            start_time = time.time()
+            try:
+                await asyncio.wait_for(task.func(chain_context), timeout=task.timeout)
+                task.failures = 0
+            except TimeoutError:
+                task.failures += 1
+                logger.error('Task %s timed out after %d seconds', task.name, task.timeout)
+            except Exception as e:
+                task.failures += 1
+                logger.exception('Task %s failed', task.name, exc_info=e)
+            finally:
+                metrics.task_latency.labels(network=NETWORK, task=task.name).observe(
+                    time.time() - trigger_time
+                )
+
+            if task.failures:
+                logger.info('Retrying task %s in %d seconds', task.name, task.backoff)
+                await interrupt_handler.sleep(task.backoff)
+            elif task.interval:
+                await interrupt_handler.sleep(max(task.interval - (time.time() - start_time), 0))
+
+    async def _new_heads(self, interrupt_handler: InterruptHandler) -> AsyncIterator[BlockNumber]:
+        if EXECUTION_WS_ENDPOINT:
+            try:
+                async for head in _subscribe_new_heads(interrupt_handler):
+                    yield head
+            except Exception as e:
+                logger.warning(
+                    'New heads subscription failed, falling back to polling: %s', repr(e)
+                )
+        async for head in _poll_new_heads(interrupt_handler):
+            yield head
+
+
+async def fetch_chain_context(head: BlockNumber) -> ChainContext:
+    """
+    Fetches the execution finalized block, the consensus finalized head
+    and the graph node synced block concurrently.
+    Only the execution node is required, the other parts are None when unavailable.
+    """
+    results: tuple[
+        BlockData | BaseException, ChainHead | BaseException, BlockNumber | None | BaseException
+    ] = await asyncio.gather(
+        execution_client.eth.get_block('finalized'),
+        get_chain_latest_head(
+            consensus_client=consensus_client, slots_per_epoch=NETWORK_CONFIG.SLOTS_PER_EPOCH
+        ),
+        _get_graph_block(),
+        return_exceptions=True,
+    )
+    finalized_block_result, chain_head_result, graph_block_result = results
+    if isinstance(finalized_block_result, BaseException):
+        raise finalized_block_result
+
+    chain_head: ChainHead | None = None
+    if isinstance(chain_head_result, BaseException):
+        logger.warning('Failed to fetch consensus chain head: %s', repr(chain_head_result))
+    else:
+        chain_head = chain_head_result
+
+    graph_block: BlockNumber | None = None
+    if isinstance(graph_block_result, BaseException):
+        logger.warning('Failed to fetch graph node block: %s', repr(graph_block_result))
+    else:
+        graph_block = graph_block_result
+
+    return ChainContext(
+        head_block=head,
+        finalized_block=finalized_block_result['number'],
+        chain_head=chain_head,
+        graph_block=graph_block,
+    )
+
+
+async def _get_graph_block() -> BlockNumber | None:
+    if not is_graph_used():
+        return None
+    return await graph_get_latest_block()
+
+
+async def _subscribe_new_heads(interrupt_handler: InterruptHandler) -> AsyncIterator[BlockNumber]:
+    async with AsyncWeb3(WebSocketProvider(EXECUTION_WS_ENDPOINT)) as w3:
+        await w3.eth.subscribe('newHeads')
+        logger.info('Subscribed to new heads at %s', EXECUTION_WS_ENDPOINT)
+        async for message in w3.socket.process_subscriptions():
+            if interrupt_handler.exit:
+                return
+            yield BlockNumber(message['result']['number'])
+
+
+async def _poll_new_heads(interrupt_handler: InterruptHandler) -> AsyncIterator[BlockNumber]:
+    last_head: BlockNumber | None = None
+    while not interrupt_handler.exit:
+        try:
+            head = await execution_client.eth.block_number
+        except Exception as e:
+            logger.warning('Failed to fetch latest block number: %s', repr(e))
+        else:
+            if head != last_head:
+                last_head = head
+                yield head
+        await interrupt_handler.sleep(HEAD_POLL_INTERVAL)
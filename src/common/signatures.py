@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Protocol, Sequence, TypeVar
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_typing import ChecksumAddress
+
+if TYPE_CHECKING:
+    from src.common.contracts import ContractWrapper
+
+logger = logging.getLogger(__name__)
+
+SIGNERS_CACHE_SIZE = 1000
+
+EIP712_DOMAIN_TYPE = [
+    {'name': 'name', 'type': 'string'},
+    {'name': 'version', 'type': 'string'},
+    {'name': 'chainId', 'type': 'uint256'},
+    {'name': 'verifyingContract', 'type': 'address'},
+]
+
+
+class OracleVote(Protocol):
+    oracle_address: ChecksumAddress
+
+
+VoteT = TypeVar('VoteT', bound=OracleVote)
+
+
+class TypedDataSigners:
+    """
+    Recovers the signers of the oracles EIP-712 votes for a contract domain.
+
+    The domain is read once from the `eip712Domain` of the contract,
+    so it always matches the one the contract verifies the signatures with.
+    The votes are recovered in a batch in the default thread pool executor,
+    so that the event loop is not blocked.
+    The signer is cached by the vote key and signature,
+    so an unchanged vote is recovered only once.
+    """
+
+    def __init__(
+        self,
+        contract: 'ContractWrapper',
+        primary_type: str,
+        message_type: list[dict[str, str]],
+    ) -> None:
+        self.contract = contract
+        self.primary_type = primary_type
+        self.message_type = message_type
+        # read from the contract on the first recovery
+        self.domain: dict | None = None
+        self._signers: OrderedDict[tuple[Hashable, bytes], ChecksumAddress | None] = OrderedDict()
+
+    async def recover(
+        self, messages: Sequence[tuple[Hashable, dict, bytes]]
+    ) -> list[ChecksumAddress | None]:
+        """
+        Recovers the signer of every `(key, message, signature)`.
+        The key must identify the message, None is returned for a malformed signature.
+        """
+        pending = {
+            (key, signature): message
+            for key, message, signature in messages
+            if (key, signature) not in self._signers
+        }
+        if pending:
+            if self.domain is None:
+                self.domain = await self.contract.get_eip712_domain()
+            signers = await asyncio.to_thread(
+                _recover_signers,
+                [
+                    (self.get_typed_data(message), signature)
+                    for (_, signature), message in pending.items()
+                ],
+            )
+            self._signers.update(zip(pending, signers))
+
+        result = []
+        for key, _, signature in messages:
+            self._signers.move_to_end((key, signature))
+            result.append(self._signers[key, signature])
+
+        while len(self._signers) > SIGNERS_CACHE_SIZE:
+            self._signers.popitem(last=False)
+        return result
+
+    async def filter_signed(
+        self, votes: Sequence[VoteT], messages: Sequence[tuple[Hashable, dict, bytes]]
+    ) -> list[VoteT]:
+        """
+        Returns the votes signed by their oracles.
+        `messages` are the `(key, message, signature)` of the votes, see `recover`.
+        """
+        signers = await self.recover(messages)
+
+        valid_votes = []
+        for vote, signer in zip(votes, signers):
+            if signer != vote.oracle_address:
+                logger.warning(
+                    'Invalid %s vote signature from oracle %s, recovered signer %s',
+                    self.primary_type,
+                    vote.oracle_address,
+                    signer,
+                )
+                continue
+            valid_votes.append(vote)
+        return valid_votes
+
+    def get_typed_data(self, message: dict) -> dict:
+        """Returns the EIP-712 typed data of the message signed by the oracles."""
+        return {
+            'types': {
+                'EIP712Domain': EIP712_DOMAIN_TYPE,
+                self.primary_type: self.message_type,
+            },
+            'primaryType': self.primary_type,
+            'domain': self.domain,
+            'message': message,
+        }
+
+
+def _recover_signers(
+    typed_data_signatures: list[tuple[dict, bytes]]
+) -> list[ChecksumAddress | None]:
+    signers: list[ChecksumAddress | None] = []
+    for typed_data, signature in typed_data_signatures:
+        try:
+            signer = Account().recover_message(
+                encode_typed_data(full_message=typed_data), signature=signature
+            )
+        except Exception as e:
+            logger.debug('Failed to recover signer: %s', repr(e))
+            signer = None
+        signers.append(signer)
+    return signers
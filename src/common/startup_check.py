@@ -1,27 +1,28 @@
 import asyncio
 import logging
 
-from aiohttp import ClientSession, ClientTimeout
 from sw_utils import IpfsFetchClient
 
 from src.common.accounts import keeper_account
-from src.common.clients import get_consensus_client, get_execution_client, graph_client
+from src.common.clients import (
+    get_consensus_client,
+    get_execution_client,
+    graph_client,
+    oracle_session_manager,
+)
 from src.common.execution import check_keeper_balance
-from src.common.graph import check_for_graph_node_sync_to_block
+from src.common.graph import check_for_graph_node_sync_to_block, is_graph_used
 from src.common.utils import aiohttp_fetch
 from src.config.settings import (
     CONSENSUS_ENDPOINTS,
     EXECUTION_ENDPOINTS,
-    FORCE_EXITS_SUPPORTED_NETWORKS,
     IPFS_FETCH_ENDPOINTS,
     L2_EXECUTION_ENDPOINTS,
     NETWORK,
     OSETH_PRICE_SUPPORTED_NETWORKS,
     PRICE_MAX_WAITING_TIME,
     PRICE_UPDATE_INTERVAL,
-    SKIP_FORCE_EXITS,
     SKIP_OSETH_PRICE_UPDATE,
-    SKIP_UPDATE_LTV,
 )
 from src.protocol_config.service import get_protocol_config
 
@@ -44,7 +45,7 @@ async def startup_checks() -> None:
                 f'PRICE_MAX_WAITING_TIME ({PRICE_MAX_WAITING_TIME}) should be less than '
                 f'PRICE_UPDATE_INTERVAL ({PRICE_UPDATE_INTERVAL})'
             )
-    if _is_graph_used():
+    if is_graph_used():
         await check_for_graph_node_sync_to_block('finalized')
         logger.info('Connected to graph node at %s.', graph_client.endpoint)
 
@@ -55,11 +56,13 @@ async def startup_checks() -> None:
     oracles = protocol_config.oracles
     oracle_endpoints = [endpoint for oracle in oracles for endpoint in oracle.endpoints]
 
-    async with ClientSession(timeout=ClientTimeout(60)) as session:
-        results = await asyncio.gather(
-            *[aiohttp_fetch(session=session, url=endpoint) for endpoint in oracle_endpoints],
-            return_exceptions=True,
-        )
+    results = await asyncio.gather(
+        *[
+            aiohttp_fetch(session=oracle_session_manager.session, url=endpoint)
+            for endpoint in oracle_endpoints
+        ],
+        return_exceptions=True,
+    )
 
     healthy_oracles: list[str] = []
     for endpoint, result in zip(oracle_endpoints, results):
@@ -194,11 +197,3 @@ async def _check_ipfs_fetch_nodes() -> None:
             await asyncio.sleep(10)
 
     logger.info('Connected to ipfs nodes at %s.', ', '.join(healthy_ipfs_endpoints))
-
-
-def _is_graph_used() -> bool:
-    if NETWORK in FORCE_EXITS_SUPPORTED_NETWORKS and not SKIP_FORCE_EXITS:
-        return True
-    if not SKIP_UPDATE_LTV:
-        return True
-    return False
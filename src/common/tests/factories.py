@@ -1,9 +1,49 @@
+from eth_abi import encode
+from eth_account.signers.local import LocalAccount
+from eth_typing import BlockNumber
+from eth_utils import keccak
 from sw_utils.tests.factories import faker
 from sw_utils.typings import Oracle
 
+from src.common.typings import ChainContext
+
+EIP712_DOMAIN_TYPE_HASH = keccak(
+    text='EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)'
+)
+
 
 def create_oracle(num_endpoints: int = 1) -> Oracle:
     return Oracle(
         public_key=faker.ecies_public_key(),
         endpoints=[f'https://example{i}.com' for i in range(num_endpoints)],
     )
+
+
+def create_chain_context(head_block: int = 100, finalized_block: int = 90) -> ChainContext:
+    return ChainContext(
+        head_block=BlockNumber(head_block),
+        finalized_block=BlockNumber(finalized_block),
+        chain_head=None,
+        graph_block=None,
+    )
+
+
+def sign_struct_hash(account: LocalAccount, domain: dict, struct_hash: bytes) -> bytes:
+    """
+    Signs the EIP-712 digest of the struct hash the way the contracts verify it:
+    keccak256(0x1901 || domain separator || struct hash)
+    """
+    domain_separator = keccak(
+        EIP712_DOMAIN_TYPE_HASH
+        + encode(
+            ['bytes32', 'bytes32', 'uint256', 'address'],
+            [
+                keccak(text=domain['name']),
+                keccak(text=domain['version']),
+                domain['chainId'],
+                domain['verifyingContract'],
+            ],
+        )
+    )
+    digest = keccak(b'\x19\x01' + domain_separator + struct_hash)
+    return account.unsafe_sign_hash(digest).signature
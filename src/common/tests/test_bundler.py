@@ -0,0 +1,103 @@
+import contextlib
+from unittest import mock
+
+from hexbytes import HexBytes
+from web3.exceptions import ContractLogicError
+
+from src.common.bundler import TransactionBundler
+from src.common.transaction import TransactionRevertedError
+
+STRATEGY = '0x' + '11' * 20
+
+
+class TestTransactionBundler:
+    async def test_packs_actions_by_gas_limit(self):
+        bundler = TransactionBundler(gas_limit=250_000)
+        actions = [bundler.add([_call(index)], f'action {index}') for index in range(5)]
+        with _patch(gas=100_000) as (_, tx_manager):
+            await bundler.execute()
+
+        sent = _sent_calls(tx_manager)
+        assert sorted(sent) == [
+            [_call(0), _call(1)],
+            [_call(2), _call(3)],
+            [_call(4)],
+        ]
+        assert all(action.tx_hash == '0xab' for action in actions)
+
+    async def test_drops_action_failing_estimation(self):
+        bundler = TransactionBundler(gas_limit=1_000_000)
+        actions = [bundler.add([_call(index)], f'action {index}') for index in range(3)]
+        with _patch(gas=100_000, failing_estimation={_call(1)}) as (_, tx_manager):
+            await bundler.execute()
+
+        assert _sent_calls(tx_manager) == [[_call(0), _call(2)]]
+        assert [action.tx_hash for action in actions] == ['0xab', None, '0xab']
+
+    async def test_isolates_action_reverting_in_bundle(self):
+        bundler = TransactionBundler(gas_limit=1_000_000)
+        actions = [bundler.add([_call(index)], f'action {index}') for index in range(4)]
+        with _patch(gas=100_000, reverting={_call(2)}) as (_, tx_manager):
+            await bundler.execute()
+
+        assert [action.tx_hash for action in actions] == ['0xab', '0xab', None, '0xab']
+        assert [_call(0), _call(1)] in _sent_calls(tx_manager)
+        assert [_call(3)] in _sent_calls(tx_manager)
+
+    async def test_shared_calls_are_sent_once(self):
+        bundler = TransactionBundler(gas_limit=1_000_000)
+        update_state = _call(0)
+        bundler.add([update_state, _call(1)], 'claim')
+        bundler.add([update_state, _call(2)], 'force exit')
+        with _patch(gas=100_000) as (_, tx_manager):
+            await bundler.execute()
+
+        assert _sent_calls(tx_manager) == [[update_state, _call(1), _call(2)]]
+
+    async def test_execute_without_actions(self):
+        bundler = TransactionBundler(gas_limit=1_000_000)
+        with _patch(gas=100_000) as (multicall_contract, tx_manager):
+            await bundler.execute()
+
+        multicall_contract.functions.aggregate.assert_not_called()
+        tx_manager.transact.assert_not_awaited()
+
+
+def _call(index: int) -> tuple[str, str]:
+    return STRATEGY, f'0x{index:02x}'
+
+
+def _sent_calls(tx_manager: mock.Mock) -> list[list]:
+    return [c.args[0].calls for c in tx_manager.transact.await_args_list if c.args[0].sent]
+
+
+@contextlib.contextmanager
+def _patch(
+    gas: int,
+    failing_estimation: set | None = None,
+    reverting: set | None = None,
+):
+    def aggregate(calls):
+        tx_function = mock.Mock()
+        tx_function.calls = calls
+        tx_function.sent = False
+        if failing_estimation and failing_estimation & set(calls):
+            tx_function.estimate_gas = mock.AsyncMock(side_effect=ContractLogicError('reverted'))
+        else:
+            tx_function.estimate_gas = mock.AsyncMock(return_value=gas)
+        return tx_function
+
+    async def transact(tx_function):
+        if reverting and reverting & set(tx_function.calls):
+            raise TransactionRevertedError('reverted')
+        tx_function.sent = True
+        return {'status': 1, 'transactionHash': HexBytes('0xab')}
+
+    multicall_contract = mock.Mock()
+    multicall_contract.functions.aggregate.side_effect = aggregate
+    tx_manager = mock.Mock()
+    tx_manager.transact = mock.AsyncMock(side_effect=transact)
+    with mock.patch('src.common.bundler.multicall_contract', multicall_contract), mock.patch(
+        'src.common.bundler.tx_manager', tx_manager
+    ):
+        yield multicall_contract, tx_manager
@@ -0,0 +1,29 @@
+from unittest import mock
+
+import pytest
+from aiohttp import TCPConnector
+
+from src.common.clients import SessionManager
+from src.config.settings import (
+    ORACLE_CONNECTIONS_LIMIT_PER_HOST,
+    ORACLE_KEEPALIVE_TIMEOUT,
+)
+
+
+class TestSessionManager:
+    async def test_session_is_shared_until_closed(self):
+        session_manager = SessionManager()
+        with pytest.raises(RuntimeError):
+            _ = session_manager.session
+
+        with mock.patch('src.common.clients.TCPConnector', wraps=TCPConnector) as connector:
+            await session_manager.setup()
+        session = session_manager.session
+        assert session_manager.session is session
+        assert session.connector.limit_per_host == ORACLE_CONNECTIONS_LIMIT_PER_HOST
+        assert connector.call_args.kwargs['keepalive_timeout'] == ORACLE_KEEPALIVE_TIMEOUT
+
+        await session_manager.close()
+        assert session.closed
+        with pytest.raises(RuntimeError):
+            _ = session_manager.session
@@ -0,0 +1,125 @@
+import contextlib
+from unittest import mock
+
+from eth_typing import BlockNumber
+from web3 import Web3
+from web3.types import Wei
+
+from src.common.fees import BlockFees, FeeOracle, predict_next_base_fee
+
+GWEI = Web3.to_wei(1, 'gwei')
+
+
+class TestPredictNextBaseFee:
+    def test_target_usage_keeps_base_fee(self):
+        assert predict_next_base_fee(_block_fees(1, GWEI, 0.5)) == GWEI
+
+    def test_full_block_raises_base_fee_by_eighth(self):
+        assert predict_next_base_fee(_block_fees(1, GWEI, 1.0)) == GWEI + GWEI // 8
+
+    def test_empty_block_lowers_base_fee_by_eighth(self):
+        assert predict_next_base_fee(_block_fees(1, GWEI, 0.0)) == GWEI - GWEI // 8
+
+    def test_increase_is_at_least_one_wei(self):
+        assert predict_next_base_fee(_block_fees(1, 7, 0.51)) == 8
+
+
+class TestFeeOracle:
+    async def test_fills_window_then_fetches_new_blocks_only(self):
+        oracle = FeeOracle(num_blocks=3)
+        with _patch_execution_client() as execution_client:
+            await oracle.update(BlockNumber(100))
+            execution_client.eth.fee_history.assert_awaited_with(3, 100, mock.ANY)
+
+            await oracle.update(BlockNumber(100))
+            assert execution_client.eth.fee_history.await_count == 1
+
+            await oracle.update(BlockNumber(101))
+            execution_client.eth.fee_history.assert_awaited_with(1, 101, mock.ANY)
+
+        assert [block_fees.number for block_fees in oracle.window] == [99, 100, 101]
+
+    async def test_quote_from_window(self):
+        oracle = FeeOracle(num_blocks=3)
+        with _patch_execution_client(), _patch_min_priority_fee(0):
+            await oracle.update(BlockNumber(100))
+            tx_params = oracle.get_high_priority_tx_params()
+
+        # the last block is full, the priority fee is the median of the non-zero rewards
+        assert tx_params == {
+            'maxFeePerGas': 2 * (GWEI + GWEI // 8) + 3 * GWEI // 2,
+            'maxPriorityFeePerGas': 3 * GWEI // 2,
+        }
+
+    async def test_quote_respects_min_priority_fee(self):
+        oracle = FeeOracle(num_blocks=3)
+        with _patch_execution_client(), _patch_min_priority_fee(5 * GWEI):
+            await oracle.update(BlockNumber(100))
+            tx_params = oracle.get_high_priority_tx_params()
+
+        assert tx_params is not None
+        assert tx_params['maxPriorityFeePerGas'] == 5 * GWEI
+
+    async def test_no_quote_when_empty_or_stale(self):
+        oracle = FeeOracle(num_blocks=3)
+        assert oracle.get_high_priority_tx_params() is None
+
+        with _patch_execution_client(), _patch_min_priority_fee(0):
+            with mock.patch('src.common.fees.time.time', return_value=1000):
+                await oracle.update(BlockNumber(100))
+            with mock.patch('src.common.fees.time.time', return_value=1000 + 3600):
+                assert oracle.get_high_priority_tx_params() is None
+
+    async def test_observes_prediction_error(self):
+        oracle = FeeOracle(num_blocks=3)
+        with _patch_execution_client(), mock.patch('src.common.fees.metrics') as metrics:
+            await oracle.update(BlockNumber(100))
+            observe = metrics.base_fee_prediction_error.labels.return_value.observe
+            # blocks 99 and 100 are predicted from their parents
+            assert observe.call_count == 2
+
+            await oracle.update(BlockNumber(101))
+
+        # block 100 is full, block 101 base fee is exactly as predicted
+        assert observe.call_args.args[0] == 0
+
+
+def _block_fees(number: int, base_fee: int, gas_used_ratio: float) -> BlockFees:
+    return BlockFees(
+        number=BlockNumber(number),
+        base_fee_per_gas=Wei(base_fee),
+        gas_used_ratio=gas_used_ratio,
+        reward=Wei(0),
+    )
+
+
+@contextlib.contextmanager
+def _patch_execution_client():
+    # block 98 is empty, then the blocks are full
+    blocks = {
+        98: (GWEI, 0.0, 0),
+        99: (GWEI - GWEI // 8, 1.0, GWEI),
+        100: (GWEI, 1.0, 2 * GWEI),
+        101: (GWEI + GWEI // 8, 0.5, 3 * GWEI),
+    }
+
+    async def fee_history(block_count, newest_block, _reward_percentiles):
+        numbers = range(newest_block - block_count + 1, newest_block + 1)
+        return {
+            'oldestBlock': numbers[0],
+            'baseFeePerGas': [blocks[number][0] for number in numbers],
+            'gasUsedRatio': [blocks[number][1] for number in numbers],
+            'reward': [[blocks[number][2]] for number in numbers],
+        }
+
+    execution_client = mock.Mock()
+    execution_client.eth.fee_history = mock.AsyncMock(side_effect=fee_history)
+    with mock.patch('src.common.fees.execution_client', execution_client):
+        yield execution_client
+
+
+def _patch_min_priority_fee(min_priority_fee: int):
+    network_config = mock.Mock(
+        SECONDS_PER_BLOCK=12, MIN_EFFECTIVE_PRIORITY_FEE_PER_GAS=min_priority_fee
+    )
+    return mock.patch('src.common.fees.NETWORK_CONFIG', network_config)
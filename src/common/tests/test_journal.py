@@ -0,0 +1,53 @@
+from web3 import Web3
+from web3.types import Wei
+
+from src.common.journal import NonceJournal
+
+ADDRESS = Web3.to_checksum_address('0x' + '11' * 20)
+
+
+class TestNonceJournal:
+    async def test_last_record_of_nonce_wins(self, tmp_path):
+        journal = NonceJournal(str(tmp_path / 'nonces.jsonl'), ADDRESS)
+        await journal.record(5, {'maxFeePerGas': Wei(10), 'maxPriorityFeePerGas': Wei(1)})
+        await journal.record(6, {'maxFeePerGas': Wei(20), 'maxPriorityFeePerGas': Wei(2)})
+        await journal.record(5, {'maxFeePerGas': Wei(12), 'maxPriorityFeePerGas': Wei(2)})
+
+        assert NonceJournal(journal.path, ADDRESS).load() == {
+            5: {'maxFeePerGas': 12, 'maxPriorityFeePerGas': 2},
+            6: {'maxFeePerGas': 20, 'maxPriorityFeePerGas': 2},
+        }
+
+    async def test_skips_torn_record(self, tmp_path):
+        journal = NonceJournal(str(tmp_path / 'nonces.jsonl'), ADDRESS)
+        await journal.record(5, {'maxFeePerGas': Wei(10), 'maxPriorityFeePerGas': Wei(1)})
+        with open(journal.path, 'a', encoding='utf-8') as file:
+            file.write('{"nonce": 6, "maxFee')
+
+        assert journal.load() == {5: {'maxFeePerGas': 10, 'maxPriorityFeePerGas': 1}}
+
+    async def test_ignores_records_of_other_wallets(self, tmp_path):
+        path = str(tmp_path / 'nonces.jsonl')
+        other_address = Web3.to_checksum_address('0x' + '22' * 20)
+        await NonceJournal(path, other_address).record(
+            5, {'maxFeePerGas': Wei(10), 'maxPriorityFeePerGas': Wei(1)}
+        )
+        await NonceJournal(path, ADDRESS, network='hoodi').record(
+            6, {'maxFeePerGas': Wei(20), 'maxPriorityFeePerGas': Wei(2)}
+        )
+
+        assert not NonceJournal(path, ADDRESS, network='mainnet').load()
+        assert NonceJournal(path, ADDRESS, network='hoodi').load() == {
+            6: {'maxFeePerGas': 20, 'maxPriorityFeePerGas': 2}
+        }
+
+    async def test_rewrite(self, tmp_path):
+        journal = NonceJournal(str(tmp_path / 'nonces.jsonl'), ADDRESS)
+        await journal.record(5, {'maxFeePerGas': Wei(10), 'maxPriorityFeePerGas': Wei(1)})
+
+        await journal.rewrite({6: {'maxFeePerGas': Wei(20), 'maxPriorityFeePerGas': Wei(2)}})
+
+        assert journal.load() == {6: {'maxFeePerGas': 20, 'maxPriorityFeePerGas': 2}}
+
+    def test_missing_file(self, tmp_path):
+        assert not NonceJournal(str(tmp_path / 'nonces.jsonl'), ADDRESS).load()
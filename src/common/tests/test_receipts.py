@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+from unittest import mock
+
+import pytest
+from hexbytes import HexBytes
+from web3.exceptions import TransactionNotFound
+
+from src.common.receipts import MAX_BLOCKS_PER_POLL, ReceiptTracker
+
+
+class TestReceiptTracker:
+    async def test_resolves_waiters_with_one_block_request(self):
+        tx_hashes = [HexBytes('0x01'), HexBytes('0x02')]
+        with _patch_execution_client(
+            blocks={100: [HexBytes('0x99'), *tx_hashes]}
+        ) as execution_client:
+            tracker = ReceiptTracker()
+            receipts = await asyncio.gather(
+                *[tracker.wait([tx_hash], timeout=1) for tx_hash in tx_hashes]
+            )
+
+        assert [receipt['transactionHash'] for receipt in receipts] == tx_hashes
+        execution_client.eth.get_block.assert_awaited_once_with(100)
+        # the receipts are fetched only for the awaited transactions
+        get_receipt_calls = execution_client.eth.get_transaction_receipt.call_args_list
+        assert {c.args[0] for c in get_receipt_calls} == set(tx_hashes)
+
+    async def test_watches_hashes_appended_while_waiting(self):
+        tx_hashes = [HexBytes('0x01')]
+        with _patch_execution_client(blocks={101: [HexBytes('0x02')]}) as execution_client:
+            tracker = ReceiptTracker()
+            waiter = asyncio.create_task(tracker.wait(tx_hashes, timeout=1))
+            await asyncio.sleep(0.01)
+            # the transaction was replaced and the replacement was mined in the next block
+            tx_hashes.append(HexBytes('0x02'))
+            execution_client.head = 101
+            receipt = await waiter
+
+        assert receipt['transactionHash'] == HexBytes('0x02')
+
+    async def test_retries_receipt_not_returned_yet(self):
+        with _patch_execution_client(blocks={100: [HexBytes('0x01')]}) as execution_client:
+            get_receipt = execution_client.eth.get_transaction_receipt
+            get_receipt.side_effect = [TransactionNotFound('not found'), {'status': 1}]
+            tracker = ReceiptTracker()
+
+            assert await tracker.wait([HexBytes('0x01')], timeout=1) == {'status': 1}
+
+        assert get_receipt.await_count == 2
+
+    async def test_finds_transaction_mined_before_first_poll(self):
+        with _patch_execution_client(blocks={99: [HexBytes('0x01')]}) as execution_client:
+            tracker = ReceiptTracker()
+            receipt = await tracker.wait([HexBytes('0x01')], timeout=1)
+
+        assert receipt['transactionHash'] == HexBytes('0x01')
+        execution_client.eth.get_block.assert_awaited_once_with(100)
+
+    async def test_finds_transaction_in_skipped_blocks(self):
+        head = 100 + MAX_BLOCKS_PER_POLL + 10
+        with _patch_execution_client(blocks={105: [HexBytes('0x01')]}) as execution_client:
+            tracker = ReceiptTracker()
+            waiter = asyncio.create_task(tracker.wait([HexBytes('0x01')], timeout=1))
+            await asyncio.sleep(0.01)
+            execution_client.head = head
+            receipt = await waiter
+
+        assert receipt['transactionHash'] == HexBytes('0x01')
+        fetched_blocks = {c.args[0] for c in execution_client.eth.get_block.await_args_list}
+        assert 105 not in fetched_blocks
+
+    async def test_looks_up_receipt_before_timeout(self):
+        with _patch_execution_client(blocks={100: [HexBytes('0x01')]}):
+            tracker = ReceiptTracker()
+            # the watcher does not fetch the block
+            with mock.patch.object(tracker, '_watch', mock.AsyncMock()):
+                receipt = await tracker.wait([HexBytes('0x01')], timeout=0.01)
+
+        assert receipt['transactionHash'] == HexBytes('0x01')
+
+    async def test_timeout(self):
+        with _patch_execution_client(blocks={}) as execution_client:
+            tracker = ReceiptTracker()
+            with pytest.raises(TimeoutError):
+                await tracker.wait([HexBytes('0x01')], timeout=0.01)
+
+            # the waiter is removed and the watcher stops following the blocks
+            execution_client.head = 101
+            await asyncio.sleep(0.01)
+
+        assert mock.call(101) not in execution_client.eth.get_block.await_args_list
+
+
+@contextlib.contextmanager
+def _patch_execution_client(blocks: dict[int, list[HexBytes]]):
+    execution_client = mock.Mock()
+    execution_client.head = 100
+
+    async def _block_number() -> int:
+        return execution_client.head
+
+    async def _get_block(number: int) -> dict:
+        return {'number': number, 'transactions': blocks.get(number, [])}
+
+    async def _get_transaction_receipt(tx_hash: HexBytes) -> dict:
+        for number, tx_hashes in blocks.items():
+            if number <= execution_client.head and tx_hash in tx_hashes:
+                return {'status': 1, 'transactionHash': tx_hash}
+        raise TransactionNotFound('not found')
+
+    type(execution_client.eth).block_number = mock.PropertyMock(side_effect=_block_number)
+    execution_client.eth.get_block = mock.AsyncMock(side_effect=_get_block)
+    execution_client.eth.get_transaction_receipt = mock.AsyncMock(
+        side_effect=_get_transaction_receipt
+    )
+    with mock.patch('src.common.receipts.execution_client', execution_client), mock.patch(
+        'src.common.receipts.HEAD_POLL_INTERVAL', 0.001
+    ):
+        yield execution_client
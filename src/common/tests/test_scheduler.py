@@ -0,0 +1,150 @@
+import asyncio
+from typing import AsyncIterator, Callable
+from unittest import mock
+
+from eth_typing import BlockNumber
+
+from src.common.scheduler import (
+    BlockScheduler,
+    Checkpoint,
+    ScheduledTask,
+    current_chain_context,
+    fetch_chain_context,
+)
+from src.common.typings import ChainContext
+
+
+class TestBlockScheduler:
+    async def test_wakes_task_only_when_checkpoint_moved(self):
+        head_func = mock.AsyncMock()
+        finalized_func = mock.AsyncMock()
+        scheduler = BlockScheduler()
+        scheduler.add_task('head', head_func)
+        scheduler.add_task('finalized', finalized_func, Checkpoint.FINALIZED)
+
+        # the head moved, the finalized block did not
+        with _patch_chain_context(finalized_blocks=[90, 90]), _patch_new_heads([100, 101]):
+            await scheduler.run(_get_interrupt_handler())
+
+        assert [x.args[0].head_block for x in head_func.await_args_list] == [100, 101]
+        assert [x.args[0].finalized_block for x in finalized_func.await_args_list] == [90]
+
+    async def test_tasks_share_chain_context(self):
+        task_contexts = []
+        # the transactions of the task read the chain context from the context variable
+        head_func = mock.AsyncMock(
+            side_effect=lambda _: task_contexts.append(current_chain_context.get())
+        )
+        finalized_func = mock.AsyncMock()
+        scheduler = BlockScheduler()
+        scheduler.add_task('head', head_func)
+        scheduler.add_task('finalized', finalized_func, Checkpoint.FINALIZED)
+
+        with _patch_chain_context(finalized_blocks=[90]), _patch_new_heads([100]):
+            await scheduler.run(_get_interrupt_handler())
+
+        head_context = head_func.call_args.args[0]
+        assert head_context is finalized_func.call_args.args[0]
+        assert head_context.head_block == 100
+        assert head_context.finalized_block == 90
+        assert task_contexts == [head_context]
+
+    async def test_slow_task_does_not_delay_others(self):
+        release = asyncio.Event()
+
+        async def _wait_for_release(_chain_context: ChainContext) -> None:
+            await release.wait()
+
+        slow_func = mock.AsyncMock(side_effect=_wait_for_release)
+        fast_func = mock.AsyncMock()
+        scheduler = BlockScheduler()
+        scheduler.add_task('slow', slow_func)
+        scheduler.add_task('fast', fast_func)
+        await_counts = []
+
+        def _on_heads_processed() -> None:
+            await_counts.append((slow_func.await_count, fast_func.await_count))
+            release.set()
+
+        with _patch_chain_context(), _patch_new_heads([100, 101], _on_heads_processed):
+            await scheduler.run(_get_interrupt_handler())
+
+        assert await_counts == [(1, 2)]
+
+    async def test_failed_task_backs_off(self):
+        scheduler = BlockScheduler()
+        scheduler.add_task('failing', mock.AsyncMock(side_effect=RuntimeError()))
+        interrupt_handler = _get_interrupt_handler()
+
+        with _patch_chain_context(), _patch_new_heads([100]), mock.patch(
+            'src.common.scheduler.NETWORK_CONFIG'
+        ) as network_config, mock.patch('src.common.scheduler.TASK_MAX_BACKOFF', 300):
+            network_config.SECONDS_PER_BLOCK = 12
+            await scheduler.run(interrupt_handler)
+
+        interrupt_handler.sleep.assert_awaited_once_with(12)
+
+
+def test_backoff_is_exponential_and_capped():
+    task = ScheduledTask(
+        name='task', func=mock.AsyncMock(), checkpoint=Checkpoint.HEAD, interval=0, timeout=60
+    )
+    with mock.patch('src.common.scheduler.NETWORK_CONFIG') as network_config, mock.patch(
+        'src.common.scheduler.TASK_MAX_BACKOFF', 300
+    ):
+        network_config.SECONDS_PER_BLOCK = 12
+        assert task.backoff == 0
+        task.failures = 3
+        assert task.backoff == 48
+        task.failures = 10
+        assert task.backoff == 300
+
+
+async def test_fetch_chain_context_tolerates_consensus_failure():
+    execution_client = mock.Mock()
+    execution_client.eth.get_block = mock.AsyncMock(return_value={'number': BlockNumber(90)})
+    with mock.patch('src.common.scheduler.execution_client', execution_client), mock.patch(
+        'src.common.scheduler.get_chain_latest_head', side_effect=ConnectionError()
+    ), mock.patch('src.common.scheduler.is_graph_used', return_value=True), mock.patch(
+        'src.common.scheduler.graph_get_latest_block', return_value=BlockNumber(95)
+    ):
+        chain_context = await fetch_chain_context(BlockNumber(100))
+
+    assert chain_context == ChainContext(
+        head_block=BlockNumber(100),
+        finalized_block=BlockNumber(90),
+        chain_head=None,
+        graph_block=BlockNumber(95),
+    )
+
+
+def _patch_chain_context(finalized_blocks: list[int] | None = None) -> mock._patch:
+    finalized_blocks_iter = iter(finalized_blocks or [])
+
+    async def _fetch_chain_context(head: BlockNumber) -> ChainContext:
+        return ChainContext(
+            head_block=head,
+            finalized_block=BlockNumber(next(finalized_blocks_iter, 0)),
+            chain_head=None,
+            graph_block=None,
+        )
+
+    return mock.patch('src.common.scheduler.fetch_chain_context', _fetch_chain_context)
+
+
+def _patch_new_heads(
+    heads: list[int], on_processed: Callable[[], None] | None = None
+) -> mock._patch:
+    async def _poll_new_heads(_interrupt_handler: mock.Mock) -> AsyncIterator[BlockNumber]:
+        for head in heads:
+            yield BlockNumber(head)
+            # let the woken up tasks run
+            await asyncio.sleep(0.01)
+        if on_processed:
+            on_processed()
+
+    return mock.patch('src.common.scheduler._poll_new_heads', _poll_new_heads)
+
+
+def _get_interrupt_handler() -> mock.Mock:
+    return mock.Mock(exit=False, sleep=mock.AsyncMock())
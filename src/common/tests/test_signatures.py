@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from unittest import mock
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_account.signers.local import LocalAccount
+from eth_typing import ChecksumAddress
+from web3 import Web3
+
+from src.common.signatures import TypedDataSigners, _recover_signers
+
+
+@dataclass
+class Vote:
+    oracle_address: ChecksumAddress
+    value: int
+
+
+DOMAIN = {
+    'name': 'Test',
+    'version': '1',
+    'chainId': 1,
+    'verifyingContract': Web3.to_checksum_address('0x' + '11' * 20),
+}
+
+
+def _signers() -> TypedDataSigners:
+    contract = mock.Mock()
+    contract.get_eip712_domain = mock.AsyncMock(return_value=DOMAIN)
+    return TypedDataSigners(
+        contract=contract,
+        primary_type='Vote',
+        message_type=[{'name': 'value', 'type': 'uint256'}],
+    )
+
+
+class TestTypedDataSigners:
+    async def test_recovers_signers_once(self):
+        typed_data_signers = _signers()
+        account = Account().create()
+        typed_data_signers.domain = DOMAIN
+        signature = _sign(typed_data_signers, account, 1)
+        messages = [(1, {'value': 1}, signature), (2, {'value': 2}, b'\x00' * 65)]
+
+        with mock.patch(
+            'src.common.signatures._recover_signers', wraps=_recover_signers
+        ) as recover_mock:
+            assert await typed_data_signers.recover(messages) == [account.address, None]
+            assert await typed_data_signers.recover(messages[:1]) == [account.address]
+
+        recover_mock.assert_called_once()
+
+    async def test_cache_is_bounded(self):
+        typed_data_signers = _signers()
+        messages = [(i, {'value': i}, b'\x00' * 65) for i in range(3)]
+
+        with mock.patch('src.common.signatures.SIGNERS_CACHE_SIZE', 2):
+            await typed_data_signers.recover(messages)
+
+            # the oldest signer is evicted and recovered again
+            with mock.patch(
+                'src.common.signatures._recover_signers', wraps=_recover_signers
+            ) as recover_mock:
+                await typed_data_signers.recover([messages[0], messages[2]])
+
+        recover_mock.assert_called_once()
+        assert len(recover_mock.call_args.args[0]) == 1
+
+    async def test_domain_is_read_from_contract_once(self):
+        typed_data_signers = _signers()
+
+        await typed_data_signers.recover([(1, {'value': 1}, b'\x00' * 65)])
+        await typed_data_signers.recover([(2, {'value': 2}, b'\x00' * 65)])
+
+        typed_data_signers.contract.get_eip712_domain.assert_awaited_once()
+        assert typed_data_signers.get_typed_data({'value': 1})['domain'] == DOMAIN
+
+    async def test_filter_signed(self):
+        typed_data_signers = _signers()
+        typed_data_signers.domain = DOMAIN
+        account, other_account = Account().create(), Account().create()
+        votes = [Vote(account.address, 1), Vote(other_account.address, 2)]
+        messages = [
+            (vote.value, {'value': vote.value}, _sign(typed_data_signers, account, vote.value))
+            for vote in votes
+        ]
+
+        # the second vote is not signed by its oracle
+        assert await typed_data_signers.filter_signed(votes, messages) == [votes[0]]
+
+
+def _sign(typed_data_signers: TypedDataSigners, account: LocalAccount, value: int) -> bytes:
+    typed_data = typed_data_signers.get_typed_data({'value': value})
+    return account.sign_message(encode_typed_data(full_message=typed_data)).signature
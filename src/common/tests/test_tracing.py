@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import pytest
+
+from src.common.tracing import Tracer
+
+
+class TestTracer:
+    async def test_exports_nested_spans(self, tmp_path):
+        tracer = Tracer(str(tmp_path / 'spans.jsonl'))
+        with tracer.span('parent', service='rewards') as parent:
+            with tracer.span('child') as child:
+                child.set_outcome('sent')
+            parent.set_outcome('confirmed')
+        await tracer.flush()
+
+        spans = [json.loads(line) for line in (tmp_path / 'spans.jsonl').read_text().splitlines()]
+        assert [span['name'] for span in spans] == ['child', 'parent']
+        assert spans[0]['trace_id'] == spans[1]['trace_id']
+        assert spans[0]['parent_span_id'] == spans[1]['span_id']
+        assert spans[1]['parent_span_id'] is None
+        assert spans[1]['attributes'] == {'service': 'rewards'}
+        assert spans[0]['end_time'] >= spans[0]['start_time']
+
+    async def test_error_outcome(self, tmp_path):
+        tracer = Tracer(str(tmp_path / 'spans.jsonl'))
+        with pytest.raises(ValueError):
+            with tracer.span('failing'):
+                raise ValueError('boom')
+        await tracer.flush()
+
+        span = json.loads((tmp_path / 'spans.jsonl').read_text())
+        assert span['outcome'] == 'error'
+        assert span['attributes']['exception'] == "ValueError('boom')"
+
+    def test_set_outcome_keeps_first(self):
+        tracer = Tracer('')
+        with tracer.span('span') as span:
+            span.set_outcome('timeout')
+            span.set_outcome('confirmed')
+        assert span.outcome == 'timeout'
+
+    def test_root_spans_start_new_traces(self):
+        tracer = Tracer('')
+        with tracer.span('first') as first:
+            pass
+        with tracer.span('second') as second:
+            pass
+        assert first.trace_id != second.trace_id
+
+    def test_spans_are_written_without_event_loop_on_flush(self, tmp_path):
+        tracer = Tracer(str(tmp_path / 'spans.jsonl'))
+        with tracer.span('span'):
+            pass
+        assert not (tmp_path / 'spans.jsonl').exists()
+
+        asyncio.run(tracer.flush())
+        assert json.loads((tmp_path / 'spans.jsonl').read_text())['name'] == 'span'
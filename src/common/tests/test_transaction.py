@@ -1,17 +1,25 @@
+import asyncio
 import contextlib
+import json
 from math import ceil
 from unittest import mock
 
 import pytest
 from hexbytes import HexBytes
 from web3 import Web3
-from web3.exceptions import TimeExhausted, Web3RPCError
+from web3.exceptions import ContractLogicError, Web3RPCError
 from web3.types import Wei
 
+from src.common import transaction
+from src.common.journal import NonceJournal
+from src.common.scheduler import current_chain_context
+from src.common.tests.factories import create_chain_context
+from src.common.tracing import service_name
 from src.common.transaction import (
     REPLACEMENT_GAS_BUMP,
     Fees,
     TransactionManager,
+    TransactionRevertedError,
     _is_fee_too_low_error,
 )
 
@@ -20,6 +28,8 @@ GWEI = Web3.to_wei(1, 'gwei')
 # HOODI fee ceiling assumed by the TransactionManager tests (gwei)
 MAX_FEE_PER_GAS_GWEI = 10
 
+WALLET = Web3.to_checksum_address('0x' + '11' * 20)
+
 
 @pytest.fixture(autouse=True)
 def fake_max_fee_per_gas():
@@ -134,6 +144,22 @@ class TestTransactionManager:
         assert params['maxFeePerGas'] == GWEI
         assert params['maxPriorityFeePerGas'] == GWEI // 2
 
+    async def test_high_priority_uses_fee_oracle_quote(self):
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        gas_manager = _gas_manager(GWEI, GWEI // 2)
+        fee_quote = {'maxFeePerGas': 2 * GWEI, 'maxPriorityFeePerGas': GWEI}
+        with _patch(latest_nonce=5, pending_nonce=5, gas_manager=gas_manager), mock.patch(
+            'src.common.transaction.fee_oracle'
+        ) as fee_oracle:
+            fee_oracle.get_high_priority_tx_params.return_value = fee_quote
+            manager = TransactionManager()
+            await manager.transact(_tx_function(transact), high_priority=True)
+
+        params = transact.call_args.args[0]
+        assert params['maxFeePerGas'] == 2 * GWEI
+        assert params['maxPriorityFeePerGas'] == GWEI
+        gas_manager.get_high_priority_tx_params.assert_not_awaited()
+
     async def test_default_gas_skips_fee_fields(self):
         # high_priority=False with no pending tx submits with the node's default gas
         transact = mock.AsyncMock(return_value=HexBytes('0x01'))
@@ -294,7 +320,7 @@ class TestTransactionManager:
             latest_nonce=5,
             pending_nonce=5,
             gas_manager=_gas_manager(GWEI, GWEI // 2),
-            receipt_side_effect=TimeExhausted(),
+            receipt_side_effect=TimeoutError(),
         ):
             manager = TransactionManager()
             receipt = await manager.transact(_tx_function(transact), high_priority=True)
@@ -317,6 +343,215 @@ class TestTransactionManager:
         assert params['maxPriorityFeePerGas'] <= params['maxFeePerGas']
 
 
+class TestNonceJournal:
+    async def test_replayed_fees_are_bumped_on_first_attempt(self, tmp_path):
+        journal = NonceJournal(str(tmp_path / 'nonces.jsonl'), WALLET)
+        # fees broadcast for the pending nonce before the restart
+        await journal.record(5, {'maxFeePerGas': Wei(GWEI), 'maxPriorityFeePerGas': Wei(GWEI // 2)})
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+
+        with _patch(latest_nonce=5, pending_nonce=6, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            manager = TransactionManager()
+            await manager.load_journal(journal)
+            await manager.transact(_tx_function(transact))
+
+        params = transact.call_args.args[0]
+        assert params['nonce'] == 5
+        assert params['maxFeePerGas'] == ceil(GWEI * REPLACEMENT_GAS_BUMP)
+        assert params['maxPriorityFeePerGas'] == ceil(GWEI // 2 * REPLACEMENT_GAS_BUMP)
+        assert journal.load()[5]['maxFeePerGas'] == params['maxFeePerGas']
+
+    async def test_mined_nonces_are_removed(self, tmp_path):
+        journal = NonceJournal(str(tmp_path / 'nonces.jsonl'), WALLET)
+        await journal.record(5, {'maxFeePerGas': Wei(GWEI), 'maxPriorityFeePerGas': Wei(GWEI // 2)})
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+
+        with _patch(latest_nonce=6, pending_nonce=6, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            manager = TransactionManager()
+            await manager.load_journal(journal)
+            await manager.transact(_tx_function(transact))
+
+        assert not journal.load()
+
+
+class TestTransactionTracing:
+    async def test_stages_are_traced_by_service(self, tmp_path):
+        spans_path = tmp_path / 'spans.jsonl'
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        with _patch(
+            latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)
+        ), mock.patch.object(transaction.tracer, 'path', str(spans_path)):
+            service_name.set('rewards')
+            await TransactionManager().transact(_tx_function(transact))
+            await transaction.tracer.flush()
+
+        spans = [json.loads(line) for line in spans_path.read_text().splitlines()]
+        assert [(span['name'], span['outcome']) for span in spans] == [
+            ('transaction.default_gas', 'sent'),
+            ('transaction.receipt', 'confirmed'),
+            ('transaction.transact', 'confirmed'),
+        ]
+        assert {span['trace_id'] for span in spans} == {spans[-1]['trace_id']}
+        assert {span['attributes']['service'] for span in spans} == {'rewards'}
+
+    async def test_replacement_is_counted(self):
+        manager = TransactionManager()
+        with _patch(latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            await manager.transact(
+                _tx_function(mock.AsyncMock(return_value=HexBytes('0x01'))), high_priority=True
+            )
+
+        # the transaction at nonce 5 is still pending
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        with _patch(
+            latest_nonce=5, pending_nonce=6, gas_manager=_gas_manager(GWEI, GWEI // 2)
+        ), mock.patch('src.common.transaction.metrics') as metrics:
+            await manager.transact(_tx_function(transact))
+
+        metrics.transaction_replacements.labels.return_value.inc.assert_called_once()
+        stages = {
+            (c.kwargs['stage'], c.kwargs['outcome'])
+            for c in metrics.transaction_stage_duration.labels.call_args_list
+        }
+        assert stages == {
+            ('high_priority', 'sent'),
+            ('receipt', 'confirmed'),
+            ('transact', 'confirmed'),
+        }
+
+    async def test_reverted_transaction_outcome(self):
+        call = mock.AsyncMock(side_effect=ContractLogicError('execution reverted: nope'))
+        with _patch(
+            latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)
+        ), mock.patch('src.common.transaction.metrics') as metrics:
+            with pytest.raises(TransactionRevertedError):
+                await TransactionManager().transact(_tx_function(mock.AsyncMock(), call))
+
+        metrics.transaction_stage_duration.labels.assert_called_once_with(
+            network=mock.ANY, service=mock.ANY, stage='transact', outcome='reverted'
+        )
+
+
+class TestSimulation:
+    async def test_reverting_transaction_is_not_submitted(self):
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        call = mock.AsyncMock(side_effect=ContractLogicError('execution reverted: AccessDenied'))
+        with _patch(
+            latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)
+        ) as execution_client:
+            manager = TransactionManager()
+            with pytest.raises(TransactionRevertedError) as exc_info:
+                await manager.transact(_tx_function(transact, call))
+
+        assert exc_info.value.reason == 'execution reverted: AccessDenied'
+        assert call.call_args.kwargs == {'block_identifier': 'pending'}
+        # the nonce was never looked up, the lock was not taken
+        execution_client.eth.get_transaction_count.assert_not_awaited()
+        transact.assert_not_awaited()
+
+    async def test_simulation_is_cached_per_head(self):
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        call = mock.AsyncMock(side_effect=ContractLogicError('execution reverted'))
+        tx_function = _tx_function(transact, call)
+        with _patch(latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            manager = TransactionManager()
+            current_chain_context.set(create_chain_context(head_block=100))
+            for _ in range(2):
+                with pytest.raises(TransactionRevertedError):
+                    await manager.transact(tx_function)
+            assert call.await_count == 1
+
+            current_chain_context.set(create_chain_context(head_block=101))
+            with pytest.raises(TransactionRevertedError):
+                await manager.transact(tx_function)
+            assert call.await_count == 2
+
+    async def test_simulation_is_not_cached_outside_of_tasks(self):
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        call = mock.AsyncMock(side_effect=ContractLogicError('execution reverted'))
+        tx_function = _tx_function(transact, call)
+        with _patch(latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            manager = TransactionManager()
+            for _ in range(2):
+                with pytest.raises(TransactionRevertedError):
+                    await manager.transact(tx_function)
+
+        assert call.await_count == 2
+
+    async def test_simulation_failure_submits_transaction(self):
+        transact = mock.AsyncMock(return_value=HexBytes('0x01'))
+        call = mock.AsyncMock(side_effect=ConnectionError())
+        with _patch(latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)):
+            manager = TransactionManager()
+            receipt = await manager.transact(_tx_function(transact, call))
+
+        assert receipt is not None
+        transact.assert_awaited_once()
+
+
+class TestPipeline:
+    async def test_broadcasts_consecutive_nonces(self):
+        transact = mock.AsyncMock(
+            side_effect=[HexBytes('0x01'), HexBytes('0x02'), HexBytes('0x03')]
+        )
+        tx_function = _tx_function(transact)
+        with _patch(
+            latest_nonce=5, pending_nonce=5, gas_manager=_gas_manager(GWEI, GWEI // 2)
+        ) as execution_client, mock.patch(
+            'src.common.transaction.EXECUTION_TRANSACTION_TIMEOUT', 60
+        ), mock.patch(
+            'src.common.transaction.metrics'
+        ) as metrics:
+            execution_client.eth.get_transaction_count = mock.AsyncMock(return_value=5)
+            manager = TransactionManager(pipeline_size=3)
+            receipts = await asyncio.gather(
+                *[manager.transact(tx_function, high_priority=True) for _ in range(3)]
+            )
+
+        assert all(receipts)
+        assert [c.args[0]['nonce'] for c in transact.call_args_list] == [5, 6, 7]
+        # all the confirmed transactions left the pipeline
+        metrics.transaction_queue_depth.labels.return_value.set.assert_called_with(0)
+
+    async def test_replaces_stuck_prefix_in_nonce_order(self):
+        transact = mock.AsyncMock(side_effect=[HexBytes(x) for x in (5, 6, 7, 0x11, 0x12, 8)])
+        tx_function = _tx_function(transact)
+        manager = TransactionManager(pipeline_size=3)
+
+        with _patch(
+            latest_nonce=5,
+            pending_nonce=5,
+            gas_manager=_gas_manager(GWEI, GWEI // 2),
+        ) as execution_client, mock.patch(
+            'src.common.transaction.EXECUTION_TRANSACTION_TIMEOUT', 60
+        ), mock.patch(
+            'src.common.transaction.time'
+        ) as time_mock, mock.patch(
+            'src.common.transaction.receipt_tracker'
+        ) as receipt_tracker:
+            execution_client.eth.get_transaction_count = mock.AsyncMock(return_value=5)
+            receipt_tracker.wait = mock.AsyncMock(side_effect=TimeoutError())
+            # the transactions at nonces 5 and 6 are stuck, the one at nonce 7 is not
+            for sent_at in (0, 0, 50):
+                time_mock.time.return_value = sent_at
+                await manager.transact(tx_function, high_priority=True)
+
+            time_mock.time.return_value = 100
+            await manager.transact(tx_function, high_priority=True)
+
+        assert [c.args[0]['nonce'] for c in transact.call_args_list] == [5, 6, 7, 5, 6, 8]
+        assert transact.call_args_list[3].args[0]['maxFeePerGas'] == ceil(
+            GWEI * REPLACEMENT_GAS_BUMP
+        )
+        # the replacements are appended to the hashes watched for the transaction
+        assert [c.args[0] for c in receipt_tracker.wait.call_args_list] == [
+            [HexBytes(5), HexBytes(0x11)],
+            [HexBytes(6), HexBytes(0x12)],
+            [HexBytes(7)],
+            [HexBytes(8)],
+        ]
+
+
 @pytest.mark.parametrize(
     'message',
     [
@@ -369,27 +604,30 @@ def _patch(
     execution_client.eth.get_transaction_count = mock.AsyncMock(
         side_effect=[latest_nonce, pending_nonce]
     )
-    if receipt_side_effect is not None:
-        execution_client.eth.wait_for_transaction_receipt = mock.AsyncMock(
-            side_effect=receipt_side_effect
-        )
-    else:
-        execution_client.eth.wait_for_transaction_receipt = mock.AsyncMock(
-            return_value={
-                'status': status,
-                'transactionHash': HexBytes('0xab'),
-                'blockNumber': 1,
-            }
-        )
+    receipt_tracker = mock.Mock()
+    receipt_tracker.wait = mock.AsyncMock(
+        side_effect=receipt_side_effect,
+        return_value={'status': status, 'transactionHash': HexBytes('0xab'), 'blockNumber': 1},
+    )
+    fee_oracle = mock.Mock()
+    fee_oracle.get_high_priority_tx_params.return_value = None
     account = mock.Mock()
-    account.address = '0x' + '11' * 20
+    account.address = WALLET
     with mock.patch('src.common.transaction.execution_client', execution_client), mock.patch(
         'src.common.transaction.keeper_account', account
-    ), mock.patch('src.common.transaction.gas_manager', gas_manager):
-        yield
+    ), mock.patch('src.common.transaction.gas_manager', gas_manager), mock.patch(
+        'src.common.transaction.receipt_tracker', receipt_tracker
+    ), mock.patch(
+        'src.common.transaction.fee_oracle', fee_oracle
+    ):
+        yield execution_client
 
 
-def _tx_function(transact_mock: mock.AsyncMock) -> mock.Mock:
+def _tx_function(
+    transact_mock: mock.AsyncMock, call_mock: mock.AsyncMock | None = None
+) -> mock.Mock:
     tx_function = mock.Mock()
     tx_function.transact = transact_mock
+    tx_function.call = call_mock or mock.AsyncMock()
+    tx_function.w3.eth.contract.return_value.encode_abi.return_value = '0x1234'
     return tx_function
@@ -0,0 +1,69 @@
+import hashlib
+import json
+from unittest import mock
+
+from aiohttp import hdrs
+
+from src.common.typings import FetchedResponse
+from src.common.utils import aiohttp_fetch
+
+URL = 'https://example.com/'
+
+
+class TestAiohttpFetch:
+    async def test_sends_validators_of_cached_response(self):
+        session, response = _mock_session(status=304)
+        cached = FetchedResponse(
+            data={'nonce': 1},
+            content_hash='hash',
+            etag='"v1"',
+            last_modified='Wed, 21 Oct 2015 07:28:00 GMT',
+        )
+
+        fetched = await aiohttp_fetch(session, URL, cached=cached)
+
+        session.get.assert_called_once_with(
+            url=URL,
+            headers={
+                hdrs.IF_NONE_MATCH: '"v1"',
+                hdrs.IF_MODIFIED_SINCE: 'Wed, 21 Oct 2015 07:28:00 GMT',
+            },
+        )
+        response.read.assert_not_awaited()
+        assert fetched.data is cached.data
+        assert fetched.status == 304
+        assert not fetched.changed
+
+    async def test_detects_unchanged_body_by_hash(self):
+        body = json.dumps({'nonce': 1}).encode()
+        session, _ = _mock_session(status=200, body=body)
+
+        fetched = await aiohttp_fetch(session, URL)
+        assert fetched.data == {'nonce': 1}
+        assert fetched.content_hash == hashlib.sha256(body).hexdigest()
+        assert fetched.changed
+
+        session.get.reset_mock()
+        refetched = await aiohttp_fetch(session, URL, cached=fetched)
+        session.get.assert_called_once_with(url=URL, headers={})
+        assert refetched.data is fetched.data
+        assert not refetched.changed
+
+    async def test_changed_body(self):
+        session, _ = _mock_session(status=200, body=b'{"nonce": 2}')
+        cached = FetchedResponse(data={'nonce': 1}, content_hash='hash')
+
+        fetched = await aiohttp_fetch(session, URL, cached=cached)
+
+        assert fetched.data == {'nonce': 2}
+        assert fetched.changed
+
+
+def _mock_session(status: int, body: bytes = b'') -> tuple[mock.MagicMock, mock.MagicMock]:
+    session = mock.MagicMock()
+    response = session.get.return_value.__aenter__.return_value
+    response.status = status
+    response.headers = {}
+    response.raise_for_status = mock.Mock()
+    response.read = mock.AsyncMock(return_value=body)
+    return session, response
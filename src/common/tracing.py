@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import json
+import logging
+import secrets
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from src.config.settings import TRACING_SPANS_PATH
+
+logger = logging.getLogger(__name__)
+
+# name of the scheduled task running in the current context
+service_name: ContextVar[str] = ContextVar('service_name', default='keeper')
+
+_current_span: ContextVar['Span | None'] = ContextVar('current_span', default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time: float
+    end_time: float | None = None
+    # None until the traced code sets it, `error` when it raises
+    outcome: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def set_outcome(self, outcome: str) -> None:
+        if self.outcome is None:
+            self.outcome = outcome
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'outcome': self.outcome,
+            'attributes': self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Records OpenTelemetry-style spans of the traced code.
+
+    A span started inside another span of the same context becomes its child
+    and shares its trace id. Finished spans are buffered and appended as json lines
+    to the file at `path` in a thread, no spans are written when the path is empty.
+    """
+
+    def __init__(self, path: str = TRACING_SPANS_PATH) -> None:
+        self.path = path
+        self._buffer: list[str] = []
+        self._writer: asyncio.Task | None = None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent else None,
+            start_time=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_outcome('error')
+            span.attributes['exception'] = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time()
+            self._export(span)
+
+    async def flush(self) -> None:
+        """Waits until the buffered spans are written."""
+        self._start_writer()
+        if self._writer is not None:
+            await self._writer
+
+    def _export(self, span: Span) -> None:
+        if not self.path:
+            return
+        self._buffer.append(json.dumps(span.to_dict(), default=str) + '\n')
+        try:
+            self._start_writer()
+        except RuntimeError:
+            # no running event loop, the spans are written on the next flush
+            pass
+
+    def _start_writer(self) -> None:
+        if self._buffer and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.get_running_loop().create_task(self._write_buffer())
+
+    async def _write_buffer(self) -> None:
+        # the spans finished during a write are written by the next iteration
+        while self._buffer:
+            lines, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write, self.path, lines)
+            except OSError as e:
+                logger.warning('Failed to export %d spans: %s', len(lines), repr(e))
+
+    @staticmethod
+    def _write(path: str, lines: list[str]) -> None:
+        with open(path, 'a', encoding='utf-8') as file:
+            file.writelines(lines)
+
+
+tracer = Tracer()
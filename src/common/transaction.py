@@ -1,21 +1,34 @@
 import asyncio
+import contextlib
 import logging
+import time
+from dataclasses import dataclass, field
 from math import ceil
+from typing import Any, Iterator
 
+from eth_typing import BlockNumber, HexStr
 from hexbytes import HexBytes
 from web3 import Web3
 from web3.contract.async_contract import AsyncContractFunction
-from web3.exceptions import TimeExhausted, Web3RPCError
+from web3.exceptions import ContractLogicError, Web3RPCError
 from web3.types import Nonce, TxParams, TxReceipt, Wei
 
 from src.common.accounts import keeper_account
 from src.common.clients import execution_client, gas_manager
+from src.common.fees import fee_oracle
+from src.common.journal import NonceJournal
+from src.common.receipts import receipt_tracker
+from src.common.scheduler import current_chain_context
+from src.common.tracing import Span, service_name, tracer
 from src.config.settings import (
     ATTEMPTS_WITH_DEFAULT_GAS,
     EXECUTION_TRANSACTION_TIMEOUT,
     MAX_FEE_PER_GAS_GWEI,
+    NETWORK,
     NETWORK_CONFIG,
+    TRANSACTION_PIPELINE_SIZE,
 )
+from src.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +42,15 @@ REPLACEMENT_GAS_BUMP = 1.125
 MIN_REPLACEMENT_RATIO = 1.1
 
 
+class TransactionRevertedError(Exception):
+    """Raised when the transaction reverts on simulation against the pending block."""
+
+    def __init__(self, reason: str | None, data: str | dict | None = None) -> None:
+        super().__init__(f'Transaction reverts: {reason}')
+        self.reason = reason
+        self.data = data
+
+
 class Fees:
     """
     Holds EIP-1559 gas fees and keeps two invariants:
@@ -92,6 +114,20 @@ class Fees:
         return ceil(value * REPLACEMENT_GAS_BUMP)
 
 
+@dataclass
+class PendingTransaction:
+    """Transaction broadcast in the pipelined mode and not confirmed yet."""
+
+    nonce: Nonce
+    tx_function: AsyncContractFunction
+    # params without the nonce and fees, the replacement is built from them
+    tx_params: TxParams
+    first_sent_at: float
+    sent_at: float
+    # hashes of the transaction and its replacements, the last one is the latest
+    tx_hashes: list[HexBytes] = field(default_factory=list)
+
+
 class TransactionManager:
     """
     Submits wallet transactions, keeping at most one in flight at a time.
@@ -116,27 +152,95 @@ class TransactionManager:
     two tasks can collide on a nonce. On a receipt timeout the lock is released with
     the transaction still pending, so a different task may replace it on its next run.
     That is harmless.
+
+    Every transaction is simulated with `eth_call` against the pending block before the
+    lock is taken, so a transaction that would revert raises `TransactionRevertedError`
+    without holding the lock. Simulation results are cached by calldata for the head
+    of the scheduled task, they are not cached outside of the scheduled tasks.
+
+    With a pipeline size above 1 the manager switches to the pipelined mode: the lock
+    only covers the nonce assignment and the broadcast, up to `pipeline_size`
+    transactions are in flight with consecutive nonces and their receipts are awaited
+    concurrently. A transaction not confirmed within `EXECUTION_TRANSACTION_TIMEOUT`
+    blocks all the later nonces, so before every broadcast the stuck prefix of the
+    pending transactions is replaced in nonce order with bumped fees.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, pipeline_size: int = TRANSACTION_PIPELINE_SIZE) -> None:
         self._lock = asyncio.Lock()
+        self.pipeline_size = pipeline_size
+        self._pipeline_slots = asyncio.Semaphore(pipeline_size)
+        # nonce -> transaction broadcast in the pipelined mode
+        self._pending: dict[Nonce, PendingTransaction] = {}
+        # next nonce assigned in the pipelined mode
+        self._next_nonce: Nonce | None = None
         # nonce -> tx params last broadcast for it, used to size the replacement bump
         self._nonce_to_tx_params: dict[int, TxParams] = {}
+        # the tx params are persisted when the journal is set
+        self.journal: NonceJournal | None = None
+        # block the simulations were cached for
+        self._simulations_block: BlockNumber | None = None
+        # (to, calldata, value) -> revert error, None when the simulation succeeded
+        self._simulations: dict[tuple, TransactionRevertedError | None] = {}
 
     async def transact(
         self,
         tx_function: AsyncContractFunction,
         tx_params: TxParams | None = None,
         high_priority: bool = False,
-        estimate_gas: bool = False,
     ) -> TxReceipt | None:
-        params: TxParams = dict(tx_params or {})  # type: ignore[assignment]
-        # serialize submit + receipt wait so only one wallet tx is in flight at a time
-        async with self._lock:
-            if estimate_gas:
-                # simulate the transaction before submitting it
-                await tx_function.estimate_gas(params)
-            return await self._transact(tx_function, params, high_priority)
+        with _trace_stage('transact', high_priority=high_priority) as span:
+            params: TxParams = dict(tx_params or {})  # type: ignore[assignment]
+            await self._simulate(tx_function, params)
+            if self.pipeline_size > 1:
+                tx_receipt = await self._transact_pipelined(tx_function, params, high_priority)
+            else:
+                # serialize submit + receipt wait so only one wallet tx is in flight at a time
+                async with self._lock:
+                    tx_receipt = await self._transact(tx_function, params, high_priority)
+            span.set_outcome('not_confirmed' if tx_receipt is None else 'confirmed')
+            return tx_receipt
+
+    async def _simulate(self, tx_function: AsyncContractFunction, tx_params: TxParams) -> None:
+        """Raises `TransactionRevertedError` if the transaction reverts in the pending block."""
+        chain_context = current_chain_context.get()
+        if chain_context is None:
+            error = await self._call(tx_function, tx_params)
+        else:
+            # the results are cached for the head of the running task
+            if chain_context.head_block != self._simulations_block:
+                self._simulations_block = chain_context.head_block
+                self._simulations = {}
+            key = (
+                tx_function.address,
+                _encode_calldata(tx_function),
+                tx_params.get('value', 0),
+            )
+            if key not in self._simulations:
+                self._simulations[key] = await self._call(tx_function, tx_params)
+            error = self._simulations[key]
+
+        if error is not None:
+            logger.warning(
+                'Transaction to %s is not submitted, it reverts: %s',
+                tx_function.address,
+                error.reason,
+            )
+            raise TransactionRevertedError(error.reason, error.data)
+
+    async def _call(
+        self, tx_function: AsyncContractFunction, tx_params: TxParams
+    ) -> TransactionRevertedError | None:
+        """Returns the revert error of the transaction in the pending block."""
+        params: TxParams = {'from': keeper_account.address, **tx_params}
+        try:
+            await tx_function.call(params, block_identifier='pending')
+        except ContractLogicError as e:
+            return TransactionRevertedError(e.message, e.data)
+        except Exception as e:
+            # the transaction is submitted when the node fails to simulate it
+            logger.warning('Failed to simulate transaction: %s', repr(e))
+        return None
 
     async def _transact(
         self,
@@ -152,35 +256,173 @@ class TransactionManager:
 
         # forget gas records for nonces that have already been mined (nonce
         # `latest_nonce` itself may still be pending, so keep it)
-        self._nonce_to_tx_params = {
-            n: p for n, p in self._nonce_to_tx_params.items() if n >= latest_nonce
-        }
+        await self._forget_mined_nonces(latest_nonce)
 
         if pending_nonce > latest_nonce:
             # an earlier transaction is stuck at latest_nonce - replace it instead of
             # queuing a new one behind it (skip the default-gas attempts)
             logger.info('Found pending transaction at nonce %d, replacing it', latest_nonce)
             tx_hash = await self._submit_high_priority(tx_function, tx_params, latest_nonce)
-        elif high_priority:
-            tx_hash = await self._submit_high_priority(tx_function, tx_params, latest_nonce)
         else:
-            tx_hash = await self._submit_default_gas(tx_function, tx_params, latest_nonce)
-            if tx_hash is None:
-                # default gas was not accepted - escalate to high priority fees
-                tx_hash = await self._submit_high_priority(tx_function, tx_params, latest_nonce)
+            tx_hash = await self._submit(tx_function, tx_params, latest_nonce, high_priority)
 
         if tx_hash is None:
             # nothing was broadcast (the pending tx is pinned at the fee ceiling)
             return None
         return await self._wait_for_receipt(tx_hash)
 
+    async def _transact_pipelined(
+        self,
+        tx_function: AsyncContractFunction,
+        tx_params: TxParams,
+        high_priority: bool,
+    ) -> TxReceipt | None:
+        async with self._pipeline_slots:
+            # only the nonce assignment and the broadcast are serialized
+            async with self._lock:
+                tx = await self._broadcast_pipelined(tx_function, tx_params, high_priority)
+            if tx is None:
+                return None
+            return await self._wait_for_pipelined_receipt(tx)
+
+    async def _broadcast_pipelined(
+        self,
+        tx_function: AsyncContractFunction,
+        tx_params: TxParams,
+        high_priority: bool,
+    ) -> PendingTransaction | None:
+        address = keeper_account.address
+        latest_nonce = await execution_client.eth.get_transaction_count(address, 'latest')
+        pending_nonce = await execution_client.eth.get_transaction_count(address, 'pending')
+
+        await self._forget_mined_nonces(latest_nonce)
+        self._pending = {n: tx for n, tx in self._pending.items() if n >= latest_nonce}
+
+        if pending_nonce > latest_nonce and latest_nonce not in self._pending:
+            # the pending transaction was not sent by the pipeline (e.g. before a restart),
+            # replace it as in the single transaction mode
+            logger.info('Found pending transaction at nonce %d, replacing it', latest_nonce)
+            nonce = latest_nonce
+            tx_hash = await self._submit_high_priority(tx_function, tx_params, nonce)
+        else:
+            await self._replace_stuck_prefix()
+            # a nonce dropped by the node is re-broadcast with the stuck prefix
+            nonce = Nonce(max(pending_nonce, self._next_nonce or 0))
+            tx_hash = await self._submit(tx_function, tx_params, nonce, high_priority)
+
+        if tx_hash is None:
+            return None
+
+        self._next_nonce = Nonce(max(nonce + 1, self._next_nonce or 0))
+        sent_at = time.time()
+        tx = PendingTransaction(
+            nonce=nonce,
+            tx_function=tx_function,
+            tx_params=tx_params,
+            first_sent_at=sent_at,
+            sent_at=sent_at,
+            tx_hashes=[tx_hash],
+        )
+        self._pending[nonce] = tx
+        metrics.transaction_queue_depth.labels(network=NETWORK).set(len(self._pending))
+        return tx
+
+    async def _replace_stuck_prefix(self) -> None:
+        """
+        Replaces the pending transactions not confirmed within the timeout, lowest nonce first.
+        Stops at the first transaction that is not stuck, the later ones wait for it.
+        """
+        for nonce in sorted(self._pending):
+            tx = self._pending[nonce]
+            if time.time() - tx.sent_at < EXECUTION_TRANSACTION_TIMEOUT:
+                return
+            logger.info('Replacing stuck transaction at nonce %d', nonce)
+            tx_hash = await self._submit_high_priority(tx.tx_function, tx.tx_params, nonce)
+            if tx_hash is None:
+                # the fees cannot be bumped, the later nonces are blocked anyway
+                return
+            tx.tx_hashes.append(tx_hash)
+            tx.sent_at = time.time()
+
+    async def _wait_for_pipelined_receipt(self, tx: PendingTransaction) -> TxReceipt | None:
+        logger.info(
+            'Waiting for transaction %s confirmation at nonce %d',
+            Web3.to_hex(tx.tx_hashes[-1]),
+            tx.nonce,
+        )
+        with _trace_stage('receipt', nonce=tx.nonce) as span:
+            try:
+                # the transaction or any of its replacements may be mined
+                tx_receipt = await receipt_tracker.wait(
+                    tx.tx_hashes, timeout=EXECUTION_TRANSACTION_TIMEOUT
+                )
+            except TimeoutError:
+                logger.info(
+                    'Transaction at nonce %d is still pending, '
+                    'will replace it before the next one',
+                    tx.nonce,
+                )
+                span.set_outcome('timeout')
+                return None
+
+            if self._pending.get(tx.nonce) is tx:
+                del self._pending[tx.nonce]
+            metrics.transaction_queue_depth.labels(network=NETWORK).set(len(self._pending))
+            metrics.transaction_confirmation_latency.labels(network=NETWORK).observe(
+                time.time() - tx.first_sent_at
+            )
+            if not tx_receipt['status']:
+                span.set_outcome('failed')
+                return None
+            span.set_outcome('confirmed')
+            return tx_receipt
+
+    async def _submit(
+        self,
+        tx_function: AsyncContractFunction,
+        tx_params: TxParams,
+        nonce: Nonce,
+        high_priority: bool,
+    ) -> HexBytes | None:
+        if high_priority:
+            return await self._submit_high_priority(tx_function, tx_params, nonce)
+
+        tx_hash = await self._submit_default_gas(tx_function, tx_params, nonce)
+        if tx_hash is None:
+            # default gas was not accepted - escalate to high priority fees
+            tx_hash = await self._submit_high_priority(tx_function, tx_params, nonce)
+        return tx_hash
+
     async def _submit_high_priority(
         self,
         tx_function: AsyncContractFunction,
         tx_params: TxParams,
         nonce: Nonce,
     ) -> HexBytes | None:
-        gas_params = await gas_manager.get_high_priority_tx_params()
+        # a transaction sent for this nonce is still pending, it is replaced
+        replacement = nonce in self._nonce_to_tx_params
+        with _trace_stage('high_priority', nonce=nonce, replacement=replacement) as span:
+            tx_hash = await self._submit_high_priority_fees(tx_function, tx_params, nonce)
+            if tx_hash is None:
+                span.set_outcome('not_sent')
+                return None
+            span.set_outcome('sent')
+        if replacement:
+            metrics.transaction_replacements.labels(
+                network=NETWORK, service=service_name.get()
+            ).inc()
+        return tx_hash
+
+    async def _submit_high_priority_fees(
+        self,
+        tx_function: AsyncContractFunction,
+        tx_params: TxParams,
+        nonce: Nonce,
+    ) -> HexBytes | None:
+        gas_params = fee_oracle.get_high_priority_tx_params()
+        if gas_params is None:
+            # the fee oracle window is not filled yet or is stale
+            gas_params = await gas_manager.get_high_priority_tx_params()
         fees = Fees.from_tx_params(gas_params)
 
         prev = self._nonce_to_tx_params.get(nonce)
@@ -214,11 +456,37 @@ class TransactionManager:
                 nonce,
                 _rpc_error_message(e),
             )
-            self._nonce_to_tx_params[nonce] = params
+            await self._record_tx_params(nonce, params)
             return None
-        self._nonce_to_tx_params[nonce] = params
+        await self._record_tx_params(nonce, params)
         return tx_hash
 
+    async def load_journal(self, journal: NonceJournal) -> None:
+        """Restores the fees broadcast before the restart and journals the next ones."""
+        self.journal = journal
+        self._nonce_to_tx_params = await asyncio.to_thread(journal.load)
+        if self._nonce_to_tx_params:
+            logger.info(
+                'Loaded fees of pending nonces %s from %s',
+                ', '.join(str(n) for n in sorted(self._nonce_to_tx_params)),
+                journal.path,
+            )
+
+    async def _record_tx_params(self, nonce: Nonce, tx_params: TxParams) -> None:
+        self._nonce_to_tx_params[nonce] = tx_params
+        if self.journal is not None:
+            await self.journal.record(nonce, tx_params)
+
+    async def _forget_mined_nonces(self, latest_nonce: Nonce) -> None:
+        nonce_to_tx_params = {
+            n: p for n, p in self._nonce_to_tx_params.items() if n >= latest_nonce
+        }
+        if len(nonce_to_tx_params) == len(self._nonce_to_tx_params):
+            return
+        self._nonce_to_tx_params = nonce_to_tx_params
+        if self.journal is not None:
+            await self.journal.rewrite(nonce_to_tx_params)
+
     async def _submit_default_gas(
         self,
         tx_function: AsyncContractFunction,
@@ -228,33 +496,47 @@ class TransactionManager:
         # try the node's default gas, waiting a block between FeeTooLow rejections;
         # returns None if every attempt is rejected so the caller can escalate
         params: TxParams = {**tx_params, 'nonce': nonce}
-        for i in range(ATTEMPTS_WITH_DEFAULT_GAS):
-            try:
-                return await tx_function.transact(params)
-            except Web3RPCError as e:
-                if not _is_fee_too_low_error(e):
-                    raise
-                if i < ATTEMPTS_WITH_DEFAULT_GAS - 1:  # skip the last sleep
-                    await asyncio.sleep(NETWORK_CONFIG.SECONDS_PER_BLOCK)
-
-        return None
+        with _trace_stage('default_gas', nonce=nonce) as span:
+            for i in range(ATTEMPTS_WITH_DEFAULT_GAS):
+                span.attributes['attempts'] = i + 1
+                try:
+                    tx_hash = await tx_function.transact(params)
+                except Web3RPCError as e:
+                    if not _is_fee_too_low_error(e):
+                        raise
+                    if i < ATTEMPTS_WITH_DEFAULT_GAS - 1:  # skip the last sleep
+                        await asyncio.sleep(NETWORK_CONFIG.SECONDS_PER_BLOCK)
+                    continue
+                span.set_outcome('sent')
+                return tx_hash
+
+            span.set_outcome('fee_too_low')
+            return None
 
     @staticmethod
     async def _wait_for_receipt(tx_hash: HexBytes) -> TxReceipt | None:
         logger.info('Waiting for transaction %s confirmation', Web3.to_hex(tx_hash))
-        try:
-            tx_receipt = await execution_client.eth.wait_for_transaction_receipt(
-                tx_hash, timeout=EXECUTION_TRANSACTION_TIMEOUT
-            )
-        except TimeExhausted:
-            logger.info(
-                'Transaction %s is still pending, will replace it on the next run',
-                Web3.to_hex(tx_hash),
+        sent_at = time.time()
+        with _trace_stage('receipt', tx_hash=Web3.to_hex(tx_hash)) as span:
+            try:
+                tx_receipt = await receipt_tracker.wait(
+                    [tx_hash], timeout=EXECUTION_TRANSACTION_TIMEOUT
+                )
+            except TimeoutError:
+                logger.info(
+                    'Transaction %s is still pending, will replace it on the next run',
+                    Web3.to_hex(tx_hash),
+                )
+                span.set_outcome('timeout')
+                return None
+            metrics.transaction_confirmation_latency.labels(network=NETWORK).observe(
+                time.time() - sent_at
             )
-            return None
-        if not tx_receipt['status']:
-            return None
-        return tx_receipt
+            if not tx_receipt['status']:
+                span.set_outcome('failed')
+                return None
+            span.set_outcome('confirmed')
+            return tx_receipt
 
 
 # Node rejection messages (lowercased substrings) that a fee bump can clear. The
@@ -272,6 +554,34 @@ _FEE_TOO_LOW_MESSAGES = (
 )
 
 
+@contextlib.contextmanager
+def _trace_stage(stage: str, **attributes: Any) -> Iterator[Span]:
+    """Traces a transaction stage and observes its duration by the calling service."""
+    service = service_name.get()
+    with tracer.span(f'transaction.{stage}', service=service, **attributes) as span:
+        try:
+            yield span
+        except TransactionRevertedError:
+            span.set_outcome('reverted')
+            raise
+        except BaseException:
+            span.set_outcome('error')
+            raise
+        finally:
+            metrics.transaction_stage_duration.labels(
+                network=NETWORK, service=service, stage=stage, outcome=span.outcome or 'unknown'
+            ).observe(span.duration)
+
+
+def _encode_calldata(tx_function: AsyncContractFunction) -> HexStr:
+    contract = tx_function.w3.eth.contract(
+        address=tx_function.address, abi=tx_function.contract_abi
+    )
+    return contract.encode_abi(
+        tx_function.abi_element_identifier, args=tx_function.args, kwargs=tx_function.kwargs
+    )
+
+
 def _rpc_error_message(e: Web3RPCError) -> str:
     rpc_response = getattr(e, 'rpc_response', None)
     if isinstance(rpc_response, dict) and isinstance(rpc_response.get('error'), dict):
@@ -1,10 +1,15 @@
 from dataclasses import dataclass
+from typing import Any
 
-from eth_typing import ChecksumAddress
+from eth_typing import BlockNumber, ChecksumAddress, HexStr
 from hexbytes import HexBytes
+from sw_utils.typings import ChainHead
 from web3 import Web3
 from web3.types import Wei
 
+# target contract and calldata of a multicall `aggregate` call
+MulticallCall = tuple[ChecksumAddress, HexStr]
+
 
 @dataclass
 class HarvestParams:
@@ -84,3 +89,32 @@ class Vault:
             proof_unlocked_mev_reward=proof_unlocked_mev_reward,
             proof=proof,
         )
+
+
+@dataclass
+class ChainContext:
+    """
+    Chain state fetched once per new head and shared by all the tasks started for it,
+    so that every service reasons about the same blocks.
+    """
+
+    head_block: BlockNumber
+    finalized_block: BlockNumber
+    # consensus finalized head, None when the consensus node is not available
+    chain_head: ChainHead | None
+    # last block synced by the graph node, None when the graph is not used or not available
+    graph_block: BlockNumber | None
+
+
+@dataclass
+class FetchedResponse:
+    """Json response with the validators used to revalidate it on the next request."""
+
+    data: Any
+    # sha256 of the response body, detects unchanged bodies sent without validators
+    content_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+    status: int = 200
+    # False when the server replied 304 or sent the same body as the cached response
+    changed: bool = True
@@ -1,8 +1,52 @@
+import hashlib
+import json
+from dataclasses import replace
+from http import HTTPStatus
+
 import aiohttp
+from aiohttp import hdrs
+
+from src.common.typings import FetchedResponse
+
 
+async def aiohttp_fetch(
+    session: aiohttp.ClientSession, url: str, cached: FetchedResponse | None = None
+) -> FetchedResponse:
+    """
+    Fetches the json resource.
+    When the cached response is passed, the request is made conditional on its ETag
+    and Last-Modified. A 304 reply or a body with the same content hash returns
+    the cached data without parsing it again.
+    """
+    headers = {}
+    if cached is not None and cached.etag:
+        headers[hdrs.IF_NONE_MATCH] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers[hdrs.IF_MODIFIED_SINCE] = cached.last_modified
 
-async def aiohttp_fetch(session: aiohttp.ClientSession, url: str) -> dict:
-    async with session.get(url=url) as response:
+    async with session.get(url=url, headers=headers) as response:
+        if cached is not None and response.status == HTTPStatus.NOT_MODIFIED:
+            return replace(cached, status=response.status, changed=False)
         response.raise_for_status()
-        data = await response.json()
-    return data
+        body = await response.read()
+
+        etag = response.headers.get(hdrs.ETAG)
+        last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    if cached is not None and cached.content_hash == content_hash:
+        return replace(
+            cached,
+            etag=etag,
+            last_modified=last_modified,
+            status=response.status,
+            changed=False,
+        )
+
+    return FetchedResponse(
+        data=json.loads(body),
+        content_hash=content_hash,
+        etag=etag,
+        last_modified=last_modified,
+        status=response.status,
+    )
@@ -21,6 +21,18 @@ NETWORK_CONFIG: NetworkConfig = NETWORKS[NETWORK]
 EXECUTION_ENDPOINTS: list[str] = config('EXECUTION_ENDPOINTS', cast=Csv())
 CONSENSUS_ENDPOINTS: list[str] = config('CONSENSUS_ENDPOINTS', cast=Csv())
 
+# Optional execution node websocket endpoint used to subscribe to new heads.
+# New heads are polled with eth_blockNumber when it is not set.
+EXECUTION_WS_ENDPOINT: str = config('EXECUTION_WS_ENDPOINT', default='')
+HEAD_POLL_INTERVAL: float = config('HEAD_POLL_INTERVAL', default=1.0, cast=float)
+
+# Every keeper task is cancelled when it does not complete within its timeout.
+# Force exits and LTV updates submit a transaction per position, so they get a longer budget.
+TASK_TIMEOUT: int = config('TASK_TIMEOUT', default=10 * 60, cast=int)
+LONG_TASK_TIMEOUT: int = config('LONG_TASK_TIMEOUT', default=60 * 60, cast=int)
+# Upper bound of the exponential backoff applied after failed task runs
+TASK_MAX_BACKOFF: int = config('TASK_MAX_BACKOFF', default=5 * 60, cast=int)
+
 # keeper
 PRIVATE_KEY: str = config('PRIVATE_KEY')
 
@@ -83,6 +95,8 @@ IPFS_CLIENT_RETRY_TIMEOUT: int = config('IPFS_CLIENT_RETRY_TIMEOUT', default=120
 
 DEFAULT_RETRY_TIME = 30
 VALIDATORS_FETCH_CHUNK_SIZE: int = config('VALIDATORS_FETCH_CHUNK_SIZE', default=100, cast=int)
+# processes reconstructing the exit signatures, 0 uses all the cores
+EXIT_SIGNATURES_WORKERS: int = config('EXIT_SIGNATURES_WORKERS', default=0, cast=int)
 
 # sentry config
 SENTRY_DSN: str = config('SENTRY_DSN', default='')
@@ -100,9 +114,41 @@ EVENTS_RANGE_SEC: int = config('EVENTS_RANGE_SEC', default=43200, cast=int)
 EVENTS_CONCURRENCY: int = config('EVENTS_CONCURRENCY', default=10, cast=int)
 
 ORACLE_TIMEOUT: int = config('ORACLE_TIMEOUT', default=60, cast=int)
+# delay in seconds before the secondary endpoints of an oracle are queried,
+# 0 queries all the endpoints at once
+ORACLE_HEDGE_DELAY: float = config('ORACLE_HEDGE_DELAY', default=1.0, cast=float)
+# consecutive failures after which an oracle endpoint is skipped
+ORACLE_CIRCUIT_FAILURE_THRESHOLD: int = config(
+    'ORACLE_CIRCUIT_FAILURE_THRESHOLD', default=3, cast=int
+)
+# delay in seconds between the probes of a skipped oracle endpoint
+ORACLE_CIRCUIT_PROBE_INTERVAL: int = config('ORACLE_CIRCUIT_PROBE_INTERVAL', default=60, cast=int)
+
+# oracles http connection pool
+ORACLE_CONNECTIONS_LIMIT: int = config('ORACLE_CONNECTIONS_LIMIT', default=100, cast=int)
+ORACLE_CONNECTIONS_LIMIT_PER_HOST: int = config(
+    'ORACLE_CONNECTIONS_LIMIT_PER_HOST', default=10, cast=int
+)
+# keep idle connections open longer than a block so that they are reused on the next one
+ORACLE_KEEPALIVE_TIMEOUT: int = config('ORACLE_KEEPALIVE_TIMEOUT', default=60, cast=int)
+ORACLE_DNS_CACHE_TTL: int = config('ORACLE_DNS_CACHE_TTL', default=300, cast=int)
+
+# sqlite file the rewards votes cache is persisted to, the cache is kept in memory only when empty
+REWARDS_CACHE_PATH: str = config('REWARDS_CACHE_PATH', default='')
 
 # gas settings
 MAX_FEE_PER_GAS_GWEI: int = config('MAX_FEE_PER_GAS_GWEI', default=100, cast=int)
 PRIORITY_FEE_NUM_BLOCKS: int = config('PRIORITY_FEE_NUM_BLOCKS', default=10, cast=int)
 PRIORITY_FEE_PERCENTILE: float = config('PRIORITY_FEE_PERCENTILE', default=80.0, cast=float)
 ATTEMPTS_WITH_DEFAULT_GAS: int = config('ATTEMPTS_WITH_DEFAULT_GAS', default=5, cast=int)
+# number of transactions broadcast at once with consecutive nonces,
+# 1 keeps a single transaction in flight
+TRANSACTION_PIPELINE_SIZE: int = config('TRANSACTION_PIPELINE_SIZE', default=1, cast=int)
+# file the fees of the pending transactions are journaled to, not persisted when empty
+TRANSACTION_JOURNAL_PATH: str = config('TRANSACTION_JOURNAL_PATH', default='')
+# file the transaction spans are appended to as json lines, not traced when empty
+TRACING_SPANS_PATH: str = config('TRACING_SPANS_PATH', default='')
+# gas limit of a multicall transaction bundling independent keeper actions
+TRANSACTION_BUNDLE_GAS_LIMIT: int = config(
+    'TRANSACTION_BUNDLE_GAS_LIMIT', default=10_000_000, cast=int
+)
@@ -1,26 +1,38 @@
-import asyncio
 import logging
 from collections import Counter
-from urllib.parse import urljoin
 
-import aiohttp
-from aiohttp import ClientSession, ClientTimeout
 from eth_typing import HexStr
 from sw_utils import Oracle, ProtocolConfig
 from web3 import Web3
 
 from src.common.contracts import merkle_distributor_contract
-from src.common.utils import aiohttp_fetch
-from src.config import settings
+from src.common.signatures import TypedDataSigners
+from src.common.typings import ChainContext
 from src.distributor.typings import DistributorRewardVote, DistributorRewardVoteBody
+from src.oracles.poller import DISTRIBUTOR_REWARDS_VOTE_URL_PATH, oracle_poller
+from src.oracles.typings import OraclesSnapshot
 
 logger = logging.getLogger(__name__)
 
-DISTRIBUTOR_REWARDS_VOTE_URL_PATH = '/distributor-rewards'
+# the votes are signed for the merkle distributor contract
+distributor_vote_signers = TypedDataSigners(
+    contract=merkle_distributor_contract,
+    primary_type='MerkleDistributor',
+    message_type=[
+        {'name': 'rewardsRoot', 'type': 'bytes32'},
+        {'name': 'rewardsIpfsHash', 'type': 'string'},
+        {'name': 'nonce', 'type': 'uint64'},
+    ],
+)
 
 
-async def process_distributor_rewards(protocol_config: ProtocolConfig) -> None:
-    votes = await _fetch_distributor_reward_votes(protocol_config.oracles)
+async def process_distributor_rewards(
+    protocol_config: ProtocolConfig, chain_context: ChainContext
+) -> None:
+    oracles_snapshot = await oracle_poller.get_snapshot(
+        protocol_config.oracles, chain_context.head_block
+    )
+    votes = _get_distributor_reward_votes(oracles_snapshot, protocol_config.oracles)
     if not votes:
         logger.info('No active votes')
         return
@@ -39,6 +51,12 @@ async def process_distributor_rewards(protocol_config: ProtocolConfig) -> None:
         logger.info('No votes with timestamp > next update timestamp')
         return
 
+    # a single invalid signature reverts the rewards root update
+    votes = await _verify_votes(votes)
+    if not votes:
+        logger.warning('No votes with valid signatures')
+        return
+
     counter = Counter([vote.body for vote in votes])
     winner, winner_vote_count = counter.most_common(1)[0]
 
@@ -75,46 +93,57 @@ async def process_distributor_rewards(protocol_config: ProtocolConfig) -> None:
     )
 
 
-async def _fetch_distributor_reward_votes(oracles: list[Oracle]) -> list[DistributorRewardVote]:
-    async with aiohttp.ClientSession(timeout=ClientTimeout(settings.ORACLE_TIMEOUT)) as session:
-        results = await asyncio.gather(
-            *[_fetch_vote_from_oracle(session=session, oracle=oracle) for oracle in oracles],
-            return_exceptions=True,
-        )
+async def _verify_votes(votes: list[DistributorRewardVote]) -> list[DistributorRewardVote]:
+    """Returns the votes signed by their oracles."""
+    return await distributor_vote_signers.filter_signed(
+        votes,
+        [
+            (
+                (vote.body, vote.nonce),
+                {
+                    'rewardsRoot': vote.body.root,
+                    'rewardsIpfsHash': vote.body.ipfs_hash,
+                    'nonce': vote.nonce,
+                },
+                _signature_to_bytes(vote.signature),
+            )
+            for vote in votes
+        ],
+    )
+
+
+def _signature_to_bytes(signature: HexStr) -> bytes:
+    try:
+        return Web3.to_bytes(hexstr=signature)
+    except ValueError:
+        # the signer of a malformed signature is not recovered
+        return b''
 
+
+def _get_distributor_reward_votes(
+    oracles_snapshot: OraclesSnapshot, oracles: list[Oracle]
+) -> list[DistributorRewardVote]:
     votes: list[DistributorRewardVote] = []
-    for result in results:
-        if result is None:
-            continue
-        if isinstance(result, Exception):
-            logger.warning(result)
-            continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
-        votes.append(result)
+    for oracle in oracles:
+        vote = _get_vote_from_oracle(oracles_snapshot, oracle)
+        if vote is not None:
+            votes.append(vote)
 
     return votes
 
 
-async def _fetch_vote_from_oracle(
-    session: ClientSession, oracle: Oracle
+def _get_vote_from_oracle(
+    oracles_snapshot: OraclesSnapshot, oracle: Oracle
 ) -> DistributorRewardVote | None:
-    results = await asyncio.gather(
-        *(_fetch_vote_from_endpoint(session, oracle, endpoint) for endpoint in oracle.endpoints),
-        return_exceptions=True,
-    )
     votes: list[DistributorRewardVote] = []
-    for endpoint, result in zip(oracle.endpoints, results):
-        if result is None:
+    for endpoint in oracles_snapshot.polled_endpoints(oracle, DISTRIBUTOR_REWARDS_VOTE_URL_PATH):
+        try:
+            vote = _get_vote_from_endpoint(oracles_snapshot, oracle, endpoint)
+        except Exception as e:
+            logger.warning('%r from %s', e, endpoint)
             continue
-        if isinstance(result, Exception):
-            logger.warning('%r from %s', result, endpoint)
-            continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
-        votes.append(result)
+        if vote is not None:
+            votes.append(vote)
 
     if not votes:
         return None
@@ -125,12 +154,19 @@ async def _fetch_vote_from_oracle(
     return votes[0]
 
 
-async def _fetch_vote_from_endpoint(
-    session: ClientSession, oracle: Oracle, endpoint: str
+def _get_vote_from_endpoint(
+    oracles_snapshot: OraclesSnapshot, oracle: Oracle, endpoint: str
 ) -> DistributorRewardVote | None:
-    url = urljoin(endpoint, DISTRIBUTOR_REWARDS_VOTE_URL_PATH)
-    data = await aiohttp_fetch(session, url)
+    # an unchanged vote is not parsed again
+    return oracles_snapshot.get_parsed(
+        oracle,
+        endpoint,
+        DISTRIBUTOR_REWARDS_VOTE_URL_PATH,
+        lambda data: _parse_vote(oracle, endpoint, data),
+    )
+
 
+def _parse_vote(oracle: Oracle, endpoint: str, data: dict) -> DistributorRewardVote | None:
     if not data:
         return None
 
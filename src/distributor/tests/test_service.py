@@ -1,24 +1,51 @@
-import asyncio
+import hashlib
+import json
 import random
 from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import replace
+from typing import ContextManager
 from unittest import mock
 from unittest.mock import patch
+from urllib.parse import urljoin
 
-from eth_typing import HexStr
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_account.signers.local import LocalAccount
+from eth_typing import BlockNumber, HexStr
+from eth_utils import keccak
 from sw_utils.tests.factories import faker, get_mocked_protocol_config
 from sw_utils.typings import Oracle
 from web3 import Web3
 from web3.types import Timestamp
 
-from src.common.tests.factories import create_oracle
+from src.common.signatures import _recover_signers
+from src.common.tests.factories import (
+    create_chain_context,
+    create_oracle,
+    sign_struct_hash,
+)
+from src.common.typings import FetchedResponse
 from src.distributor.service import (
-    _fetch_distributor_reward_votes,
-    _fetch_vote_from_oracle,
+    _get_distributor_reward_votes,
+    _get_vote_from_oracle,
+    _parse_vote,
+    _verify_votes,
+    distributor_vote_signers,
     merkle_distributor_contract,
     process_distributor_rewards,
 )
 from src.distributor.tests.factories import create_distributor_reward_vote
 from src.distributor.typings import DistributorRewardVote, DistributorRewardVoteBody
+from src.oracles.poller import DISTRIBUTOR_REWARDS_VOTE_URL_PATH, oracle_poller
+from src.oracles.typings import OraclesSnapshot
+
+# keccak256 of the MerkleDistributor type string of the distributor contract:
+# MerkleDistributor(bytes32 rewardsRoot,string rewardsIpfsHash,uint64 nonce)
+MERKLE_DISTRIBUTOR_TYPE_HASH = bytes.fromhex(
+    '60527237c36ea83a51dec1dbbd147061794316200e7f35e1a153b95550ab8559'
+)
 
 
 class TestProcessDistributorRewards:
@@ -28,7 +55,9 @@ class TestProcessDistributorRewards:
             self.patch_fetch_votes(votes),
             self.patch_submit_vote() as submit_mock,
         ):
-            await process_distributor_rewards(get_mocked_protocol_config(oracles_count=5))
+            await process_distributor_rewards(
+                get_mocked_protocol_config(oracles_count=5), create_chain_context()
+            )
             submit_mock.assert_not_called()
 
     async def test_no_votes_with_current_nonce(self):
@@ -41,7 +70,9 @@ class TestProcessDistributorRewards:
             ),
             self.patch_submit_vote() as submit_mock,
         ):
-            await process_distributor_rewards(get_mocked_protocol_config(oracles_count=5))
+            await process_distributor_rewards(
+                get_mocked_protocol_config(oracles_count=5), create_chain_context()
+            )
             submit_mock.assert_not_called()
 
     async def test_no_votes_with_timestamp_greater_than_next_update_timestamp(self):
@@ -58,7 +89,9 @@ class TestProcessDistributorRewards:
             ),
             self.patch_submit_vote() as submit_mock,
         ):
-            await process_distributor_rewards(get_mocked_protocol_config(oracles_count=5))
+            await process_distributor_rewards(
+                get_mocked_protocol_config(oracles_count=5), create_chain_context()
+            )
             submit_mock.assert_not_called()
 
     async def test_not_enough_winner_votes(self):
@@ -74,7 +107,9 @@ class TestProcessDistributorRewards:
             ),
             self.patch_submit_vote() as submit_mock,
         ):
-            await process_distributor_rewards(get_mocked_protocol_config(oracles_count=5))
+            await process_distributor_rewards(
+                get_mocked_protocol_config(oracles_count=5), create_chain_context()
+            )
             submit_mock.assert_not_called()
 
     async def test_rewards_root_already_up_to_date(self):
@@ -95,7 +130,9 @@ class TestProcessDistributorRewards:
             ),
             self.patch_submit_vote() as submit_mock,
         ):
-            await process_distributor_rewards(get_mocked_protocol_config(oracles_count=5))
+            await process_distributor_rewards(
+                get_mocked_protocol_config(oracles_count=5), create_chain_context()
+            )
             submit_mock.assert_not_called()
 
     async def test_submit_rewards_root(self):
@@ -135,6 +172,7 @@ class TestProcessDistributorRewards:
         ):
             await process_distributor_rewards(
                 get_mocked_protocol_config(oracles=oracles, rewards_threshold=3),
+                create_chain_context(),
             )
 
             submit_mock.assert_called_once_with(
@@ -144,10 +182,10 @@ class TestProcessDistributorRewards:
 
     @contextmanager
     def patch_fetch_votes(self, votes):
-        with patch(
-            'src.distributor.service._fetch_distributor_reward_votes',
+        with patch.object(oracle_poller, 'get_snapshot'), patch(
+            'src.distributor.service._get_distributor_reward_votes',
             return_value=votes,
-        ):
+        ), patch('src.distributor.service._verify_votes', side_effect=lambda votes: votes):
             yield
 
     @contextmanager
@@ -184,8 +222,61 @@ class TestProcessDistributorRewards:
             yield
 
 
-class TestFetchDistributorRewardVotes:
-    async def test_fetch_distributor_reward_votes(self):
+class TestVerifyVotes:
+    async def test_skips_invalid_signatures(self):
+        accounts = [Account().create() for _ in range(4)]
+        votes = [
+            replace(create_distributor_reward_vote(nonce=5), oracle_address=account.address)
+            for account in accounts
+        ]
+        with _patch_distributor_vote_signers():
+            votes[0].signature = _sign_vote(votes[0], accounts[0])
+            # signed by another account
+            votes[1].signature = _sign_vote(votes[1], accounts[0])
+            # signed for another nonce
+            votes[2].signature = _sign_vote(replace(votes[2], nonce=4), accounts[2])
+            # malformed signature
+            votes[3].signature = HexStr('0xzz')
+
+            assert await _verify_votes(votes) == [votes[0]]
+
+    async def test_unchanged_vote_is_not_verified_again(self):
+        account = Account().create()
+        vote = replace(create_distributor_reward_vote(nonce=5), oracle_address=account.address)
+        with _patch_distributor_vote_signers(), mock.patch(
+            'src.common.signatures._recover_signers', wraps=_recover_signers
+        ) as recover_mock:
+            vote.signature = _sign_vote(vote, account)
+
+            assert await _verify_votes([vote]) == [vote]
+            assert await _verify_votes([deepcopy(vote)]) == [vote]
+
+        recover_mock.assert_called_once()
+
+    async def test_contract_type_hash(self):
+        # the vote is signed over the type hash of the MerkleDistributor contract
+        # instead of the typed data of the signers
+        account = Account().create()
+        vote = replace(create_distributor_reward_vote(nonce=5), oracle_address=account.address)
+        struct_hash = keccak(
+            MERKLE_DISTRIBUTOR_TYPE_HASH
+            + encode(
+                ['bytes32', 'bytes32', 'uint64'],
+                [
+                    Web3.to_bytes(hexstr=vote.body.root),
+                    keccak(text=vote.body.ipfs_hash),
+                    vote.nonce,
+                ],
+            )
+        )
+        with _patch_distributor_vote_signers() as domain:
+            vote.signature = HexStr(Web3.to_hex(sign_struct_hash(account, domain, struct_hash)))
+
+            assert await _verify_votes([vote]) == [vote]
+
+
+class TestGetDistributorRewardVotes:
+    def test_get_distributor_reward_votes(self):
         oracles = [
             Oracle(public_key=faker.ecies_public_key(), endpoints=[f'https://example{i}.com'])
             for i in range(5)
@@ -195,61 +286,113 @@ class TestFetchDistributorRewardVotes:
         vote_3 = create_distributor_reward_vote(oracle=oracles[3])
 
         with mock.patch(
-            'src.distributor.service._fetch_vote_from_endpoint',
+            'src.distributor.service._get_vote_from_endpoint',
             side_effect=[RuntimeError(), vote_1, vote_2, vote_3, RuntimeError()],
         ):
-            votes = await _fetch_distributor_reward_votes(oracles)
+            votes = _get_distributor_reward_votes(
+                _snapshot({oracle.endpoints[0]: {} for oracle in oracles}), oracles
+            )
 
         assert {v.signature for v in votes} == {v.signature for v in (vote_1, vote_2, vote_3)}
 
 
-class TestFetchVoteFromOracle:
-    async def test_all_endpoints_unavailable(self, client_session):
+class TestGetVoteFromOracle:
+    def test_all_endpoints_unavailable(self):
         oracle = create_oracle(num_endpoints=3)
+        snapshot = _snapshot({endpoint: TimeoutError() for endpoint in oracle.endpoints})
 
-        with mock.patch(
-            'src.distributor.service.aiohttp_fetch', side_effect=asyncio.TimeoutError()
-        ):
-            vote = await _fetch_vote_from_oracle(client_session, oracle)
-            assert vote is None
+        vote = _get_vote_from_oracle(snapshot, oracle)
+        assert vote is None
 
-    async def test_all_endpoints_empty_vote(self, client_session):
+    def test_all_endpoints_empty_vote(self):
         oracle = create_oracle(num_endpoints=3)
+        snapshot = _snapshot({endpoint: {} for endpoint in oracle.endpoints})
+
+        vote = _get_vote_from_oracle(snapshot, oracle)
+        assert vote is None
+
+    def test_endpoint_not_polled(self):
+        oracle = create_oracle(num_endpoints=1)
 
-        with mock.patch('src.distributor.service.aiohttp_fetch', side_effect={}):
-            vote = await _fetch_vote_from_oracle(client_session, oracle)
-            assert vote is None
+        vote = _get_vote_from_oracle(_snapshot({}), oracle)
+        assert vote is None
 
-    async def test_single_endpoint_available(self, client_session):
+    def test_single_endpoint_available(self):
         oracle = create_oracle(num_endpoints=3)
         vote = create_distributor_reward_vote(oracle=oracle)
+        snapshot = _snapshot(dict(zip(oracle.endpoints, [TimeoutError(), {}, _vote_to_json(vote)])))
 
-        with mock.patch(
-            'src.distributor.service.aiohttp_fetch',
-            side_effect=[
-                asyncio.TimeoutError(),
-                {},
-                _vote_to_json(vote),
-            ],
-        ):
-            fetched_vote = await _fetch_vote_from_oracle(client_session, oracle)
+        fetched_vote = _get_vote_from_oracle(snapshot, oracle)
 
         assert fetched_vote == vote
 
-    async def test_max_nonce(self, client_session):
+    def test_max_nonce(self):
         oracle = create_oracle(num_endpoints=4)
         vote_1 = create_distributor_reward_vote(oracle=oracle, nonce=5)
         vote_2 = create_distributor_reward_vote(oracle=oracle, nonce=6)
         vote_3 = create_distributor_reward_vote(oracle=oracle, nonce=5)
+        snapshot = _snapshot(
+            dict(
+                zip(
+                    oracle.endpoints,
+                    [{}, _vote_to_json(vote_1), _vote_to_json(vote_2), _vote_to_json(vote_3)],
+                )
+            )
+        )
 
-        with mock.patch(
-            'src.distributor.service.aiohttp_fetch',
-            side_effect=[{}, _vote_to_json(vote_1), _vote_to_json(vote_2), _vote_to_json(vote_3)],
-        ):
-            fetched_vote = await _fetch_vote_from_oracle(client_session, oracle)
+        fetched_vote = _get_vote_from_oracle(snapshot, oracle)
 
         assert fetched_vote == vote_2
 
+    def test_unchanged_vote_is_not_parsed_again(self):
+        oracle = create_oracle(num_endpoints=1)
+        vote = create_distributor_reward_vote(oracle=oracle)
+        snapshot = _snapshot({oracle.endpoints[0]: _vote_to_json(vote)})
+
+        with mock.patch('src.distributor.service._parse_vote', wraps=_parse_vote) as parse_mock:
+            assert _get_vote_from_oracle(snapshot, oracle) == vote
+            assert _get_vote_from_oracle(snapshot, oracle) == vote
+
+        parse_mock.assert_called_once()
+
+
+def _snapshot(endpoint_responses: dict) -> OraclesSnapshot:
+    responses: dict[str, FetchedResponse | Exception] = {}
+    for endpoint, response in endpoint_responses.items():
+        url = urljoin(endpoint, DISTRIBUTOR_REWARDS_VOTE_URL_PATH)
+        if isinstance(response, Exception):
+            responses[url] = response
+            continue
+        responses[url] = FetchedResponse(
+            data=response, content_hash=hashlib.sha256(json.dumps(response).encode()).hexdigest()
+        )
+    return OraclesSnapshot(block_number=BlockNumber(100), responses=responses)
+
+
+def _sign_vote(vote: DistributorRewardVote, account: LocalAccount) -> HexStr:
+    typed_data = distributor_vote_signers.get_typed_data(
+        {
+            'rewardsRoot': vote.body.root,
+            'rewardsIpfsHash': vote.body.ipfs_hash,
+            'nonce': vote.nonce,
+        }
+    )
+    signed = account.sign_message(encode_typed_data(full_message=typed_data))
+    return HexStr(Web3.to_hex(signed.signature))
+
+
+def _patch_distributor_vote_signers() -> ContextManager:
+    return patch.object(
+        distributor_vote_signers,
+        'domain',
+        {
+            'name': 'MerkleDistributor',
+            'version': '1',
+            'chainId': 1,
+            'verifyingContract': Web3.to_checksum_address('0x' + '22' * 20),
+        },
+    )
+
 
 def _vote_to_json(vote: DistributorRewardVote) -> dict:
     return {
@@ -1,22 +1,257 @@
-from eth_typing.bls import BLSSignature
+import asyncio
+import functools
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+
+from eth_typing.bls import BLSPubkey, BLSSignature
+from py_ecc.bls import G2ProofOfPossession as bls
 from py_ecc.bls.g2_primitives import G2_to_signature, signature_to_G2
-from py_ecc.optimized_bls12_381.optimized_curve import Z2, add, curve_order, multiply
+from py_ecc.fields import optimized_bls12_381_FQ2 as FQ2
+from py_ecc.optimized_bls12_381.optimized_curve import (
+    Z2,
+    add,
+    curve_order,
+    double,
+    is_inf,
+)
+from py_ecc.typing import Optimized_Point3D
 from py_ecc.utils import prime_field_inv
 
+from src.exits.typings import ExitSignatureShares, RecoveredExitSignature
+
+logger = logging.getLogger(__name__)
+
 PRIME = curve_order
 
+DOMAIN_VOLUNTARY_EXIT = bytes.fromhex('04000000')
+
+# subsets of the shares tried at most to find the invalid ones
+MAX_SHARES_SUBSETS = 64
+
+# distinct oracle sets the coefficients are cached for
+LAGRANGE_COEFFICIENTS_CACHE_SIZE = 128
+
+# bits of the scalars processed at once by the multi-scalar multiplication
+MSM_WINDOW_BITS = 4
+
+try:
+    import milagro_bls_binding as milagro
+except ImportError:  # pragma: no cover
+    milagro = None
+
 
 def reconstruct_shared_bls_signature(signatures: dict[int, BLSSignature]) -> BLSSignature:
     """
     Reconstructs shared BLS private key signature.
-    Copied from https://github.com/dankrad/python-ibft/blob/master/bls_threshold.py
+    Based on https://github.com/dankrad/python-ibft/blob/master/bls_threshold.py
+    The signatures are decompressed with the subgroup check,
+    so a malformed share raises instead of producing an invalid signature.
+    """
+    coefficients = get_lagrange_coefficients(frozenset(signatures))
+    points = [signature_to_G2(signature) for signature in signatures.values()]
+    return G2_to_signature(
+        multi_scalar_multiply(points, [coefficients[index] for index in signatures])
+    )
+
+
+def multi_scalar_multiply(
+    points: list[Optimized_Point3D[FQ2]], scalars: list[int]
+) -> Optimized_Point3D[FQ2]:
+    """
+    Computes the sum of the points multiplied by the scalars in one pass (Straus' method).
+
+    Every point gets a table of its multiples below `2 ** MSM_WINDOW_BITS`,
+    then the scalars are scanned window by window from the top bits:
+    the doublings are shared by all the points and every window adds
+    a single multiple of each point instead of one per set bit.
     """
+    window_size = 1 << MSM_WINDOW_BITS
+    tables = []
+    for point in points:
+        table = [Z2, point]
+        for _ in range(window_size - 2):
+            table.append(add(table[-1], point))
+        tables.append(table)
+
+    bits = max((scalar.bit_length() for scalar in scalars), default=0)
     r = Z2
-    for i, sig in signatures.items():
-        sig_point = signature_to_G2(sig)
-        coef = 1
-        for j in signatures:
+    for window in reversed(range(ceil(bits / MSM_WINDOW_BITS))):
+        if not is_inf(r):
+            for _ in range(MSM_WINDOW_BITS):
+                r = double(r)
+        shift = window * MSM_WINDOW_BITS
+        for table, scalar in zip(tables, scalars):
+            if digit := (scalar >> shift) & (window_size - 1):
+                r = add(r, table[digit])
+    return r
+
+
+def verify_signature(pubkey: BLSPubkey, message: bytes, signature: BLSSignature) -> bool:
+    """Verifies the signature with milagro when installed, py_ecc otherwise."""
+    if milagro is not None:
+        try:
+            # pylint: disable-next=no-member
+            return milagro.Verify(pubkey, message, signature)
+        except Exception:
+            return False
+    return bls.Verify(pubkey, message, signature)
+
+
+@functools.lru_cache(maxsize=LAGRANGE_COEFFICIENTS_CACHE_SIZE)
+def get_lagrange_coefficients(indexes: frozenset[int]) -> dict[int, int]:
+    """
+    Returns the Lagrange coefficients interpolating the shares at zero,
+    share `i` is evaluated at `i + 1`.
+    The validators of a run mostly share the same oracles,
+    so the coefficients are cached by the set of share indexes.
+    """
+    numerator = 1
+    denominators = []
+    for i in indexes:
+        numerator = numerator * (i + 1) % PRIME
+        denominator = i + 1
+        for j in indexes:
             if j != i:
-                coef = -coef * (j + 1) * prime_field_inv(i - j, PRIME) % PRIME
-        r = add(r, multiply(sig_point, coef))
-    return G2_to_signature(r)
+                denominator = denominator * (j - i) % PRIME
+        denominators.append(denominator)
+
+    # coef_i = prod(j + 1) / ((i + 1) * prod(j - i)) over j != i
+    return {
+        i: numerator * inverse % PRIME for i, inverse in zip(indexes, _batch_inverse(denominators))
+    }
+
+
+def _batch_inverse(values: list[int]) -> list[int]:
+    """Inverts all the values with a single field inversion (Montgomery's trick)."""
+    prefix_products = []
+    product = 1
+    for value in values:
+        prefix_products.append(product)
+        product = product * value % PRIME
+
+    inverse = prime_field_inv(product, PRIME)
+    inverses = [0] * len(values)
+    for index in reversed(range(len(values))):
+        inverses[index] = inverse * prefix_products[index] % PRIME
+        inverse = inverse * values[index] % PRIME
+    return inverses
+
+
+def recover_exit_signature(exit_shares: ExitSignatureShares) -> RecoveredExitSignature:
+    """
+    Reconstructs the exit signature from all the shares and verifies it.
+    When it is invalid, the subsets of the threshold size are tried until one
+    reconstructs a valid signature, and every other share is checked
+    by replacing a member of that subset with it.
+    """
+    shares = exit_shares.shares
+    signature = _reconstruct_verified(exit_shares, shares)
+    if signature is not None:
+        return RecoveredExitSignature(exit_shares.validator_index, signature, [])
+
+    subsets = itertools.combinations(sorted(shares), exit_shares.threshold)
+    for indexes in itertools.islice(subsets, MAX_SHARES_SUBSETS):
+        subset = {index: shares[index] for index in indexes}
+        signature = _reconstruct_verified(exit_shares, subset)
+        if signature is None:
+            continue
+
+        # the shares of the valid subset are valid, the first one is replaced
+        replaced = indexes[0]
+        invalid_shares = [
+            index
+            for index in shares
+            if index not in subset
+            and _reconstruct_verified(
+                exit_shares,
+                {i: s for i, s in subset.items() if i != replaced} | {index: shares[index]},
+            )
+            is None
+        ]
+        return RecoveredExitSignature(exit_shares.validator_index, signature, invalid_shares)
+
+    return RecoveredExitSignature(exit_shares.validator_index, None, [])
+
+
+def _reconstruct_verified(
+    exit_shares: ExitSignatureShares, shares: dict[int, BLSSignature]
+) -> BLSSignature | None:
+    try:
+        signature = reconstruct_shared_bls_signature(shares)
+    except Exception:
+        # a malformed share
+        return None
+    if not verify_signature(exit_shares.pubkey, exit_shares.signing_root, signature):
+        return None
+    return signature
+
+
+def compute_exit_signing_root(
+    validator_index: int, epoch: int, fork_version: bytes, genesis_validators_root: bytes
+) -> bytes:
+    """Returns the signing root of the `VoluntaryExit` message in the fork domain."""
+    exit_root = _sha256(_uint64_chunk(epoch) + _uint64_chunk(validator_index))
+    fork_data_root = _sha256(fork_version.ljust(32, b'\x00') + genesis_validators_root)
+    domain = DOMAIN_VOLUNTARY_EXIT + fork_data_root[:28]
+    return _sha256(exit_root + domain)
+
+
+def _uint64_chunk(value: int) -> bytes:
+    return value.to_bytes(8, 'little').ljust(32, b'\x00')
+
+
+def _sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+class SignatureReconstructor:
+    """
+    Recovers the exit signatures of many validators in a process pool.
+
+    The reconstruction and the verification are curve arithmetic that holds the GIL,
+    so the validators are split into one chunk per worker and recovered
+    in parallel across the cores without blocking the event loop.
+    The pool is started on the first use, its workers are spawned
+    so that they do not inherit the event loop of the keeper.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def recover(
+        self, exits_shares: list[ExitSignatureShares]
+    ) -> list[RecoveredExitSignature]:
+        """Recovers and verifies the exit signature of every validator."""
+        if not exits_shares:
+            return []
+
+        if self._executor is None:
+            logger.info('Starting %d exit signature workers', self.max_workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+
+        chunk_size = ceil(len(exits_shares) / self.max_workers)
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(self._executor, _recover_batch, list(chunk))
+                for chunk in itertools.batched(exits_shares, chunk_size)
+            ]
+        )
+        return list(itertools.chain.from_iterable(results))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def _recover_batch(exits_shares: list[ExitSignatureShares]) -> list[RecoveredExitSignature]:
+    return [recover_exit_signature(exit_shares) for exit_shares in exits_shares]
@@ -1,28 +1,31 @@
-import asyncio
 import itertools
 import logging
 from collections import defaultdict
-from urllib.parse import urljoin
 
 import aiohttp
-from aiohttp import ClientSession
-from eth_typing.bls import BLSSignature
-from sw_utils import ValidatorStatus, get_chain_latest_head
+from eth_typing.bls import BLSPubkey, BLSSignature
+from sw_utils import ValidatorStatus
 from sw_utils.typings import Oracle, ProtocolConfig
 from web3 import Web3
 from web3.types import HexStr
 
+from src.common.app_state import AppState
 from src.common.clients import consensus_client
-from src.common.utils import aiohttp_fetch
-from src.config.settings import NETWORK, NETWORK_CONFIG, VALIDATORS_FETCH_CHUNK_SIZE
-from src.exits.crypto import reconstruct_shared_bls_signature
-from src.exits.typings import ValidatorExitShare
+from src.common.typings import ChainContext
+from src.config.settings import (
+    EXIT_SIGNATURES_WORKERS,
+    NETWORK,
+    NETWORK_CONFIG,
+    VALIDATORS_FETCH_CHUNK_SIZE,
+)
+from src.exits.crypto import SignatureReconstructor, compute_exit_signing_root
+from src.exits.typings import ExitSignatureShares, ValidatorExitShare
 from src.metrics import metrics
+from src.oracles.poller import EXIT_VOTE_URL_PATH, oracle_poller
+from src.oracles.typings import OraclesSnapshot
 
 logger = logging.getLogger(__name__)
 
-EXIT_VOTE_URL_PATH = '/exits'
-
 EXITING_STATUSES = [
     ValidatorStatus.ACTIVE_EXITING,
     ValidatorStatus.EXITED_UNSLASHED,
@@ -31,20 +34,26 @@ EXITING_STATUSES = [
     ValidatorStatus.WITHDRAWAL_DONE,
 ]
 
+signature_reconstructor = SignatureReconstructor(max_workers=EXIT_SIGNATURES_WORKERS)
 
-async def process_exits(protocol_config: ProtocolConfig) -> None:
-    chain_head = await get_chain_latest_head(
-        consensus_client=consensus_client, slots_per_epoch=NETWORK_CONFIG.SLOTS_PER_EPOCH
-    )
+
+async def process_exits(protocol_config: ProtocolConfig, chain_context: ChainContext) -> None:
+    chain_head = chain_context.chain_head
+    if chain_head is None:
+        raise RuntimeError('Consensus chain head is not available')
 
     metrics.epoch.labels(network=NETWORK).set(chain_head.epoch)
     metrics.consensus_block.labels(network=NETWORK).set(chain_head.slot)
     metrics.execution_block.labels(network=NETWORK).set(chain_head.block_number)
     metrics.execution_ts.labels(network=NETWORK).set(chain_head.execution_ts)
 
-    validator_exits = await _fetch_validator_exits(protocol_config.oracles)
+    oracles_snapshot = await oracle_poller.get_snapshot(
+        protocol_config.oracles, chain_context.head_block
+    )
+    validator_exits = _get_validator_exits(oracles_snapshot, protocol_config.oracles)
     validator_indexes = [str(x) for x in validator_exits.keys()]
     exited_statuses = [x.value for x in EXITING_STATUSES]
+    pubkeys: dict[int, BLSPubkey] = {}
     for validator_index_batch in itertools.batched(validator_indexes, VALIDATORS_FETCH_CHUNK_SIZE):
         validators_batch = await consensus_client.get_validators_by_ids(
             validator_ids=validator_index_batch,
@@ -53,86 +62,147 @@ async def process_exits(protocol_config: ProtocolConfig) -> None:
         for validator in validators_batch['data']:
             if validator.get('status') in exited_statuses:
                 del validator_exits[int(validator.get('index'))]
+            else:
+                pubkeys[int(validator['index'])] = BLSPubkey(
+                    Web3.to_bytes(hexstr=validator['validator']['pubkey'])
+                )
 
+    app_state = AppState()
+    # the exited validators shares are not fetched anymore
+    app_state.invalid_exit_shares = {
+        (oracle, index, share)
+        for oracle, index, share in app_state.invalid_exit_shares
+        if index in validator_exits
+    }
+    app_state.unrecoverable_exit_shares = {
+        index: shares
+        for index, shares in app_state.unrecoverable_exit_shares.items()
+        if index in validator_exits
+    }
     if not validator_exits:
         return
+
+    exits_shares = []
     for validator_index, shares in validator_exits.items():
-        logger.info('Exiting %s validator', validator_index)
+        exit_shares = _get_exit_signature_shares(
+            protocol_config, validator_index, shares, pubkeys.get(validator_index)
+        )
+        if exit_shares is not None:
+            exits_shares.append(exit_shares)
+
+    shares_by_index = {x.validator_index: x.shares for x in exits_shares}
+    for exit_signature in await signature_reconstructor.recover(exits_shares):
+        validator_index = exit_signature.validator_index
+        for share_index in exit_signature.invalid_shares:
+            oracle = protocol_config.oracles[share_index].address
+            logger.warning(
+                'Invalid exit signature share for validator %s from oracle %s',
+                validator_index,
+                oracle,
+            )
+            app_state.invalid_exit_shares.add(
+                (oracle, validator_index, shares_by_index[validator_index][share_index])
+            )
 
-        if len(shares) < protocol_config.exit_signature_recover_threshold:
+        if exit_signature.signature is None:
             logger.warning(
-                'Not enough exit signature shares for validator %s, skipping...', validator_index
+                'Failed to recover a valid exit signature for validator %s, skipping...',
+                validator_index,
             )
+            app_state.unrecoverable_exit_shares[validator_index] = shares_by_index[validator_index]
             continue
-
-        signatures = {}
-        for share in shares:
-            signatures[share.share_index] = share.exit_signature_share
-        exit_signature = reconstruct_shared_bls_signature(signatures)
+        logger.info('Exiting %s validator', validator_index)
 
         if await _submit_signature(
             validator_index=validator_index,
-            exit_signature=Web3.to_hex(exit_signature),
+            exit_signature=Web3.to_hex(exit_signature.signature),
         ):
             logger.info('Validator %s exit successfully initiated', validator_index)
 
     logger.info('Validator exits has been successfully processed')
 
 
-async def _fetch_validator_exits(oracles: list[Oracle]) -> dict[int, list[ValidatorExitShare]]:
-    async with ClientSession() as session:
-        results = await asyncio.gather(
-            *[
-                _fetch_exit_shares_from_oracle(
-                    session=session, oracle=oracle, oracle_index=oracle_index
-                )
-                for oracle_index, oracle in enumerate(oracles)
-            ],
-            return_exceptions=True,
-        )
-    validator_exits = defaultdict(list)
-    for result in results:
-        if isinstance(result, Exception):
-            logger.warning(result)
+def _get_exit_signature_shares(
+    protocol_config: ProtocolConfig,
+    validator_index: int,
+    shares: list[ValidatorExitShare],
+    pubkey: BLSPubkey | None,
+) -> ExitSignatureShares | None:
+    """
+    Returns the exit signature shares of the validator without the invalid ones,
+    None when they are not enough or have already failed the recovery.
+    """
+    if pubkey is None:
+        logger.warning('Validator %s is not found, skipping...', validator_index)
+        return None
+
+    app_state = AppState()
+    signatures = {}
+    for share in shares:
+        oracle = protocol_config.oracles[share.share_index].address
+        if (oracle, validator_index, share.exit_signature_share) in app_state.invalid_exit_shares:
             continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
+        signatures[share.share_index] = share.exit_signature_share
+
+    if len(signatures) < protocol_config.exit_signature_recover_threshold:
+        logger.warning(
+            'Not enough exit signature shares for validator %s, skipping...', validator_index
+        )
+        return None
+
+    if app_state.unrecoverable_exit_shares.get(validator_index) == signatures:
+        # the same shares have already failed, wait for the oracles to update them
+        return None
+
+    return ExitSignatureShares(
+        validator_index=validator_index,
+        pubkey=pubkey,
+        signing_root=_get_exit_signing_root(validator_index),
+        shares=signatures,
+        threshold=protocol_config.exit_signature_recover_threshold,
+    )
 
-        if result:
-            for validator_exit in result:
-                validator_exits[validator_exit.validator_index].append(validator_exit)
+
+def _get_exit_signing_root(validator_index: int) -> bytes:
+    return compute_exit_signing_root(
+        validator_index=validator_index,
+        epoch=NETWORK_CONFIG.SHAPELLA_EPOCH,
+        fork_version=NETWORK_CONFIG.SHAPELLA_FORK_VERSION,
+        genesis_validators_root=NETWORK_CONFIG.GENESIS_VALIDATORS_ROOT,
+    )
+
+
+def _get_validator_exits(
+    oracles_snapshot: OraclesSnapshot, oracles: list[Oracle]
+) -> dict[int, list[ValidatorExitShare]]:
+    validator_exits = defaultdict(list)
+    for oracle_index, oracle in enumerate(oracles):
+        for validator_exit in _get_exit_shares_from_oracle(oracles_snapshot, oracle, oracle_index):
+            validator_exits[validator_exit.validator_index].append(validator_exit)
 
     return validator_exits
 
 
-async def _fetch_exit_shares_from_oracle(
-    session: ClientSession, oracle: Oracle, oracle_index: int
+def _get_exit_shares_from_oracle(
+    oracles_snapshot: OraclesSnapshot, oracle: Oracle, oracle_index: int
 ) -> list[ValidatorExitShare]:
-    results = await asyncio.gather(
-        *(
-            _fetch_exit_shares_from_endpoint(session, oracle, endpoint, oracle_index)
-            for endpoint in oracle.endpoints
-        ),
-        return_exceptions=True,
-    )
-    for endpoint, result in zip(oracle.endpoints, results):
-        if isinstance(result, Exception):
-            logger.warning('%s from %s', repr(result), endpoint)
+    for endpoint in oracles_snapshot.polled_endpoints(oracle, EXIT_VOTE_URL_PATH):
+        try:
+            exit_shares = _get_exit_shares_from_endpoint(
+                oracles_snapshot, oracle, endpoint, oracle_index
+            )
+        except Exception as e:
+            logger.warning('%s from %s', repr(e), endpoint)
             continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
-        if result:
-            return result
+        if exit_shares:
+            return exit_shares
     return []
 
 
-async def _fetch_exit_shares_from_endpoint(
-    session: ClientSession, oracle: Oracle, endpoint: str, oracle_index: int
+def _get_exit_shares_from_endpoint(
+    oracles_snapshot: OraclesSnapshot, oracle: Oracle, endpoint: str, oracle_index: int
 ) -> list[ValidatorExitShare]:
-    url = urljoin(endpoint, EXIT_VOTE_URL_PATH)
-    data = await aiohttp_fetch(session, url)
+    data = oracles_snapshot.get(endpoint, EXIT_VOTE_URL_PATH)
     exits: list[ValidatorExitShare] = []
     if not data:
         return []
@@ -0,0 +1,42 @@
+import random
+
+from eth_typing.bls import BLSSignature
+from py_ecc.bls import G2ProofOfPossession as bls
+
+from src.exits.crypto import PRIME
+from src.exits.typings import ExitSignatureShares
+
+MESSAGE = b'voluntary exit'
+
+
+def create_signature_shares(
+    threshold: int, shares_count: int, message: bytes = MESSAGE
+) -> tuple[BLSSignature, dict[int, BLSSignature]]:
+    """Splits a random key with Shamir's scheme, share `i` is evaluated at `i + 1`."""
+    private_key, private_key_shares = _split_private_key(threshold, shares_count)
+    shares = {index: bls.Sign(key, message) for index, key in private_key_shares.items()}
+    return bls.Sign(private_key, message), shares
+
+
+def create_exit_signature_shares(
+    threshold: int, shares_count: int, validator_index: int = 1
+) -> tuple[BLSSignature, ExitSignatureShares]:
+    private_key, private_key_shares = _split_private_key(threshold, shares_count)
+    shares = {index: bls.Sign(key, MESSAGE) for index, key in private_key_shares.items()}
+    exit_shares = ExitSignatureShares(
+        validator_index=validator_index,
+        pubkey=bls.SkToPk(private_key),
+        signing_root=MESSAGE,
+        shares=shares,
+        threshold=threshold,
+    )
+    return bls.Sign(private_key, MESSAGE), exit_shares
+
+
+def _split_private_key(threshold: int, shares_count: int) -> tuple[int, dict[int, int]]:
+    coefficients = [random.randrange(1, PRIME) for _ in range(threshold)]
+
+    def evaluate(x: int) -> int:
+        return sum(c * x**power for power, c in enumerate(coefficients)) % PRIME
+
+    return coefficients[0], {index: evaluate(index + 1) for index in range(shares_count)}
@@ -0,0 +1,94 @@
+import logging
+import os
+import random
+import time
+
+import pytest
+from py_ecc.optimized_bls12_381.optimized_curve import G2, Z2, add, eq, multiply
+
+from src.exits.crypto import (
+    PRIME,
+    SignatureReconstructor,
+    get_lagrange_coefficients,
+    multi_scalar_multiply,
+    recover_exit_signature,
+)
+from src.exits.tests.factories import create_exit_signature_shares
+from src.exits.typings import RecoveredExitSignature
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD = 3
+# the larger batches take minutes on a single core
+RUN_BENCHMARKS = bool(os.getenv('RUN_BENCHMARKS'))
+
+
+@pytest.mark.parametrize(
+    'validators_count',
+    [
+        1,
+        pytest.param(100, marks=pytest.mark.skipif(not RUN_BENCHMARKS, reason='RUN_BENCHMARKS')),
+        pytest.param(1000, marks=pytest.mark.skipif(not RUN_BENCHMARKS, reason='RUN_BENCHMARKS')),
+    ],
+)
+async def test_reconstruct_exit_signatures_benchmark(validators_count):
+    """
+    Recovering the exit signatures of a batch of validators in the process pool,
+    compared to recovering them one by one on the event loop.
+    """
+    signature, exit_shares = create_exit_signature_shares(
+        threshold=THRESHOLD, shares_count=THRESHOLD
+    )
+    exits_shares = [exit_shares] * validators_count
+
+    start = time.perf_counter()
+    for _ in range(validators_count):
+        recover_exit_signature(exit_shares)
+    sequential_time = time.perf_counter() - start
+
+    reconstructor = SignatureReconstructor()
+    try:
+        start = time.perf_counter()
+        result = await reconstructor.recover(exits_shares)
+        pool_time = time.perf_counter() - start
+    finally:
+        reconstructor.shutdown()
+
+    logger.info(
+        'Recovered %d exit signatures with %d workers: '
+        'sequential %.2fs, process pool %.2fs (including the pool start)',
+        validators_count,
+        reconstructor.max_workers,
+        sequential_time,
+        pool_time,
+    )
+    assert result == [RecoveredExitSignature(1, signature, [])] * validators_count
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason='RUN_BENCHMARKS')
+def test_multi_scalar_multiply_benchmark():
+    """
+    Interpolating the shares with the multi-scalar multiplication,
+    compared to multiplying every share separately, for the thresholds 3 to 11.
+    """
+    points = [multiply(G2, random.randrange(1, PRIME)) for _ in range(11)]
+    for threshold in range(3, 12):
+        coefficients = list(get_lagrange_coefficients(frozenset(range(threshold))).values())
+
+        start = time.perf_counter()
+        expected = Z2
+        for point, coefficient in zip(points, coefficients):
+            expected = add(expected, multiply(point, coefficient))
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = multi_scalar_multiply(points[:threshold], coefficients)
+        msm_time = time.perf_counter() - start
+
+        logger.info(
+            'Threshold %d: multiply and add %.3fs, multi-scalar multiplication %.3fs',
+            threshold,
+            loop_time,
+            msm_time,
+        )
+        assert eq(result, expected)
@@ -0,0 +1,190 @@
+import copy
+import random
+from unittest import mock
+
+import pytest
+from eth_typing.bls import BLSSignature
+from py_ecc.bls import G2ProofOfPossession as bls
+from py_ecc.bls.g2_primitives import G2_to_signature, signature_to_G2
+from py_ecc.optimized_bls12_381.optimized_curve import G2, Z2, add, eq, multiply
+from py_ecc.utils import prime_field_inv
+
+from src.exits.crypto import (
+    PRIME,
+    SignatureReconstructor,
+    compute_exit_signing_root,
+    get_lagrange_coefficients,
+    multi_scalar_multiply,
+    reconstruct_shared_bls_signature,
+    recover_exit_signature,
+)
+from src.exits.tests.factories import (
+    create_exit_signature_shares,
+    create_signature_shares,
+)
+from src.exits.typings import RecoveredExitSignature
+
+
+class TestReconstructSharedBlsSignature:
+    def test_any_threshold_subset_reconstructs_signature(self):
+        signature, shares = create_signature_shares(threshold=2, shares_count=3)
+
+        assert reconstruct_shared_bls_signature({0: shares[0], 1: shares[1]}) == signature
+        assert reconstruct_shared_bls_signature({0: shares[0], 2: shares[2]}) == signature
+
+    def test_matches_reference_loop(self):
+        _, shares = create_signature_shares(threshold=3, shares_count=5)
+        for indexes in ((0, 1, 2), (1, 3, 4), (0, 2, 3, 4)):
+            subset = {index: shares[index] for index in indexes}
+            assert reconstruct_shared_bls_signature(subset) == _reference_reconstruction(subset)
+
+    def test_malformed_share_raises(self):
+        _, shares = create_signature_shares(threshold=2, shares_count=3)
+        with pytest.raises(Exception):
+            reconstruct_shared_bls_signature({0: BLSSignature(b'\x01' * 96), 1: shares[1]})
+
+
+class TestMultiScalarMultiply:
+    def test_matches_multiply_and_add(self):
+        points = [multiply(G2, random.randrange(1, PRIME)) for _ in range(5)]
+        for scalars in (
+            [random.randrange(PRIME) for _ in points],
+            [0, 1, 15, 16, PRIME - 1],
+            [0] * 5,
+        ):
+            expected = Z2
+            for point, scalar in zip(points, scalars):
+                expected = add(expected, multiply(point, scalar))
+            assert eq(multi_scalar_multiply(points, scalars), expected)
+
+    def test_empty(self):
+        assert eq(multi_scalar_multiply([], []), Z2)
+
+
+class TestRecoverExitSignature:
+    def test_valid_shares(self):
+        signature, exit_shares = create_exit_signature_shares(threshold=3, shares_count=4)
+
+        assert recover_exit_signature(exit_shares) == RecoveredExitSignature(1, signature, [])
+
+    def test_detects_share_of_other_message(self):
+        signature, exit_shares = create_exit_signature_shares(threshold=3, shares_count=4)
+        _, other_shares = create_signature_shares(threshold=3, shares_count=4, message=b'other')
+        exit_shares.shares[2] = other_shares[2]
+
+        assert recover_exit_signature(exit_shares) == RecoveredExitSignature(1, signature, [2])
+
+    def test_detects_malformed_share(self):
+        signature, exit_shares = create_exit_signature_shares(threshold=2, shares_count=4)
+        exit_shares.shares[0] = BLSSignature(b'\x01' * 96)
+
+        assert recover_exit_signature(exit_shares) == RecoveredExitSignature(1, signature, [0])
+
+    def test_not_enough_valid_shares(self):
+        _, exit_shares = create_exit_signature_shares(threshold=3, shares_count=4)
+        _, other_shares = create_signature_shares(threshold=3, shares_count=4, message=b'other')
+        exit_shares.shares[0] = other_shares[0]
+        exit_shares.shares[3] = other_shares[3]
+
+        assert recover_exit_signature(exit_shares) == RecoveredExitSignature(1, None, [])
+
+    def test_subsets_limit(self):
+        _, exit_shares = create_exit_signature_shares(threshold=2, shares_count=3)
+        exit_shares.shares[0] = BLSSignature(b'\x01' * 96)
+
+        with mock.patch('src.exits.crypto.MAX_SHARES_SUBSETS', 1):
+            # the only subset tried contains the malformed share
+            assert recover_exit_signature(exit_shares) == RecoveredExitSignature(1, None, [])
+
+
+class TestComputeExitSigningRoot:
+    # mainnet exit of validator 1 at the Capella epoch signed with the secret key 42
+    # by the exit transaction command of the ethstaker deposit cli
+    GENESIS_VALIDATORS_ROOT = bytes.fromhex(
+        '4b363db94e286120d76eb905340fdd4e54bfe9f06bf33ff6cf5ad27f511bfe95'
+    )
+    CAPELLA_FORK_VERSION = bytes.fromhex('03000000')
+    PUBLIC_KEY = bytes.fromhex(
+        '8ce3b57b791798433fd323753489cac9bca43b98deaafaed91f4cb010730ae1e'
+        '38b186ccd37a09b8aed62ce23b699c48'
+    )
+    SIGNATURE = bytes.fromhex(
+        '9115dd31f594c474ce8a74af165786412ca3877a953b77554e08ebb7d579053b'
+        'f0b7b8b7dc36915a8a166d5fa3540e7b025d6c4d934a2270d0a576d6e5e2c019'
+        '20421af151f9a0ed7460b94f105189be502287fde5064e5896fafa1cb4c54203'
+    )
+
+    def test_known_exit(self):
+        signing_root = compute_exit_signing_root(
+            validator_index=1,
+            epoch=194048,
+            fork_version=self.CAPELLA_FORK_VERSION,
+            genesis_validators_root=self.GENESIS_VALIDATORS_ROOT,
+        )
+
+        assert signing_root == bytes.fromhex(
+            'dbb8c86dd597aafdde69a4bc879a7eb5c5124701bf0fdb0dc6e97c7e229547c0'
+        )
+        assert bls.Verify(self.PUBLIC_KEY, signing_root, self.SIGNATURE)
+
+
+class TestSignatureReconstructor:
+    async def test_recovers_batch(self):
+        signature, exit_shares = create_exit_signature_shares(threshold=2, shares_count=3)
+        # malformed share
+        invalid_exit_shares = copy.deepcopy(exit_shares)
+        invalid_exit_shares.validator_index = 3
+        invalid_exit_shares.shares[0] = BLSSignature(b'\x01' * 96)
+
+        reconstructor = SignatureReconstructor(max_workers=2)
+        try:
+            result = await reconstructor.recover([exit_shares, exit_shares, invalid_exit_shares])
+        finally:
+            reconstructor.shutdown()
+
+        assert result == [
+            RecoveredExitSignature(1, signature, []),
+            RecoveredExitSignature(1, signature, []),
+            RecoveredExitSignature(3, signature, [0]),
+        ]
+
+    async def test_empty_batch(self):
+        reconstructor = SignatureReconstructor(max_workers=2)
+        with mock.patch('src.exits.crypto.ProcessPoolExecutor') as executor:
+            assert await reconstructor.recover([]) == []
+        # the pool is not started without validators
+        executor.assert_not_called()
+
+
+class TestLagrangeCoefficients:
+    def test_matches_pairwise_inversion(self):
+        for indexes in ({0}, {0, 1}, {0, 2, 5}, set(random.sample(range(20), 11))):
+            assert get_lagrange_coefficients(frozenset(indexes)) == _pairwise_coefficients(indexes)
+
+    def test_cached_by_indexes(self):
+        get_lagrange_coefficients.cache_clear()
+        get_lagrange_coefficients(frozenset({0, 1, 2}))
+        get_lagrange_coefficients(frozenset({2, 1, 0}))
+
+        cache_info = get_lagrange_coefficients.cache_info()
+        assert (cache_info.hits, cache_info.misses) == (1, 1)
+
+
+def _reference_reconstruction(signatures: dict[int, BLSSignature]) -> BLSSignature:
+    # the reconstruction multiplying every share separately
+    r = Z2
+    for i, coef in _pairwise_coefficients(set(signatures)).items():
+        r = add(r, multiply(signature_to_G2(signatures[i]), coef))
+    return G2_to_signature(r)
+
+
+def _pairwise_coefficients(indexes: set[int]) -> dict[int, int]:
+    # the coefficients computed with one inversion per pair of shares
+    coefficients = {}
+    for i in indexes:
+        coef = 1
+        for j in indexes:
+            if j != i:
+                coef = -coef * (j + 1) * prime_field_inv(i - j, PRIME) % PRIME
+        coefficients[i] = coef
+    return coefficients
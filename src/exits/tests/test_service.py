@@ -0,0 +1,101 @@
+from unittest import mock
+
+from eth_typing.bls import BLSPubkey, BLSSignature
+from sw_utils.tests.factories import get_mocked_protocol_config
+
+from src.common.app_state import AppState
+from src.exits.service import _get_exit_signature_shares
+from src.exits.typings import ValidatorExitShare
+
+PUBKEY = BLSPubkey(b'\x01' * 48)
+
+
+class TestGetExitSignatureShares:
+    def test_skips_invalid_shares(self):
+        protocol_config = get_mocked_protocol_config(
+            oracles_count=3, exit_signature_recover_threshold=2
+        )
+        shares = _shares(validator_index=1, oracles_count=3)
+        invalid_exit_shares = {
+            (protocol_config.oracles[0].address, 1, shares[0].exit_signature_share)
+        }
+
+        with _patch_app_state(invalid_exit_shares=invalid_exit_shares):
+            exit_shares = _get_exit_signature_shares(protocol_config, 1, shares, PUBKEY)
+
+        assert exit_shares.shares == {
+            1: shares[1].exit_signature_share,
+            2: shares[2].exit_signature_share,
+        }
+
+    def test_corrected_share_is_used(self):
+        protocol_config = get_mocked_protocol_config(
+            oracles_count=3, exit_signature_recover_threshold=2
+        )
+        shares = _shares(validator_index=1, oracles_count=3)
+        invalid_exit_shares = {(protocol_config.oracles[0].address, 1, BLSSignature(b'\x01' * 96))}
+
+        with _patch_app_state(invalid_exit_shares=invalid_exit_shares):
+            exit_shares = _get_exit_signature_shares(protocol_config, 1, shares, PUBKEY)
+
+        assert exit_shares.shares == {
+            share.share_index: share.exit_signature_share for share in shares
+        }
+
+    def test_not_enough_shares(self):
+        protocol_config = get_mocked_protocol_config(
+            oracles_count=3, exit_signature_recover_threshold=3
+        )
+        shares = _shares(validator_index=1, oracles_count=3)
+        invalid_exit_shares = {
+            (protocol_config.oracles[2].address, 1, shares[2].exit_signature_share)
+        }
+
+        with _patch_app_state(invalid_exit_shares=invalid_exit_shares):
+            assert _get_exit_signature_shares(protocol_config, 1, shares, PUBKEY) is None
+
+    def test_validator_not_found(self):
+        protocol_config = get_mocked_protocol_config(
+            oracles_count=3, exit_signature_recover_threshold=2
+        )
+        shares = _shares(validator_index=1, oracles_count=3)
+
+        with _patch_app_state():
+            assert _get_exit_signature_shares(protocol_config, 1, shares, None) is None
+
+    def test_unrecoverable_shares_are_not_retried(self):
+        protocol_config = get_mocked_protocol_config(
+            oracles_count=3, exit_signature_recover_threshold=2
+        )
+        shares = _shares(validator_index=1, oracles_count=3)
+        signatures = {share.share_index: share.exit_signature_share for share in shares}
+
+        with _patch_app_state(unrecoverable_exit_shares={1: signatures}):
+            assert _get_exit_signature_shares(protocol_config, 1, shares, PUBKEY) is None
+
+        # an updated share is retried
+        shares[0].exit_signature_share = BLSSignature(b'\x01' * 96)
+        with _patch_app_state(unrecoverable_exit_shares={1: signatures}):
+            assert _get_exit_signature_shares(protocol_config, 1, shares, PUBKEY) is not None
+
+
+def _shares(validator_index: int, oracles_count: int) -> list[ValidatorExitShare]:
+    return [
+        ValidatorExitShare(
+            validator_index=validator_index,
+            exit_signature_share=BLSSignature(bytes([index + 2]) * 96),
+            share_index=index,
+        )
+        for index in range(oracles_count)
+    ]
+
+
+def _patch_app_state(
+    invalid_exit_shares: set | None = None, unrecoverable_exit_shares: dict | None = None
+):
+    app_state = AppState()
+    return mock.patch.multiple(
+        app_state,
+        invalid_exit_shares=invalid_exit_shares or set(),
+        unrecoverable_exit_shares=unrecoverable_exit_shares or {},
+    )
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-from eth_typing.bls import BLSSignature
+from eth_typing.bls import BLSPubkey, BLSSignature
 
 
 @dataclass
@@ -8,3 +8,24 @@ class ValidatorExitShare:
     validator_index: int
     exit_signature_share: BLSSignature
     share_index: int
+
+
+@dataclass
+class ExitSignatureShares:
+    """Signature shares of the validator exit, recovered in a worker process."""
+
+    validator_index: int
+    pubkey: BLSPubkey
+    signing_root: bytes
+    # share index -> exit signature share
+    shares: dict[int, BLSSignature]
+    threshold: int
+
+
+@dataclass
+class RecoveredExitSignature:
+    validator_index: int
+    # None when no subset of the shares reconstructs a valid signature
+    signature: BLSSignature | None
+    # indexes of the shares that do not match the valid signature
+    invalid_shares: list[int]
@@ -1,5 +1,3 @@
-import logging
-
 from eth_typing import ChecksumAddress, HexStr
 from web3 import Web3
 from web3.types import BlockNumber
@@ -9,13 +7,10 @@ from src.common.contracts import (
     keeper_contract,
     multicall_contract,
 )
-from src.common.transaction import tx_manager
-from src.common.typings import HarvestParams
+from src.common.typings import HarvestParams, MulticallCall
 
 from .typings import ExitRequest
 
-logger = logging.getLogger(__name__)
-
 
 async def can_force_enter_exit_queue(
     leverage_strategy_contract: LeverageStrategyContract,
@@ -44,22 +39,17 @@ async def can_force_enter_exit_queue(
 
 
 # pylint: disable-next=too-many-arguments
-async def claim_exited_assets(
+async def get_claim_exited_assets_calls(
     leverage_strategy_contract: LeverageStrategyContract,
     vault: ChecksumAddress,
     user: ChecksumAddress,
     exit_request: ExitRequest,
     harvest_params: HarvestParams | None,
     block_number: BlockNumber,
-) -> HexStr | None:
-    calls = []
-    if harvest_params and await keeper_contract.can_harvest(vault, block_number):
-        update_state_call = (
-            leverage_strategy_contract.address,
-            _encode_update_state_call(leverage_strategy_contract, vault, harvest_params),
-        )
-        calls.append(update_state_call)
-
+) -> list[MulticallCall]:
+    calls = await _get_update_state_calls(
+        leverage_strategy_contract, vault, harvest_params, block_number
+    )
     claim_call = leverage_strategy_contract.encode_abi(
         fn_name='claimExitedAssets',
         args=[
@@ -69,68 +59,41 @@ async def claim_exited_assets(
         ],
     )
     calls.append((leverage_strategy_contract.address, claim_call))
-    try:
-        tx_function = multicall_contract.functions.aggregate(calls)
-        tx_receipt = await tx_manager.transact(tx_function)
-    except Exception as e:
-        logger.error(
-            'Failed to claim exited assets for leverage position: vault=%s, user=%s %s...',
-            vault,
-            user,
-            e,
-        )
-        logger.exception(e)
-
-        return None
-
-    if tx_receipt is None:
-        logger.error(
-            'Failed to confirm exited assets claim for leverage position: vault=%s, user=%s...',
-            vault,
-            user,
-        )
-        return None
+    return calls
 
-    return Web3.to_hex(tx_receipt['transactionHash'])
 
-
-async def force_enter_exit_queue(
+async def get_force_enter_exit_queue_calls(
     leverage_strategy_contract: LeverageStrategyContract,
     vault: ChecksumAddress,
     user: ChecksumAddress,
     harvest_params: HarvestParams | None,
     block_number: BlockNumber,
-) -> HexStr | None:
-    calls = []
-    if harvest_params and await keeper_contract.can_harvest(vault, block_number):
-        update_state_call = (
-            leverage_strategy_contract.address,
-            _encode_update_state_call(leverage_strategy_contract, vault, harvest_params),
-        )
-        calls.append(update_state_call)
-
+) -> list[MulticallCall]:
+    calls = await _get_update_state_calls(
+        leverage_strategy_contract, vault, harvest_params, block_number
+    )
     force_enter_call = leverage_strategy_contract.encode_abi(
         fn_name='forceEnterExitQueue',
         args=[vault, user],
     )
     calls.append((leverage_strategy_contract.address, force_enter_call))
-    try:
-        tx_function = multicall_contract.functions.aggregate(calls)
-        tx_receipt = await tx_manager.transact(tx_function)
-    except Exception as e:
-        logger.error('Failed to force enter exit queue; vault=%s, user=%s %s: ', vault, user, e)
-        logger.exception(e)
-        return None
+    return calls
 
-    if tx_receipt is None:
-        logger.error(
-            'Failed to confirm force enter exit queue: vault=%s, user=%s...',
-            vault,
-            user,
-        )
-        return None
 
-    return Web3.to_hex(tx_receipt['transactionHash'])
+async def _get_update_state_calls(
+    leverage_strategy_contract: LeverageStrategyContract,
+    vault: ChecksumAddress,
+    harvest_params: HarvestParams | None,
+    block_number: BlockNumber,
+) -> list[MulticallCall]:
+    if harvest_params and await keeper_contract.can_harvest(vault, block_number):
+        return [
+            (
+                leverage_strategy_contract.address,
+                _encode_update_state_call(leverage_strategy_contract, vault, harvest_params),
+            )
+        ]
+    return []
 
 
 def _encode_update_state_call(
@@ -1,27 +1,23 @@
+import asyncio
 import logging
-import time
 
 from web3.types import BlockNumber
 
-from src.common.app_state import AppState
-from src.common.clients import execution_client
+from src.common.bundler import BundledAction, TransactionBundler
 from src.common.contracts import (
+    LeverageStrategyContract,
     get_leverage_strategy_contract,
     ostoken_vault_escrow_contract,
     strategy_registry_contract,
 )
 from src.common.graph import check_for_graph_node_sync_to_block, graph_get_vaults
-from src.common.typings import HarvestParams
-from src.config.settings import (
-    FORCE_EXITS_UPDATE_INTERVAL,
-    LTV_PERCENT_DELTA,
-    NETWORK_CONFIG,
-)
+from src.common.typings import ChainContext, HarvestParams
+from src.config.settings import LTV_PERCENT_DELTA, NETWORK_CONFIG
 
 from .execution import (
     can_force_enter_exit_queue,
-    claim_exited_assets,
-    force_enter_exit_queue,
+    get_claim_exited_assets_calls,
+    get_force_enter_exit_queue_calls,
 )
 from .graph import (
     graph_get_allocators,
@@ -36,32 +32,21 @@ logger = logging.getLogger(__name__)
 WAD = 10**18
 
 
-async def process_force_exits() -> None:
+async def process_force_exits(chain_context: ChainContext) -> None:
     """
     Monitor leverage positions and trigger exits/claims for those
     that approach the liquidation threshold.
     """
-    current_time = int(time.time())
-    app_state = AppState()
-
-    if (
-        app_state.force_exits_updated_timestamp
-        and app_state.force_exits_updated_timestamp + FORCE_EXITS_UPDATE_INTERVAL > current_time
-    ):
-        return
-
-    block = await execution_client.eth.get_block('finalized')
-    logger.debug('Current block: %d', block['number'])
-    block_number = block['number']
+    block_number = chain_context.finalized_block
+    logger.debug('Current block: %d', block_number)
 
     await check_for_graph_node_sync_to_block(
         block_number,
+        graph_block_number=chain_context.graph_block,
     )
     await handle_leverage_positions(block_number)
     await handle_ostoken_exit_requests(block_number)
 
-    app_state.force_exits_updated_timestamp = current_time
-
 
 async def handle_leverage_positions(block_number: BlockNumber) -> None:
     """Process graph leverage positions."""
@@ -75,15 +60,45 @@ async def handle_leverage_positions(block_number: BlockNumber) -> None:
     vault_addresses = list(set(position.vault for position in leverage_positions))
     graph_vaults = await graph_get_vaults(vaults=vault_addresses)
 
-    # check by position borrow ltv
-    for position in leverage_positions:
-        harvest_params = graph_vaults[position.vault].harvest_params
+    leverage_strategy_contracts = await asyncio.gather(
+        *[get_leverage_strategy_contract(position.proxy) for position in leverage_positions]
+    )
+    positions = [
+        (position, contract, graph_vaults[position.vault].harvest_params)
+        for position, contract in zip(leverage_positions, leverage_strategy_contracts)
+    ]
+    can_force_exit = await asyncio.gather(
+        *[
+            can_force_exit_position(position, contract, harvest_params, block_number)
+            for position, contract, harvest_params in positions
+        ]
+    )
+    positions = [item for item, can_exit in zip(positions, can_force_exit) if can_exit]
+
+    # the claims and the force exits of all the positions are bundled
+    # into a few multicall transactions
+    bundler = TransactionBundler()
+    claims = await asyncio.gather(
+        *[
+            add_exit_request_claim(bundler, position, contract, harvest_params, block_number)
+            for position, contract, harvest_params in positions
+        ]
+    )
+    await bundler.execute()
+
+    # the position is force exited after its active exit request is claimed
+    force_exits = await asyncio.gather(
+        *[
+            add_force_exit(bundler, position, contract, harvest_params, block_number)
+            for (position, contract, harvest_params), claim in zip(positions, claims)
+            if claim is None or claim.tx_hash
+        ]
+    )
+    await bundler.execute()
 
-        await handle_leverage_position(
-            position=position,
-            harvest_params=harvest_params,
-            block_number=block_number,
-        )
+    for force_exit in force_exits:
+        if force_exit is not None and force_exit.tx_hash:
+            logger.info('Successfully triggered exit: %s', force_exit.description)
 
 
 async def handle_ostoken_exit_requests(block_number: BlockNumber) -> None:
@@ -98,33 +113,51 @@ async def handle_ostoken_exit_requests(block_number: BlockNumber) -> None:
     vault_addresses = list(set(request.vault for request in exit_requests))
     graph_vaults = await graph_get_vaults(vaults=vault_addresses)
 
-    for os_token_exit_request in exit_requests:
-        position_owner = await graph_get_leverage_position_owner(os_token_exit_request.owner)
-        vault = os_token_exit_request.vault
-        harvest_params = graph_vaults[vault].harvest_params
-
-        logger.info(
-            'Claiming exited assets: vault=%s, user=%s...',
-            vault,
-            position_owner,
-        )
-        leverage_strategy_contract = await get_leverage_strategy_contract(
-            os_token_exit_request.owner
-        )
-        tx_hash = await claim_exited_assets(
-            leverage_strategy_contract=leverage_strategy_contract,
-            vault=vault,
-            user=position_owner,
-            exit_request=os_token_exit_request.exit_request,
-            harvest_params=harvest_params,
-            block_number=block_number,
-        )
-        if tx_hash:
-            logger.info(
-                'Successfully claimed exited assets: vault=%s, user=%s...',
-                vault,
-                os_token_exit_request.owner,
+    bundler = TransactionBundler()
+    claims = await asyncio.gather(
+        *[
+            add_ostoken_exit_request_claim(
+                bundler=bundler,
+                os_token_exit_request=os_token_exit_request,
+                harvest_params=graph_vaults[os_token_exit_request.vault].harvest_params,
+                block_number=block_number,
             )
+            for os_token_exit_request in exit_requests
+        ]
+    )
+    await bundler.execute()
+
+    for claim in claims:
+        if claim.tx_hash:
+            logger.info('Successfully claimed exited assets: %s', claim.description)
+
+
+async def add_ostoken_exit_request_claim(
+    bundler: TransactionBundler,
+    os_token_exit_request: OsTokenExitRequest,
+    harvest_params: HarvestParams | None,
+    block_number: BlockNumber,
+) -> BundledAction:
+    position_owner = await graph_get_leverage_position_owner(os_token_exit_request.owner)
+    vault = os_token_exit_request.vault
+
+    logger.info(
+        'Claiming exited assets: vault=%s, user=%s...',
+        vault,
+        position_owner,
+    )
+    leverage_strategy_contract = await get_leverage_strategy_contract(os_token_exit_request.owner)
+    calls = await get_claim_exited_assets_calls(
+        leverage_strategy_contract=leverage_strategy_contract,
+        vault=vault,
+        user=position_owner,
+        exit_request=os_token_exit_request.exit_request,
+        harvest_params=harvest_params,
+        block_number=block_number,
+    )
+    return bundler.add(
+        calls, f'exited assets claim: vault={vault}, user={os_token_exit_request.owner}'
+    )
 
 
 async def fetch_leverage_positions(block_number: BlockNumber) -> list[LeveragePosition]:
@@ -174,82 +207,85 @@ async def fetch_ostoken_exit_requests(block_number: BlockNumber) -> list[OsToken
     return exit_requests
 
 
-async def handle_leverage_position(
-    position: LeveragePosition, harvest_params: HarvestParams | None, block_number: BlockNumber
-) -> None:
-    """
-    Submit force exit for leverage position.
-    Also check for position active exit request and claim assets if possible.
-    """
-    leverage_strategy_contract = await get_leverage_strategy_contract(position.proxy)
-    if not await can_force_enter_exit_queue(
+async def can_force_exit_position(
+    position: LeveragePosition,
+    leverage_strategy_contract: LeverageStrategyContract,
+    harvest_params: HarvestParams | None,
+    block_number: BlockNumber,
+) -> bool:
+    if await can_force_enter_exit_queue(
         leverage_strategy_contract=leverage_strategy_contract,
         vault=position.vault,
         user=position.user,
         harvest_params=harvest_params,
         block_number=block_number,
     ):
-        logger.info(
-            'Skip leverage positions because it cannot be forcefully closed: vault=%s, user=%s...',
-            position.vault,
-            position.user,
-        )
-        return
+        return True
 
-    # claim active exit request
-    if position.exit_request and position.exit_request.is_fully_claimable:
-        logger.info(
-            'Claiming exited assets for leverage positions: vault=%s, user=%s...',
-            position.vault,
-            position.user,
-        )
-        tx_hash = await claim_exited_assets(
-            leverage_strategy_contract=leverage_strategy_contract,
-            vault=position.vault,
-            user=position.user,
-            exit_request=position.exit_request,
-            harvest_params=harvest_params,
-            block_number=block_number,
-        )
-        if tx_hash:
-            logger.info(
-                'Successfully claimed exited assets for leverage positions: vault=%s, user=%s...',
-                position.vault,
-                position.user,
-            )
-        else:
-            return
     logger.info(
-        'Force exiting leverage positions: vault=%s, user=%s...',
+        'Skip leverage positions because it cannot be forcefully closed: vault=%s, user=%s...',
         position.vault,
         position.user,
     )
+    return False
 
-    # recheck because position state has changed after claiming assets
-    if not await can_force_enter_exit_queue(
+
+async def add_exit_request_claim(
+    bundler: TransactionBundler,
+    position: LeveragePosition,
+    leverage_strategy_contract: LeverageStrategyContract,
+    harvest_params: HarvestParams | None,
+    block_number: BlockNumber,
+) -> BundledAction | None:
+    """Adds the claim of the position active exit request, if it is claimable."""
+    if not position.exit_request or not position.exit_request.is_fully_claimable:
+        return None
+
+    logger.info(
+        'Claiming exited assets for leverage positions: vault=%s, user=%s...',
+        position.vault,
+        position.user,
+    )
+    calls = await get_claim_exited_assets_calls(
         leverage_strategy_contract=leverage_strategy_contract,
         vault=position.vault,
         user=position.user,
+        exit_request=position.exit_request,
         harvest_params=harvest_params,
         block_number=block_number,
+    )
+    return bundler.add(
+        calls,
+        f'leverage position exited assets claim: vault={position.vault}, user={position.user}',
+    )
+
+
+async def add_force_exit(
+    bundler: TransactionBundler,
+    position: LeveragePosition,
+    leverage_strategy_contract: LeverageStrategyContract,
+    harvest_params: HarvestParams | None,
+    block_number: BlockNumber,
+) -> BundledAction | None:
+    logger.info(
+        'Force exiting leverage positions: vault=%s, user=%s...',
+        position.vault,
+        position.user,
+    )
+
+    # recheck because position state has changed after claiming assets
+    if not await can_force_exit_position(
+        position, leverage_strategy_contract, harvest_params, block_number
     ):
-        logger.info(
-            'Skip leverage positions because it cannot be forcefully closed: vault=%s, user=%s...',
-            position.vault,
-            position.user,
-        )
-        return
+        return None
 
-    tx_hash = await force_enter_exit_queue(
+    calls = await get_force_enter_exit_queue_calls(
         leverage_strategy_contract=leverage_strategy_contract,
         vault=position.vault,
         user=position.user,
         harvest_params=harvest_params,
         block_number=block_number,
     )
-    if tx_hash:
-        logger.info(
-            'Successfully triggered exit for leverage positions: vault=%s, user=%s...',
-            position.vault,
-            position.user,
-        )
+    return bundler.add(
+        calls, f'leverage position force exit: vault={position.vault}, user={position.user}'
+    )
@@ -1,15 +1,12 @@
 import logging
-import time
 from decimal import Decimal
 
-from web3 import Web3
 from web3.types import BlockNumber
 
-from src.common.app_state import AppState
-from src.common.clients import execution_client
+from src.common.bundler import BundledAction, TransactionBundler
 from src.common.contracts import vault_user_ltv_tracker_contract
 from src.common.graph import check_for_graph_node_sync_to_block, graph_get_vaults
-from src.config.settings import LTV_UPDATE_INTERVAL
+from src.common.typings import ChainContext
 
 from .graph import graph_get_ostoken_vaults, graph_get_vault_max_ltv_allocator
 from .typings import VaultMaxLtvUser
@@ -21,25 +18,16 @@ logger = logging.getLogger(__name__)
 WAD = 10**18
 
 
-async def process_vault_max_ltv_user() -> None:
+async def process_vault_max_ltv_user(chain_context: ChainContext) -> None:
     """
     Finds user having maximum LTV in given vault and submits this user in the LTV Tracker contract.
     """
-    current_time = int(time.time())
-    app_state = AppState()
-
-    if (
-        app_state.ltv_updated_timestamp
-        and app_state.ltv_updated_timestamp + LTV_UPDATE_INTERVAL > current_time
-    ):
-        return
-
-    block = await execution_client.eth.get_block('finalized')
-    logger.debug('Current block: %d', block['number'])
-    block_number = block['number']
+    block_number = chain_context.finalized_block
+    logger.debug('Current block: %d', block_number)
 
     await check_for_graph_node_sync_to_block(
         block_number,
+        graph_block_number=chain_context.graph_block,
     )
 
     # Get max LTV user for vault
@@ -49,6 +37,9 @@ async def process_vault_max_ltv_user() -> None:
         logger.info('No max LTV users found. Nothing to update.')
         return
 
+    # the updates of all the vaults are bundled into a few multicall transactions
+    bundler = TransactionBundler()
+    updates = []
     for user in max_ltv_users:
         if user.address == user.prev_address:
             logger.info(
@@ -59,10 +50,13 @@ async def process_vault_max_ltv_user() -> None:
             continue
 
         logger.info('Updating max LTV user for vault %s', user.vault)
-        await handle_max_ltv_user(user)
+        updates.append((user, add_max_ltv_user_update(bundler, user)))
+    await bundler.execute()
+
+    for user, update in updates:
+        await handle_max_ltv_user_update(user, update)
 
     logger.info('LTV update process completed.')
-    app_state.ltv_updated_timestamp = current_time
 
 
 async def get_max_ltv_users(block_number: BlockNumber) -> list[VaultMaxLtvUser]:
@@ -106,19 +100,22 @@ async def get_max_ltv_users(block_number: BlockNumber) -> list[VaultMaxLtvUser]:
     return max_ltv_users
 
 
-async def handle_max_ltv_user(max_ltv_user: VaultMaxLtvUser) -> None:
-    vault = max_ltv_user.vault
-    # Update LTV
-    tx_receipt = await vault_user_ltv_tracker_contract.update_vault_max_ltv_user(
-        vault, max_ltv_user.address, max_ltv_user.harvest_params
+def add_max_ltv_user_update(
+    bundler: TransactionBundler, max_ltv_user: VaultMaxLtvUser
+) -> BundledAction:
+    call = vault_user_ltv_tracker_contract.get_update_vault_max_ltv_user_call(
+        max_ltv_user.vault, max_ltv_user.address, max_ltv_user.harvest_params
     )
+    return bundler.add([call], f'max LTV user update: vault={max_ltv_user.vault}')
+
 
-    # Check receipt status
-    if tx_receipt is None:
+async def handle_max_ltv_user_update(max_ltv_user: VaultMaxLtvUser, update: BundledAction) -> None:
+    vault = max_ltv_user.vault
+    # Check the update result
+    if update.tx_hash is None:
         raise RuntimeError('Update tx failed')
 
-    tx_hash = Web3.to_hex(tx_receipt['transactionHash'])
-    logger.info('Tx confirmed, tx hash: %s', tx_hash)
+    logger.info('Tx confirmed, tx hash: %s', update.tx_hash)
 
     # Get LTV after update
     ltv = await vault_user_ltv_tracker_contract.get_vault_max_ltv(
@@ -1,37 +1,49 @@
 import asyncio
 import logging
-import time
 
-from sw_utils import InterruptHandler
+from sw_utils import InterruptHandler, ProtocolConfig
 
 import src
+from src.common.accounts import keeper_account
+from src.common.app_state import AppState
 from src.common.clients import close_clients, setup_clients
 from src.common.execution import get_keeper_balance
+from src.common.fees import fee_oracle
+from src.common.journal import NonceJournal
+from src.common.scheduler import BlockScheduler, Checkpoint
 from src.common.startup_check import startup_checks
+from src.common.tracing import tracer
+from src.common.transaction import tx_manager
+from src.common.typings import ChainContext
 from src.config.settings import (
     FORCE_EXITS_SUPPORTED_NETWORKS,
+    FORCE_EXITS_UPDATE_INTERVAL,
     GQL_LOG_LEVEL,
     LOG_LEVEL,
+    LONG_TASK_TIMEOUT,
+    LTV_UPDATE_INTERVAL,
     METRICS_HOST,
     METRICS_PORT,
     NETWORK,
-    NETWORK_CONFIG,
     OSETH_PRICE_SUPPORTED_NETWORKS,
+    REWARDS_CACHE_PATH,
     SENTRY_DSN,
     SKIP_DISTRIBUTOR_REWARDS,
     SKIP_FORCE_EXITS,
     SKIP_OSETH_PRICE_UPDATE,
     SKIP_UPDATE_LTV,
+    TRANSACTION_JOURNAL_PATH,
     WEB3_LOG_LEVEL,
 )
 from src.distributor.service import process_distributor_rewards
-from src.exits.service import process_exits
+from src.exits.service import process_exits, signature_reconstructor
 from src.force_exit.service import process_force_exits
 from src.ltv.service import process_vault_max_ltv_user
 from src.metrics import metrics, metrics_server
 from src.price.service import process_layer_two_oseth_price
 from src.protocol_config.service import get_protocol_config
-from src.rewards.service import process_rewards
+from src.rewards.service import RewardsCache, process_rewards
+from src.rewards.storage import RewardsCacheStorage
 
 logging.basicConfig(
     format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
@@ -59,66 +71,109 @@ async def main() -> None:
         logger.info('Started keeper service...')
         await start_keeper()
     finally:
+        signature_reconstructor.shutdown()
+        RewardsCache().close()
+        await tracer.flush()
         await close_clients()
 
 
 async def start_keeper() -> None:
+    if REWARDS_CACHE_PATH:
+        await RewardsCache().load(RewardsCacheStorage(REWARDS_CACHE_PATH))
+    if TRANSACTION_JOURNAL_PATH:
+        await tx_manager.load_journal(
+            NonceJournal(TRANSACTION_JOURNAL_PATH, keeper_account.address)
+        )
+
+    scheduler = BlockScheduler()
+    scheduler.add_task('fee_oracle', fee_oracle_task)
+    scheduler.add_task('protocol_config', update_protocol_config, Checkpoint.FINALIZED)
+    scheduler.add_task('rewards', rewards_task)
+    scheduler.add_task('exits', exits_task)
+
+    # distributor
+    if not SKIP_DISTRIBUTOR_REWARDS:
+        scheduler.add_task('distributor', distributor_task)
+
+    # update price
+    if NETWORK in OSETH_PRICE_SUPPORTED_NETWORKS and not SKIP_OSETH_PRICE_UPDATE:
+        scheduler.add_task('oseth_price', oseth_price_task)
+
+    # force position exits
+    if NETWORK in FORCE_EXITS_SUPPORTED_NETWORKS and not SKIP_FORCE_EXITS:
+        scheduler.add_task(
+            'force_exits',
+            process_force_exits,
+            Checkpoint.FINALIZED,
+            interval=FORCE_EXITS_UPDATE_INTERVAL,
+            timeout=LONG_TASK_TIMEOUT,
+        )
+
+    # update vaults max ltv
+    if not SKIP_UPDATE_LTV:
+        scheduler.add_task(
+            'ltv',
+            process_vault_max_ltv_user,
+            Checkpoint.FINALIZED,
+            interval=LTV_UPDATE_INTERVAL,
+            timeout=LONG_TASK_TIMEOUT,
+        )
+
+    scheduler.add_task('keeper_balance', keeper_balance_task, Checkpoint.FINALIZED)
+
+    # oracle tasks must not wait for the first finalized checkpoint
+    try:
+        await update_protocol_config()
+    except Exception as e:
+        logger.exception(e)
+
     with InterruptHandler() as interrupt_handler:
-        while not interrupt_handler.exit:
-            start_time = time.time()
-            try:
-                protocol_config = await get_protocol_config()
-
-                if not protocol_config.oracles:
-                    logger.error('Empty oracles set')
-                    await interrupt_handler.sleep(60)
-                    continue
-
-                tasks = [
-                    process_rewards(
-                        protocol_config=protocol_config,
-                    ),
-                    process_exits(
-                        protocol_config=protocol_config,
-                    ),
-                ]
-
-                # distributor
-                if not SKIP_DISTRIBUTOR_REWARDS:
-                    tasks.append(
-                        process_distributor_rewards(
-                            protocol_config=protocol_config,
-                        )
-                    )
-
-                # update price
-                if NETWORK in OSETH_PRICE_SUPPORTED_NETWORKS and not SKIP_OSETH_PRICE_UPDATE:
-                    tasks.append(process_layer_two_oseth_price())
-
-                # force position exits
-                if NETWORK in FORCE_EXITS_SUPPORTED_NETWORKS and not SKIP_FORCE_EXITS:
-                    tasks.append(process_force_exits())
-
-                # update vaults max ltv
-                if not SKIP_UPDATE_LTV:
-                    tasks.append(process_vault_max_ltv_user())
-
-                results = await asyncio.gather(
-                    *tasks,
-                    return_exceptions=True,
-                )
-
-                for result in results:
-                    if isinstance(result, Exception):
-                        logger.exception('', exc_info=result)
-
-                metrics.keeper_balance.labels(network=NETWORK).set(await get_keeper_balance())
-            except Exception as exc:
-                logger.exception(exc)
-
-            block_processing_time = time.time() - start_time
-            sleep_time = max(float(NETWORK_CONFIG.SECONDS_PER_BLOCK) - block_processing_time, 0)
-            await interrupt_handler.sleep(sleep_time)
+        await scheduler.run(interrupt_handler)
+
+
+async def update_protocol_config(chain_context: ChainContext | None = None) -> None:
+    finalized_block = chain_context.finalized_block if chain_context else None
+    protocol_config = await get_protocol_config(finalized_block)
+    if not protocol_config.oracles:
+        logger.error('Empty oracles set')
+    AppState().protocol_config = protocol_config
+
+
+def get_oracles_protocol_config() -> ProtocolConfig | None:
+    """Returns the latest protocol config or None when there are no oracles to query."""
+    protocol_config = AppState().protocol_config
+    if protocol_config is None or not protocol_config.oracles:
+        return None
+    return protocol_config
+
+
+async def rewards_task(chain_context: ChainContext) -> None:
+    if protocol_config := get_oracles_protocol_config():
+        await process_rewards(protocol_config=protocol_config, chain_context=chain_context)
+
+
+async def exits_task(chain_context: ChainContext) -> None:
+    if protocol_config := get_oracles_protocol_config():
+        await process_exits(protocol_config=protocol_config, chain_context=chain_context)
+
+
+async def distributor_task(chain_context: ChainContext) -> None:
+    if protocol_config := get_oracles_protocol_config():
+        await process_distributor_rewards(
+            protocol_config=protocol_config, chain_context=chain_context
+        )
+
+
+async def oseth_price_task(_chain_context: ChainContext) -> None:
+    await process_layer_two_oseth_price()
+
+
+async def fee_oracle_task(chain_context: ChainContext) -> None:
+    await fee_oracle.update(chain_context.head_block)
+
+
+async def keeper_balance_task(_chain_context: ChainContext) -> None:
+    metrics.keeper_balance.labels(network=NETWORK).set(await get_keeper_balance())
 
 
 if __name__ == '__main__':
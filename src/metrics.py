@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge, Info, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, Info, start_http_server
 
 from src import _get_project_meta
 from src.common.accounts import keeper_account
@@ -33,6 +33,72 @@ class Metrics:
             'processed_exits', 'Number of exits keeper processed', labelnames=['network']
         )
         self.keeper_balance = Gauge('keeper_balance', 'Keeper balance', labelnames=['network'])
+        self.http_pool_connections = Counter(
+            'http_pool_connections',
+            'Oracle http connections: reused from the pool (hit) or newly created (miss)',
+            labelnames=['network', 'result'],
+        )
+        self.oracle_not_modified_responses = Counter(
+            'oracle_not_modified_responses',
+            'Oracle responses revalidated with 304 Not Modified',
+            labelnames=['network', 'path'],
+        )
+        self.oracle_unchanged_responses = Counter(
+            'oracle_unchanged_responses',
+            'Oracle responses with the same body as the previous one',
+            labelnames=['network', 'path'],
+        )
+        self.oracle_endpoint_latency = Histogram(
+            'oracle_endpoint_latency_seconds',
+            'Time to fetch all the resources of an oracle endpoint',
+            labelnames=['network', 'endpoint'],
+            buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+        )
+        self.oracle_endpoint_circuit_state = Gauge(
+            'oracle_endpoint_circuit_state',
+            'Oracle endpoint circuit state: 0 closed, 1 half-open, 2 open',
+            labelnames=['network', 'endpoint'],
+        )
+        self.oracle_endpoint_failures = Gauge(
+            'oracle_endpoint_failures',
+            'Oracle endpoint consecutive failed polls',
+            labelnames=['network', 'endpoint'],
+        )
+        self.task_latency = Histogram(
+            'task_latency_seconds',
+            'Time from the chain checkpoint trigger to the task completion',
+            labelnames=['network', 'task'],
+            buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+        )
+        self.transaction_queue_depth = Gauge(
+            'transaction_queue_depth',
+            'Keeper transactions broadcast in the pipelined mode and not confirmed yet',
+            labelnames=['network'],
+        )
+        self.transaction_confirmation_latency = Histogram(
+            'transaction_confirmation_latency_seconds',
+            'Time from the first broadcast of a keeper transaction to its receipt',
+            labelnames=['network'],
+            buckets=(6, 12, 24, 36, 60, 120, 300, 600),
+        )
+        self.transaction_stage_duration = Histogram(
+            'transaction_stage_duration_seconds',
+            'Duration of a keeper transaction stage: the whole transact call, the default gas '
+            'attempts, the high priority submission or the receipt wait',
+            labelnames=['network', 'service', 'stage', 'outcome'],
+            buckets=(0.1, 0.5, 1, 6, 12, 24, 60, 120, 300, 600),
+        )
+        self.transaction_replacements = Counter(
+            'transaction_replacements',
+            'Pending keeper transactions replaced with bumped fees',
+            labelnames=['network', 'service'],
+        )
+        self.base_fee_prediction_error = Histogram(
+            'base_fee_prediction_error',
+            'Relative error of the next block base fee predicted by the fee oracle',
+            labelnames=['network'],
+            buckets=(0.001, 0.01, 0.025, 0.05, 0.1, 0.125, 0.25),
+        )
 
     def set_app_version(self) -> None:
         self.app_version.labels(network=NETWORK).info({'version': _get_project_meta()['version']})
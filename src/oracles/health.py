@@ -0,0 +1,114 @@
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+from src.config.settings import (
+    NETWORK,
+    ORACLE_CIRCUIT_FAILURE_THRESHOLD,
+    ORACLE_CIRCUIT_PROBE_INTERVAL,
+)
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# weight of the last sample in the smoothed endpoint latency
+LATENCY_SMOOTHING = 0.3
+
+
+class CircuitState(Enum):
+    """Circuit breaker state of an endpoint, the value is exported as a gauge."""
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+@dataclass
+class EndpointHealth:
+    # number of consecutive failed polls
+    failures: int = 0
+    # smoothed poll latency in seconds, None until the first poll completes
+    latency: float | None = None
+    state: CircuitState = CircuitState.CLOSED
+    opened_at: float = 0
+
+
+class EndpointHealthRegistry:
+    """
+    Tracks the health of every oracle endpoint by url.
+
+    The circuit of an endpoint opens after `ORACLE_CIRCUIT_FAILURE_THRESHOLD` consecutive
+    failures, and the endpoint is skipped while it is open.
+    Every `ORACLE_CIRCUIT_PROBE_INTERVAL` seconds the circuit becomes half-open
+    and the endpoint is polled again: a success closes the circuit, a failure opens it.
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: dict[str, EndpointHealth] = {}
+
+    def is_available(self, endpoint: str) -> bool:
+        health = self._get(endpoint)
+        if health.state != CircuitState.OPEN:
+            return True
+        if time.time() - health.opened_at < ORACLE_CIRCUIT_PROBE_INTERVAL:
+            return False
+
+        self._set_state(endpoint, health, CircuitState.HALF_OPEN)
+        return True
+
+    def latency(self, endpoint: str) -> float:
+        """Smoothed latency of the endpoint, endpoints never polled come first."""
+        return self._get(endpoint).latency or 0
+
+    def observe_latency(self, endpoint: str, latency: float) -> None:
+        health = self._get(endpoint)
+        if health.latency is None:
+            health.latency = latency
+        else:
+            health.latency += LATENCY_SMOOTHING * (latency - health.latency)
+
+    def record_success(self, endpoint: str, latency: float) -> None:
+        health = self._get(endpoint)
+        self.observe_latency(endpoint, latency)
+        health.failures = 0
+        if health.state != CircuitState.CLOSED:
+            logger.info('Oracle endpoint %s is available again', endpoint)
+            self._set_state(endpoint, health, CircuitState.CLOSED)
+        self._export(endpoint, health)
+
+    def record_failure(self, endpoint: str, latency: float) -> None:
+        health = self._get(endpoint)
+        self.observe_latency(endpoint, latency)
+        health.failures += 1
+        if health.state == CircuitState.HALF_OPEN or (
+            health.state == CircuitState.CLOSED
+            and health.failures >= ORACLE_CIRCUIT_FAILURE_THRESHOLD
+        ):
+            logger.warning(
+                'Oracle endpoint %s failed %d times, skipping it for %d seconds',
+                endpoint,
+                health.failures,
+                ORACLE_CIRCUIT_PROBE_INTERVAL,
+            )
+            health.opened_at = time.time()
+            self._set_state(endpoint, health, CircuitState.OPEN)
+        self._export(endpoint, health)
+
+    def _get(self, endpoint: str) -> EndpointHealth:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = EndpointHealth()
+        return self._endpoints[endpoint]
+
+    def _set_state(self, endpoint: str, health: EndpointHealth, state: CircuitState) -> None:
+        health.state = state
+        self._export(endpoint, health)
+
+    @staticmethod
+    def _export(endpoint: str, health: EndpointHealth) -> None:
+        metrics.oracle_endpoint_circuit_state.labels(network=NETWORK, endpoint=endpoint).set(
+            health.state.value
+        )
+        metrics.oracle_endpoint_failures.labels(network=NETWORK, endpoint=endpoint).set(
+            health.failures
+        )
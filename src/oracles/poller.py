@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import urljoin, urlparse
+
+from eth_typing import BlockNumber, ChecksumAddress
+from sw_utils import Oracle
+
+from src.common.clients import oracle_session_manager
+from src.common.typings import FetchedResponse
+from src.common.utils import aiohttp_fetch
+from src.config.settings import NETWORK, ORACLE_HEDGE_DELAY, SKIP_DISTRIBUTOR_REWARDS
+from src.metrics import metrics
+from src.oracles.health import EndpointHealthRegistry
+from src.oracles.typings import OraclesSnapshot
+
+logger = logging.getLogger(__name__)
+
+REWARD_VOTE_URL_PATH = '/'
+EXIT_VOTE_URL_PATH = '/exits'
+DISTRIBUTOR_REWARDS_VOTE_URL_PATH = '/distributor-rewards'
+
+
+class OraclePoller:
+    """
+    Fetches all the oracle resources once per block and shares the snapshot
+    between the rewards, exits and distributor services.
+
+    The endpoints of an oracle are hedged: the fastest one is queried first
+    and the others only when it is slow, failing or serves outdated votes.
+    Endpoints with an open circuit in the health registry are skipped.
+    The last response of every resource is kept to revalidate it with
+    its ETag and Last-Modified, or to detect an unchanged body by its hash.
+    The votes parsed from the responses are kept by oracle and url
+    for the current oracle set only.
+    """
+
+    def __init__(self) -> None:
+        self.paths = [REWARD_VOTE_URL_PATH, EXIT_VOTE_URL_PATH]
+        if not SKIP_DISTRIBUTOR_REWARDS:
+            self.paths.append(DISTRIBUTOR_REWARDS_VOTE_URL_PATH)
+
+        self._responses: dict[str, FetchedResponse] = {}
+        # the votes parsed from the responses, see OraclesSnapshot.get_parsed
+        self._parsed: dict[tuple[ChecksumAddress, str], tuple[str, Any]] = {}
+        self.health = EndpointHealthRegistry()
+        # the highest nonce served by any oracle for every resource path
+        self._nonces: dict[str, int] = {}
+        self._block_number: BlockNumber | None = None
+        self._poll_task: asyncio.Task[OraclesSnapshot] | None = None
+
+    async def get_snapshot(
+        self, oracles: list[Oracle], block_number: BlockNumber
+    ) -> OraclesSnapshot:
+        """
+        Returns the oracles snapshot for the block.
+        The first caller for a block starts the poll, the others wait for it.
+        """
+        if self._poll_task is None or self._block_number != block_number:
+            self._block_number = block_number
+            self._poll_task = asyncio.create_task(self._poll(oracles, block_number))
+
+        # the poll is shared, a cancelled caller must not cancel it for the others
+        return await asyncio.shield(self._poll_task)
+
+    async def _poll(self, oracles: list[Oracle], block_number: BlockNumber) -> OraclesSnapshot:
+        self._prune_parsed(oracles)
+        results = await asyncio.gather(
+            *(self._poll_oracle(oracle) for oracle in oracles), return_exceptions=True
+        )
+
+        responses: dict[str, FetchedResponse | Exception] = {}
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(result)
+                continue
+            if isinstance(result, BaseException):
+                # Re-raise system-exiting exceptions
+                raise result
+            responses.update(result)
+
+        return OraclesSnapshot(block_number=block_number, responses=responses, parsed=self._parsed)
+
+    def _prune_parsed(self, oracles: list[Oracle]) -> None:
+        # the votes of removed oracles and endpoints are dropped
+        current = {
+            (oracle.address, urljoin(endpoint, path))
+            for oracle in oracles
+            for endpoint in oracle.endpoints
+            for path in self.paths
+        }
+        for key in self._parsed.keys() - current:
+            del self._parsed[key]
+
+    async def _poll_oracle(self, oracle: Oracle) -> dict[str, FetchedResponse | Exception]:
+        """
+        Polls the fastest endpoint of the oracle first and the others after the hedge delay.
+        Returns as soon as an endpoint serves all the resources with the latest known nonces,
+        the endpoints still in flight are cancelled.
+        """
+        endpoints = [
+            endpoint for endpoint in oracle.endpoints if self.health.is_available(endpoint)
+        ]
+        if not endpoints:
+            return {}
+
+        primary, *secondaries = sorted(endpoints, key=self.health.latency)
+        pending = {asyncio.create_task(self._poll_endpoint(primary))}
+        hedged = not secondaries
+
+        responses: dict[str, FetchedResponse | Exception] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else ORACLE_HEDGE_DELAY,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    endpoint_responses = task.result()
+                    responses.update(endpoint_responses)
+                    if self._is_up_to_date(endpoint_responses):
+                        return responses
+
+                if not hedged:
+                    # the primary is slow or outdated
+                    hedged = True
+                    pending.update(
+                        asyncio.create_task(self._poll_endpoint(endpoint))
+                        for endpoint in secondaries
+                    )
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return responses
+
+    async def _poll_endpoint(self, endpoint: str) -> dict[str, FetchedResponse | Exception]:
+        urls = [urljoin(endpoint, path) for path in self.paths]
+        start_time = time.time()
+        try:
+            results = await asyncio.gather(
+                *(self._fetch(url) for url in urls), return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            # a slower endpoint than the one that won must not stay primary
+            self.health.observe_latency(endpoint, time.time() - start_time)
+            raise
+
+        latency = time.time() - start_time
+        if all(isinstance(result, BaseException) for result in results):
+            self.health.record_failure(endpoint, latency)
+        else:
+            self.health.record_success(endpoint, latency)
+        metrics.oracle_endpoint_latency.labels(network=NETWORK, endpoint=endpoint).observe(latency)
+
+        responses: dict[str, FetchedResponse | Exception] = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                responses[url] = result
+                continue
+            if isinstance(result, BaseException):
+                # Re-raise system-exiting exceptions
+                raise result
+            responses[url] = result
+
+            if isinstance(result.data, dict) and 'nonce' in result.data:
+                path = urlparse(url).path
+                self._nonces[path] = max(self._nonces.get(path, 0), result.data['nonce'])
+
+        return responses
+
+    def _is_up_to_date(self, endpoint_responses: dict[str, FetchedResponse | Exception]) -> bool:
+        for url, response in endpoint_responses.items():
+            if isinstance(response, Exception):
+                return False
+            if isinstance(response.data, dict) and 'nonce' in response.data:
+                if response.data['nonce'] < self._nonces.get(urlparse(url).path, 0):
+                    return False
+        return True
+
+    async def _fetch(self, url: str) -> FetchedResponse:
+        response = await aiohttp_fetch(
+            oracle_session_manager.session, url, cached=self._responses.get(url)
+        )
+        self._responses[url] = response
+
+        path = urlparse(url).path
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            metrics.oracle_not_modified_responses.labels(network=NETWORK, path=path).inc()
+        elif not response.changed:
+            metrics.oracle_unchanged_responses.labels(network=NETWORK, path=path).inc()
+        return response
+
+
+oracle_poller = OraclePoller()
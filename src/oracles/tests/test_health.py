@@ -0,0 +1,56 @@
+from unittest import mock
+
+from src.oracles.health import EndpointHealthRegistry
+
+ENDPOINT = 'https://example0.com'
+
+
+class TestEndpointHealthRegistry:
+    def test_opens_after_consecutive_failures(self):
+        registry = EndpointHealthRegistry()
+
+        with mock.patch('src.oracles.health.ORACLE_CIRCUIT_FAILURE_THRESHOLD', 3):
+            registry.record_failure(ENDPOINT, 1)
+            registry.record_failure(ENDPOINT, 1)
+            registry.record_success(ENDPOINT, 1)
+            registry.record_failure(ENDPOINT, 1)
+            registry.record_failure(ENDPOINT, 1)
+            assert registry.is_available(ENDPOINT)
+
+            registry.record_failure(ENDPOINT, 1)
+            assert not registry.is_available(ENDPOINT)
+
+    def test_probes_open_circuit(self):
+        registry = EndpointHealthRegistry()
+
+        with mock.patch('src.oracles.health.ORACLE_CIRCUIT_FAILURE_THRESHOLD', 1), mock.patch(
+            'src.oracles.health.ORACLE_CIRCUIT_PROBE_INTERVAL', 60
+        ), mock.patch('src.oracles.health.time.time', return_value=1000):
+            registry.record_failure(ENDPOINT, 1)
+            assert not registry.is_available(ENDPOINT)
+
+        with mock.patch('src.oracles.health.time.time', return_value=1060):
+            # the probe fails, the circuit opens again
+            assert registry.is_available(ENDPOINT)
+            registry.record_failure(ENDPOINT, 1)
+            assert not registry.is_available(ENDPOINT)
+
+        with mock.patch('src.oracles.health.time.time', return_value=1120):
+            # the probe succeeds, the circuit closes
+            assert registry.is_available(ENDPOINT)
+            registry.record_success(ENDPOINT, 1)
+
+        # the failures are reset, a single failure does not open the circuit
+        with mock.patch('src.oracles.health.ORACLE_CIRCUIT_FAILURE_THRESHOLD', 2):
+            registry.record_failure(ENDPOINT, 1)
+            assert registry.is_available(ENDPOINT)
+
+    def test_latency_is_smoothed(self):
+        registry = EndpointHealthRegistry()
+        assert registry.latency(ENDPOINT) == 0
+
+        registry.record_success(ENDPOINT, 1)
+        assert registry.latency(ENDPOINT) == 1
+
+        registry.record_success(ENDPOINT, 2)
+        assert 1 < registry.latency(ENDPOINT) < 2
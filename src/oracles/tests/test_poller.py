@@ -0,0 +1,165 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from eth_typing import BlockNumber
+from sw_utils import Oracle
+
+from src.common.tests.factories import create_oracle
+from src.common.typings import FetchedResponse
+from src.oracles.poller import EXIT_VOTE_URL_PATH, REWARD_VOTE_URL_PATH, OraclePoller
+from src.oracles.typings import OraclesSnapshot
+
+
+class TestOraclePoller:
+    async def test_polls_once_per_block(self):
+        poller = OraclePoller()
+        oracles = [create_oracle(num_endpoints=2), create_oracle(num_endpoints=1)]
+
+        with mock.patch.object(
+            poller, '_fetch', return_value=FetchedResponse(data={}, content_hash='')
+        ) as fetch_mock:
+            snapshot_1, snapshot_2 = await asyncio.gather(
+                poller.get_snapshot(oracles, BlockNumber(100)),
+                poller.get_snapshot(oracles, BlockNumber(100)),
+            )
+            assert snapshot_1 is snapshot_2
+            # only the primary endpoint of every oracle is polled
+            assert fetch_mock.await_count == 2 * len(poller.paths)
+
+            await poller.get_snapshot(oracles, BlockNumber(101))
+            assert fetch_mock.await_count == 4 * len(poller.paths)
+
+    async def test_snapshot_keeps_errors(self):
+        poller = OraclePoller()
+        oracle = create_oracle()
+        endpoint = oracle.endpoints[0]
+
+        async def _fetch(url: str) -> FetchedResponse:
+            if url.endswith(EXIT_VOTE_URL_PATH):
+                raise RuntimeError('unavailable')
+            return FetchedResponse(data={'url': url}, content_hash='')
+
+        with mock.patch.object(poller, '_fetch', side_effect=_fetch):
+            snapshot = await poller.get_snapshot([oracle], BlockNumber(100))
+
+        assert snapshot.get(endpoint, REWARD_VOTE_URL_PATH) == {'url': f'{endpoint}/'}
+        with pytest.raises(RuntimeError, match='unavailable'):
+            snapshot.get(endpoint, EXIT_VOTE_URL_PATH)
+
+    async def test_slow_primary_is_hedged(self):
+        poller = OraclePoller()
+        oracle = create_oracle(num_endpoints=2)
+        primary, secondary = oracle.endpoints
+
+        async def _fetch(url: str) -> FetchedResponse:
+            if url.startswith(primary):
+                await asyncio.sleep(1)
+            return FetchedResponse(data={'url': url}, content_hash='')
+
+        with mock.patch.object(poller, '_fetch', side_effect=_fetch), mock.patch(
+            'src.oracles.poller.ORACLE_HEDGE_DELAY', 0.01
+        ):
+            snapshot = await poller.get_snapshot([oracle], BlockNumber(100))
+
+        assert snapshot.polled_endpoints(oracle, REWARD_VOTE_URL_PATH) == [secondary]
+        # the cancelled primary is slower than the secondary that won
+        assert poller.health.latency(primary) > poller.health.latency(secondary)
+
+    async def test_outdated_primary_is_hedged(self):
+        poller = OraclePoller()
+        oracle = create_oracle(num_endpoints=2)
+        primary, secondary = oracle.endpoints
+
+        async def _fetch(url: str) -> FetchedResponse:
+            nonce = 4 if url.startswith(primary) else 5
+            return FetchedResponse(data={'nonce': nonce}, content_hash='')
+
+        # another oracle has served the latest nonce
+        other_oracle = Oracle(
+            public_key=create_oracle().public_key, endpoints=['https://other.com']
+        )
+        with mock.patch.object(
+            poller, '_fetch', return_value=FetchedResponse(data={'nonce': 5}, content_hash='')
+        ):
+            await poller.get_snapshot([other_oracle], BlockNumber(99))
+        with mock.patch.object(poller, '_fetch', side_effect=_fetch):
+            snapshot = await poller.get_snapshot([oracle], BlockNumber(100))
+
+        assert snapshot.polled_endpoints(oracle, REWARD_VOTE_URL_PATH) == [primary, secondary]
+
+    async def test_skips_endpoint_with_open_circuit(self):
+        poller = OraclePoller()
+        oracle = create_oracle(num_endpoints=2)
+        primary, secondary = oracle.endpoints
+
+        async def _fetch(url: str) -> FetchedResponse:
+            if url.startswith(primary):
+                raise ConnectionError()
+            return FetchedResponse(data={}, content_hash='')
+
+        with mock.patch.object(poller, '_fetch', side_effect=_fetch) as fetch_mock, mock.patch(
+            'src.oracles.health.ORACLE_CIRCUIT_FAILURE_THRESHOLD', 1
+        ):
+            await poller.get_snapshot([oracle], BlockNumber(100))
+            fetch_mock.reset_mock()
+
+            snapshot = await poller.get_snapshot([oracle], BlockNumber(101))
+
+        assert snapshot.polled_endpoints(oracle, REWARD_VOTE_URL_PATH) == [secondary]
+        assert all(call.args[0].startswith(secondary) for call in fetch_mock.call_args_list)
+
+    async def test_revalidates_last_response(self):
+        poller = OraclePoller()
+        oracle = create_oracle()
+        url = f'{oracle.endpoints[0]}/'
+        response = FetchedResponse(data={'nonce': 1}, content_hash='hash', etag='"v1"')
+
+        with mock.patch('src.oracles.poller.oracle_session_manager'), mock.patch(
+            'src.oracles.poller.aiohttp_fetch', return_value=response
+        ) as fetch_mock:
+            await poller.get_snapshot([oracle], BlockNumber(100))
+            assert _get_cached(fetch_mock, url) is None
+
+            await poller.get_snapshot([oracle], BlockNumber(101))
+            assert _get_cached(fetch_mock, url) is response
+
+    async def test_prunes_parsed_votes_of_removed_oracles(self):
+        poller = OraclePoller()
+        oracle_1, oracle_2 = create_oracle(), create_oracle()
+
+        with mock.patch.object(
+            poller, '_fetch', return_value=FetchedResponse(data={}, content_hash='hash')
+        ):
+            snapshot = await poller.get_snapshot([oracle_1, oracle_2], BlockNumber(100))
+            for oracle in (oracle_1, oracle_2):
+                snapshot.get_parsed(oracle, oracle.endpoints[0], REWARD_VOTE_URL_PATH, str)
+
+            snapshot = await poller.get_snapshot([oracle_2], BlockNumber(101))
+
+        assert list(snapshot.parsed) == [(oracle_2.address, f'{oracle_2.endpoints[0]}/')]
+
+
+class TestOraclesSnapshot:
+    def test_parsed_value_is_keyed_by_oracle(self):
+        # both oracles serve the same endpoint
+        oracle_1, oracle_2 = create_oracle(), create_oracle()
+        endpoint = oracle_1.endpoints[0]
+        snapshot = OraclesSnapshot(
+            block_number=BlockNumber(100),
+            responses={f'{endpoint}/': FetchedResponse(data={}, content_hash='hash')},
+        )
+        parse = mock.Mock(side_effect=lambda data: object())
+
+        value_1 = snapshot.get_parsed(oracle_1, endpoint, REWARD_VOTE_URL_PATH, parse)
+        value_2 = snapshot.get_parsed(oracle_2, endpoint, REWARD_VOTE_URL_PATH, parse)
+
+        assert value_1 is not value_2
+        assert snapshot.get_parsed(oracle_1, endpoint, REWARD_VOTE_URL_PATH, parse) is value_1
+        assert parse.call_count == 2
+
+
+def _get_cached(fetch_mock: mock.Mock, url: str) -> FetchedResponse | None:
+    """Returns the cached response passed to the last fetch of the url."""
+    calls = [call for call in fetch_mock.call_args_list if call.args[1] == url]
+    return calls[-1].kwargs['cached']
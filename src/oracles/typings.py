@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+from urllib.parse import urljoin
+
+from eth_typing import BlockNumber, ChecksumAddress
+from sw_utils import Oracle
+
+from src.common.typings import FetchedResponse
+
+T = TypeVar('T')
+
+
+@dataclass
+class OraclesSnapshot:
+    """Responses of all the oracle resources polled for a block, keyed by url."""
+
+    block_number: BlockNumber
+    responses: dict[str, FetchedResponse | Exception]
+    # content hash and value last parsed from every oracle resource, shared by the snapshots
+    parsed: dict[tuple[ChecksumAddress, str], tuple[str, Any]] = field(default_factory=dict)
+
+    def polled_endpoints(self, oracle: Oracle, path: str) -> list[str]:
+        """
+        Returns the oracle endpoints polled for the resource.
+        Endpoints left out by the hedged poll are not included.
+        """
+        return [
+            endpoint for endpoint in oracle.endpoints if urljoin(endpoint, path) in self.responses
+        ]
+
+    def get(self, endpoint: str, path: str) -> Any:
+        """Returns the response data or raises the error of the resource request."""
+        return self.get_response(endpoint, path).data
+
+    def get_response(self, endpoint: str, path: str) -> FetchedResponse:
+        """Returns the response or raises the error of the resource request."""
+        url = urljoin(endpoint, path)
+        if url not in self.responses:
+            raise RuntimeError(f'Resource {url} was not polled for block {self.block_number}')
+        result = self.responses[url]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_parsed(self, oracle: Oracle, endpoint: str, path: str, parse: Callable[[Any], T]) -> T:
+        """
+        Returns the response data converted by `parse`.
+        An unchanged response of the same oracle is not parsed again.
+        """
+        response = self.get_response(endpoint, path)
+        key = (oracle.address, urljoin(endpoint, path))
+        if (cached := self.parsed.get(key)) and cached[0] == response.content_hash:
+            return cached[1]
+
+        value = parse(response.data)
+        self.parsed[key] = response.content_hash, value
+        return value
@@ -8,15 +8,21 @@ from src.config.settings import NETWORK_CONFIG
 from src.protocol_config.typings import OraclesCache
 
 
-async def get_protocol_config() -> ProtocolConfig:
+async def get_protocol_config(finalized_block: BlockNumber | None = None) -> ProtocolConfig:
+    """
+    Returns the protocol config as of the finalized block.
+    The finalized block is fetched when it is not passed by the caller.
+    """
     oracles_cache = OraclesCache()
 
     # Use the finalized block (not the latest head) so the checkpoint can never
     # advance past a block that could later reorg and drop a ConfigUpdated event.
     # Tradeoff: oracle-set/threshold changes are observed ~2 epochs late; this
     # latency is deliberate, as finalized blocks are safe for the checkpoint cache.
-    block = await execution_client.eth.get_block('finalized')
-    to_block = block['number']
+    if finalized_block is None:
+        block = await execution_client.eth.get_block('finalized')
+        finalized_block = block['number']
+    to_block = finalized_block
 
     if oracles_cache.checkpoint_block is None:
         # Cold cache: full lookup with checkpoint scan and fallback.
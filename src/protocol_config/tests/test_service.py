@@ -189,3 +189,25 @@ class TestGetProtocolConfig:
 
         assert oracles_cache.checkpoint_block == BlockNumber(100)
         assert oracles_cache.config == {'k': 'cached'}
+
+    async def test_passed_finalized_block_skips_fetch(self):
+        oracles_cache = OraclesCache()
+        oracles_cache.checkpoint_block = BlockNumber(100)
+        oracles_cache.config = {'k': 'cached'}
+        oracles_cache.rewards_threshold = 3
+
+        with patch('src.protocol_config.service.execution_client') as mock_client, patch.object(
+            keeper_contract, 'get_config_update_event', new_callable=AsyncMock, return_value=None
+        ) as mock_event, patch.object(
+            keeper_contract, 'get_rewards_threshold', new_callable=AsyncMock, return_value=3
+        ), patch(
+            'src.protocol_config.service.build_protocol_config'
+        ):
+            mock_client.eth.get_block = AsyncMock()
+
+            await get_protocol_config(BlockNumber(105))
+
+        # The finalized block of the chain context is used as is.
+        mock_client.eth.get_block.assert_not_awaited()
+        mock_event.assert_awaited_once_with(from_block=BlockNumber(101), to_block=BlockNumber(105))
+        assert oracles_cache.checkpoint_block == BlockNumber(105)
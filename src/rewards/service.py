@@ -1,65 +1,169 @@
 import asyncio
+import bisect
+import functools
 import logging
-from collections import Counter
-from typing import Iterable
-from urllib.parse import urljoin
+from typing import Any, Callable
 
-import aiohttp
-from aiohttp import ClientSession
 from sw_utils import Oracle, ProtocolConfig
 from web3 import Web3
 from web3.types import Timestamp
 
 from src.common.app_state import Singleton
 from src.common.contracts import keeper_contract
-from src.common.utils import aiohttp_fetch
+from src.common.signatures import TypedDataSigners
+from src.common.typings import ChainContext
 from src.config.settings import NETWORK
 from src.metrics import metrics
-from src.rewards.typings import RewardVote, RewardVoteBody
+from src.oracles.poller import REWARD_VOTE_URL_PATH, oracle_poller
+from src.oracles.typings import OraclesSnapshot
+from src.rewards.storage import RewardsCacheStorage
+from src.rewards.typings import RewardVote, RewardVoteBody, TimestampVotes
 
 logger = logging.getLogger(__name__)
 
-REWARD_VOTE_URL_PATH = '/'
 DEFAULT_CACHE_SIZE = 100
 
+# the votes are signed for the keeper contract, see KeeperRewards
+reward_vote_signers = TypedDataSigners(
+    contract=keeper_contract,
+    primary_type='KeeperRewards',
+    message_type=[
+        {'name': 'rewardsRoot', 'type': 'bytes32'},
+        {'name': 'rewardsIpfsHash', 'type': 'string'},
+        {'name': 'avgRewardPerSecond', 'type': 'uint256'},
+        {'name': 'updateTimestamp', 'type': 'uint64'},
+        {'name': 'nonce', 'type': 'uint64'},
+    ],
+)
+
 
 class RewardsCache(metaclass=Singleton):
     """
     Cache solves the problem of oracle synchronization.
     On some networks, oracles fail to synchronize within a specific epoch.
     Storing votes in the cache makes it easier to catch up with synchronization.
+
+    Votes are indexed by timestamp, body and oracle, and the timestamps are kept sorted.
+    Every timestamp is tallied on insert against the rewards threshold,
+    so the earliest winner is found without scanning the cached votes.
+    The storage writes are queued and applied in a thread by `flush`.
     """
 
     def __init__(self) -> None:
-        self.data: dict[Timestamp, list[RewardVote]] = {}
+        self.data: dict[Timestamp, TimestampVotes] = {}
+        # cached timestamps in ascending order
+        self.timestamps: list[Timestamp] = []
         self.cache_size = DEFAULT_CACHE_SIZE
+        self.rewards_threshold: int | None = None
+        # rewards nonce of the cached votes, unknown for the votes restored on load
+        self.nonce: int | None = None
+        # the votes are persisted when the storage is set
+        self.storage: RewardsCacheStorage | None = None
+        # storage writes not flushed yet, in order
+        self._writes: list[Callable[[], None]] = []
+        self._flush_lock = asyncio.Lock()
+
+    async def load(self, storage: RewardsCacheStorage) -> None:
+        """Restores the votes persisted before the restart and persists the next ones."""
+        self.storage = storage
+        for vote in await asyncio.to_thread(storage.load):
+            self._insert(vote)
+        # the winners are tallied and the stale votes dropped on the next update,
+        # when the rewards threshold and nonce are known
+        self.rewards_threshold = None
+        self.nonce = None
+        if self._evict():
+            self._write(storage.evict, self.timestamps[0])
+        self._write(storage.compact)
+        await self.flush()
+        logger.info(
+            'Loaded rewards votes for %d timestamps from %s', len(self.timestamps), storage.path
+        )
 
-    def update(self, votes: list[RewardVote]) -> None:
+    def set_nonce(self, nonce: int) -> None:
+        """Drops the cached votes for the other rewards nonces."""
+        if nonce == self.nonce:
+            return
+        self.nonce = nonce
+        cached_votes = [
+            vote for timestamp in self.timestamps for vote in self.data[timestamp].votes()
+        ]
+        votes = [vote for vote in cached_votes if vote.nonce == nonce]
+        if len(votes) == len(cached_votes):
+            return
+
+        logger.info('Dropping cached rewards votes with nonce other than %d', nonce)
+        self.data = {}
+        self.timestamps = []
         for vote in votes:
-            update_timestamp = vote.body.update_timestamp
-            if not self.data.get(update_timestamp):
-                self.data[update_timestamp] = []
-            if vote not in self.data[update_timestamp]:
-                self.data[update_timestamp].append(vote)
-
-        while len(self.data) > self.cache_size:
-            oldest_ts = min(self.data.keys())
-            del self.data[oldest_ts]
+            self._insert(vote)
+        if self.storage is not None:
+            self._write(self.storage.delete_stale, nonce)
+
+    def update(self, votes: list[RewardVote], rewards_threshold: int) -> None:
+        if rewards_threshold != self.rewards_threshold:
+            self.rewards_threshold = rewards_threshold
+            for timestamp_votes in self.data.values():
+                timestamp_votes.set_threshold(rewards_threshold)
+
+        changed_votes = [vote for vote in votes if self._insert(vote)]
+        evicted = self._evict()
+
+        if self.storage is None:
+            return
+        if changed_votes:
+            self._write(self.storage.save, changed_votes)
+        if evicted:
+            self._write(self.storage.evict, self.timestamps[0])
 
     def rewards(self) -> list[list[RewardVote]]:
-        rewards = list(self.data.values())
-        rewards.sort(key=lambda item: item[0].body.update_timestamp)
-        return rewards
+        return [self.data[timestamp].votes() for timestamp in self.timestamps]
 
     def clear(self) -> None:
         self.data = {}
-
-
-async def process_rewards(protocol_config: ProtocolConfig) -> None:
+        self.timestamps = []
+        if self.storage is not None:
+            self._write(self.storage.clear)
+
+    async def flush(self) -> None:
+        """Applies the pending storage writes in a thread, off the event loop."""
+        async with self._flush_lock:
+            writes, self._writes = self._writes, []
+            if writes:
+                await asyncio.to_thread(_apply_writes, writes)
+
+    def close(self) -> None:
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+        self._writes = []
+
+    def _write(self, func: Callable[..., None], *args: Any) -> None:
+        self._writes.append(functools.partial(func, *args))
+
+    def _insert(self, vote: RewardVote) -> bool:
+        update_timestamp = vote.body.update_timestamp
+        if update_timestamp not in self.data:
+            self.data[update_timestamp] = TimestampVotes()
+            bisect.insort(self.timestamps, update_timestamp)
+        return self.data[update_timestamp].add(vote, self.rewards_threshold)
+
+    def _evict(self) -> bool:
+        evicted = False
+        while len(self.timestamps) > self.cache_size:
+            del self.data[self.timestamps.pop(0)]
+            evicted = True
+        return evicted
+
+
+async def process_rewards(protocol_config: ProtocolConfig, chain_context: ChainContext) -> None:
     if not await keeper_contract.can_update_rewards():
         return
 
-    votes = await _fetch_reward_votes(protocol_config.oracles)
+    oracles_snapshot = await oracle_poller.get_snapshot(
+        protocol_config.oracles, chain_context.head_block
+    )
+    votes = _get_reward_votes(oracles_snapshot, protocol_config.oracles)
     if not votes:
         logger.warning('No active votes')
         return
@@ -71,13 +175,20 @@ async def process_rewards(protocol_config: ProtocolConfig) -> None:
         logger.info('No votes with nonce %d', current_nonce)
         return
 
+    # a single invalid signature reverts the rewards update
+    votes = await _verify_votes(votes)
+    if not votes:
+        logger.warning('No votes with valid signatures')
+        return
+
     rewards_cache = RewardsCache()
-    rewards_cache.update(votes)
+    # the votes restored on load may be stale and revert the update
+    rewards_cache.set_nonce(current_nonce)
+    rewards_cache.update(votes, rewards_threshold=protocol_config.rewards_threshold)
+    await rewards_cache.flush()
 
-    timestamp_votes, winner = _find_earliest_winner(
-        cache=rewards_cache, rewards_threshold=protocol_config.rewards_threshold
-    )
-    if winner is None or timestamp_votes is None:
+    winner_votes, winner = _find_earliest_winner(cache=rewards_cache)
+    if winner is None or winner_votes is None:
         logger.warning('Not enough oracle votes to update rewards, skipping update...')
         return
 
@@ -90,80 +201,82 @@ async def process_rewards(protocol_config: ProtocolConfig) -> None:
         winner.avg_reward_per_second,
     )
 
-    signatures_count = 0
-    signatures = b''
-    for vote in sorted(timestamp_votes, key=lambda x: Web3.to_int(hexstr=x.oracle_address)):
-        if signatures_count >= protocol_config.rewards_threshold:
-            break
-
-        if vote.body == winner:
-            signatures += vote.signature
-            signatures_count += 1
+    signers = sorted(winner_votes, key=lambda x: Web3.to_int(hexstr=x.oracle_address))
+    signatures = b''.join(vote.signature for vote in signers[: protocol_config.rewards_threshold])
 
     await _submit_vote(
         winner,
         signatures=signatures,
     )
     rewards_cache.clear()
+    await rewards_cache.flush()
 
 
-def _find_earliest_winner(
-    cache: RewardsCache, rewards_threshold: int
-) -> tuple[Iterable[RewardVote], RewardVoteBody] | tuple[None, None]:
-    for timestamp_votes in cache.rewards():
-        counter = Counter([vote.body for vote in timestamp_votes])
-        winner, winner_vote_count = counter.most_common(1)[0]
+def _apply_writes(writes: list[Callable[[], None]]) -> None:
+    for write in writes:
+        write()
 
-        if not _can_submit(winner_vote_count, rewards_threshold):
+
+def _find_earliest_winner(
+    cache: RewardsCache,
+) -> tuple[list[RewardVote], RewardVoteBody] | tuple[None, None]:
+    """Returns the votes for the winner of the earliest timestamp that reached the threshold."""
+    for timestamp in cache.timestamps:
+        timestamp_votes = cache.data[timestamp]
+        winner = timestamp_votes.winner
+        if winner is None:
             logger.warning(
                 'Not enough oracle votes for timestamp %s, checking next timestamp...',
-                winner.update_timestamp,
+                timestamp,
             )
             continue
-        return timestamp_votes, winner
+        return timestamp_votes.winner_votes, winner
 
     return None, None
 
 
-async def _fetch_reward_votes(oracles: list[Oracle]) -> list[RewardVote]:
-    async with aiohttp.ClientSession() as session:
-        results = await asyncio.gather(
-            *[_fetch_vote_from_oracle(session=session, oracle=oracle) for oracle in oracles],
-            return_exceptions=True,
-        )
+async def _verify_votes(votes: list[RewardVote]) -> list[RewardVote]:
+    """Returns the votes signed by their oracles."""
+    return await reward_vote_signers.filter_signed(
+        votes,
+        [
+            (
+                (vote.body, vote.nonce),
+                {
+                    'rewardsRoot': vote.body.root,
+                    'rewardsIpfsHash': vote.body.ipfs_hash,
+                    'avgRewardPerSecond': vote.body.avg_reward_per_second,
+                    'updateTimestamp': vote.body.update_timestamp,
+                    'nonce': vote.nonce,
+                },
+                vote.signature,
+            )
+            for vote in votes
+        ],
+    )
+
 
+def _get_reward_votes(oracles_snapshot: OraclesSnapshot, oracles: list[Oracle]) -> list[RewardVote]:
     votes: list[RewardVote] = []
-    for result in results:
-        if isinstance(result, Exception):
-            logger.warning(result)
+    for oracle in oracles:
+        if not oracles_snapshot.polled_endpoints(oracle, REWARD_VOTE_URL_PATH):
+            # all the oracle endpoints are skipped by the health registry
             continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
-
-        votes.append(result)
+        try:
+            votes.append(_get_vote_from_oracle(oracles_snapshot, oracle))
+        except Exception as e:
+            logger.warning(e)
 
     return votes
 
 
-def _can_submit(signatures_count: int, threshold: int) -> bool:
-    return signatures_count >= threshold
-
-
-async def _fetch_vote_from_oracle(session: ClientSession, oracle: Oracle) -> RewardVote:
-    results = await asyncio.gather(
-        *(_fetch_vote_from_endpoint(session, oracle, endpoint) for endpoint in oracle.endpoints),
-        return_exceptions=True,
-    )
+def _get_vote_from_oracle(oracles_snapshot: OraclesSnapshot, oracle: Oracle) -> RewardVote:
     votes: list[RewardVote] = []
-    for endpoint, result in zip(oracle.endpoints, results):
-        if isinstance(result, Exception):
-            logger.warning('%s from %s', repr(result), endpoint)
-            continue
-        if isinstance(result, BaseException):
-            # Re-raise system-exiting exceptions
-            raise result
-        votes.append(result)
+    for endpoint in oracles_snapshot.polled_endpoints(oracle, REWARD_VOTE_URL_PATH):
+        try:
+            votes.append(_get_vote_from_endpoint(oracles_snapshot, oracle, endpoint))
+        except Exception as e:
+            logger.warning('%s from %s', repr(e), endpoint)
 
     if not votes:
         raise RuntimeError(f'All endpoints are unavailable for oracle {oracle.public_key}')
@@ -178,12 +291,16 @@ async def _fetch_vote_from_oracle(session: ClientSession, oracle: Oracle) -> Rew
     return votes[-1]
 
 
-async def _fetch_vote_from_endpoint(
-    session: ClientSession, oracle: Oracle, endpoint: str
+def _get_vote_from_endpoint(
+    oracles_snapshot: OraclesSnapshot, oracle: Oracle, endpoint: str
 ) -> RewardVote:
-    url = urljoin(endpoint, REWARD_VOTE_URL_PATH)
-    data = await aiohttp_fetch(session, url)
+    # an unchanged vote is neither parsed nor reported again
+    return oracles_snapshot.get_parsed(
+        oracle, endpoint, REWARD_VOTE_URL_PATH, lambda data: _parse_vote(oracle, endpoint, data)
+    )
+
 
+def _parse_vote(oracle: Oracle, endpoint: str, data: dict) -> RewardVote:
     if not data:
         logger.warning('Empty response from oracle')
         raise RuntimeError(f'Invalid response from endpoint {endpoint}')
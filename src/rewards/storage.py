@@ -0,0 +1,120 @@
+import logging
+import sqlite3
+from typing import Iterable
+
+from eth_typing import ChecksumAddress, HexStr
+from web3.types import Timestamp
+
+from src.rewards.typings import RewardVote, RewardVoteBody
+
+logger = logging.getLogger(__name__)
+
+
+class RewardsCacheStorage:
+    """
+    Persists the rewards votes cache to a sqlite file,
+    so that the cached votes are not lost on restart.
+    Every oracle vote for a body is stored once, a repeated vote replaces its signature.
+    The methods block on the file, RewardsCache calls them in a thread one at a time.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS reward_votes (
+                    update_timestamp INTEGER NOT NULL,
+                    root TEXT NOT NULL,
+                    ipfs_hash TEXT NOT NULL,
+                    avg_reward_per_second TEXT NOT NULL,
+                    oracle_address TEXT NOT NULL,
+                    nonce INTEGER NOT NULL,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (
+                        update_timestamp, root, ipfs_hash, avg_reward_per_second, oracle_address
+                    )
+                )
+                '''
+            )
+
+    def load(self) -> list[RewardVote]:
+        rows = self._connection.execute(
+            '''
+            SELECT update_timestamp, root, ipfs_hash, avg_reward_per_second,
+                   oracle_address, nonce, signature
+            FROM reward_votes
+            ORDER BY rowid
+            '''
+        )
+        return [
+            RewardVote(
+                oracle_address=ChecksumAddress(oracle_address),
+                nonce=nonce,
+                signature=signature,
+                body=RewardVoteBody(
+                    update_timestamp=Timestamp(update_timestamp),
+                    root=HexStr(root),
+                    ipfs_hash=ipfs_hash,
+                    # stored as text, the value does not fit sqlite integer
+                    avg_reward_per_second=int(avg_reward_per_second),
+                ),
+            )
+            for (
+                update_timestamp,
+                root,
+                ipfs_hash,
+                avg_reward_per_second,
+                oracle_address,
+                nonce,
+                signature,
+            ) in rows
+        ]
+
+    def save(self, votes: Iterable[RewardVote]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                '''
+                INSERT OR REPLACE INTO reward_votes (
+                    update_timestamp, root, ipfs_hash, avg_reward_per_second,
+                    oracle_address, nonce, signature
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                [
+                    (
+                        vote.body.update_timestamp,
+                        vote.body.root,
+                        vote.body.ipfs_hash,
+                        str(vote.body.avg_reward_per_second),
+                        vote.oracle_address,
+                        vote.nonce,
+                        vote.signature,
+                    )
+                    for vote in votes
+                ],
+            )
+
+    def evict(self, min_timestamp: Timestamp) -> None:
+        """Removes the votes for the timestamps evicted from the cache."""
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM reward_votes WHERE update_timestamp < ?', (min_timestamp,)
+            )
+
+    def delete_stale(self, nonce: int) -> None:
+        """Removes the votes for the other rewards nonces."""
+        with self._connection:
+            self._connection.execute('DELETE FROM reward_votes WHERE nonce != ?', (nonce,))
+
+    def clear(self) -> None:
+        with self._connection:
+            self._connection.execute('DELETE FROM reward_votes')
+
+    def compact(self) -> None:
+        """Reclaims the space of the deleted votes."""
+        self._connection.execute('VACUUM')
+
+    def close(self) -> None:
+        self._connection.close()
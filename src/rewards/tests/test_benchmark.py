@@ -0,0 +1,95 @@
+import logging
+import os
+import random
+import time
+from collections import Counter
+from unittest import mock
+
+import pytest
+from web3.types import Timestamp
+
+from src.common.tests.factories import create_oracle
+from src.rewards.service import RewardsCache, _find_earliest_winner
+from src.rewards.tests.factories import create_vote
+from src.rewards.typings import RewardVote
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMPS_COUNT = 100
+ORACLES_COUNT = 50
+REWARDS_THRESHOLD = 26
+BLOCKS_COUNT = 100
+RUN_BENCHMARKS = bool(os.getenv('RUN_BENCHMARKS'))
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason='RUN_BENCHMARKS')
+def test_find_earliest_winner_benchmark():
+    """
+    Finding the winner of a full cache on every block,
+    compared to counting the votes of every cached timestamp from scratch.
+    """
+    oracles = [create_oracle() for _ in range(ORACLES_COUNT)]
+    votes: list[RewardVote] = []
+    for index in range(TIMESTAMPS_COUNT):
+        timestamp = Timestamp(1_600_000_000 + index * 43200)
+        body = create_vote(update_timestamp=timestamp).body
+        # only the last timestamp is voted by the threshold of oracles
+        voters_count = ORACLES_COUNT if index == TIMESTAMPS_COUNT - 1 else REWARDS_THRESHOLD - 1
+        for oracle in random.sample(oracles, k=voters_count):
+            vote = create_vote(oracle=oracle, update_timestamp=timestamp)
+            vote.body = body
+            votes.append(vote)
+    random.shuffle(votes)
+
+    cache = RewardsCache()
+    cache.clear()
+    try:
+        with mock.patch.object(cache, 'cache_size', TIMESTAMPS_COUNT):
+            start = time.perf_counter()
+            cache.update(votes, rewards_threshold=REWARDS_THRESHOLD)
+            insert_time = time.perf_counter() - start
+
+        # the warnings for the timestamps without a winner are not measured
+        logging.disable(logging.WARNING)
+        try:
+            start = time.perf_counter()
+            for _ in range(BLOCKS_COUNT):
+                winner_votes, winner = _find_earliest_winner(cache)
+            lookup_time = time.perf_counter() - start
+        finally:
+            logging.disable(logging.NOTSET)
+
+        rewards = cache.rewards()
+        last_timestamp = cache.timestamps[-1]
+    finally:
+        cache.clear()
+
+    start = time.perf_counter()
+    for _ in range(BLOCKS_COUNT):
+        recounted_winner = _recount_earliest_winner(rewards)
+    recount_time = time.perf_counter() - start
+
+    logger.info(
+        'Cache of %d timestamps x %d oracles: insert %.2f ms, '
+        'winner lookup %.3f ms/block, full recount %.3f ms/block',
+        TIMESTAMPS_COUNT,
+        ORACLES_COUNT,
+        insert_time * 1000,
+        lookup_time * 1000 / BLOCKS_COUNT,
+        recount_time * 1000 / BLOCKS_COUNT,
+    )
+
+    assert winner is not None
+    assert winner == recounted_winner
+    assert winner.update_timestamp == last_timestamp
+    assert len(winner_votes) == ORACLES_COUNT
+
+
+def _recount_earliest_winner(rewards: list[list[RewardVote]]):
+    # the winner lookup before the votes were tallied on insert
+    for timestamp_votes in rewards:
+        counter = Counter(vote.body for vote in timestamp_votes)
+        winner, winner_count = counter.most_common(1)[0]
+        if winner_count >= REWARDS_THRESHOLD:
+            return winner
+    return None
@@ -1,37 +1,64 @@
 import random
+from contextlib import contextmanager
 from copy import deepcopy
+from dataclasses import replace
 from types import SimpleNamespace
+from typing import ContextManager, Iterator
 from unittest import mock
 from unittest.mock import patch
+from urllib.parse import urljoin
 
 import pytest
-from eth_typing import HexStr
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_account.signers.local import LocalAccount
+from eth_typing import BlockNumber, HexStr
+from eth_utils import keccak
 from sw_utils.tests.factories import faker, get_mocked_protocol_config
 from sw_utils.typings import Oracle
 from web3 import Web3
 from web3.types import Timestamp
 
-from src.common.tests.factories import create_oracle
+from src.common.tests.factories import (
+    create_chain_context,
+    create_oracle,
+    sign_struct_hash,
+)
+from src.common.typings import FetchedResponse
+from src.oracles.poller import REWARD_VOTE_URL_PATH, oracle_poller
+from src.oracles.typings import OraclesSnapshot
 from src.rewards.service import (
     RewardsCache,
-    _fetch_reward_votes,
-    _fetch_vote_from_oracle,
+    _find_earliest_winner,
+    _get_reward_votes,
+    _get_vote_from_oracle,
+    _parse_vote,
+    _verify_votes,
     keeper_contract,
     process_rewards,
+    reward_vote_signers,
 )
+from src.rewards.storage import RewardsCacheStorage
 from src.rewards.tests.factories import create_vote
 from src.rewards.typings import RewardVote, RewardVoteBody
 
+# keccak256 of the KeeperRewards type string of the keeper contract:
+# KeeperRewards(bytes32 rewardsRoot,string rewardsIpfsHash,uint256 avgRewardPerSecond,
+# uint64 updateTimestamp,uint64 nonce)
+KEEPER_REWARDS_TYPE_HASH = bytes.fromhex(
+    '6eb991bd3352dc6c8a881d0e563e1f3a06f9f23c2dc0e8fa843e0f60053bd633'
+)
+
 
 async def test_early():
-    with patch('src.rewards.service.aiohttp_fetch', return_value=[]), patch.object(
+    with patch.object(oracle_poller, 'get_snapshot') as get_snapshot_mock, patch.object(
         keeper_contract,
         'can_update_rewards',
         return_value=False,
-    ), patch('src.rewards.service._submit_vote') as submit_mock, patch.object(
-        RewardsCache(), 'data', {}
-    ):
-        await process_rewards(get_mocked_protocol_config(oracles_count=5))
+    ), patch('src.rewards.service._submit_vote') as submit_mock, _clean_rewards_cache():
+        await process_rewards(get_mocked_protocol_config(oracles_count=5), create_chain_context())
+        get_snapshot_mock.assert_not_called()
         submit_mock.assert_not_called()
 
 
@@ -64,20 +91,22 @@ async def test_basic():
         if vote.body.root == root:
             signatures += vote.signature
 
-    with patch('src.rewards.service.aiohttp_fetch', return_value=[]), patch.object(
+    with patch.object(oracle_poller, 'get_snapshot'), patch.object(
         keeper_contract,
         'can_update_rewards',
         return_value=True,
     ), patch.object(keeper_contract, 'get_rewards_nonce', return_value=nonce), patch(
-        'src.rewards.service._fetch_reward_votes',
+        'src.rewards.service._get_reward_votes',
         return_value=votes,
+    ), patch(
+        'src.rewards.service._verify_votes',
+        side_effect=lambda votes: votes,
     ), patch(
         'src.rewards.service._submit_vote',
-    ) as submit_mock, patch.object(
-        RewardsCache(), 'data', {}
-    ):
+    ) as submit_mock, _clean_rewards_cache():
         await process_rewards(
             get_mocked_protocol_config(oracles=oracles, rewards_threshold=3),
+            create_chain_context(),
         )
 
         submit_mock.assert_called_once_with(
@@ -88,8 +117,60 @@ async def test_basic():
         )
 
 
-class TestFetchRewardVotes:
-    async def test_fetch_reward_votes(self):
+class TestVerifyVotes:
+    async def test_skips_invalid_signatures(self):
+        accounts = [Account().create() for _ in range(3)]
+        votes = [
+            replace(create_vote(nonce=5), oracle_address=account.address) for account in accounts
+        ]
+        with _patch_reward_vote_signers():
+            votes[0].signature = _sign_vote(votes[0], accounts[0])
+            # signed by another account
+            votes[1].signature = _sign_vote(votes[1], accounts[0])
+            # malformed signature
+            votes[2].signature = random.randbytes(16)
+
+            assert await _verify_votes(votes) == [votes[0]]
+
+    async def test_vote_signed_with_other_nonce(self):
+        account = Account().create()
+        vote = replace(create_vote(nonce=5), oracle_address=account.address)
+        with _patch_reward_vote_signers():
+            vote.signature = _sign_vote(replace(vote, nonce=4), account)
+
+            assert await _verify_votes([vote]) == []
+
+    async def test_contract_type_hash(self):
+        # the vote is signed over the type hash of the KeeperRewards contract
+        # instead of the typed data of the signers
+        account = Account().create()
+        vote = create_vote(nonce=5)
+        vote = replace(
+            vote,
+            oracle_address=account.address,
+            body=replace(vote.body, root=HexStr('0x' + 'ab' * 32)),
+        )
+        struct_hash = keccak(
+            KEEPER_REWARDS_TYPE_HASH
+            + encode(
+                ['bytes32', 'bytes32', 'uint256', 'uint64', 'uint64'],
+                [
+                    Web3.to_bytes(hexstr=vote.body.root),
+                    keccak(text=vote.body.ipfs_hash),
+                    vote.body.avg_reward_per_second,
+                    vote.body.update_timestamp,
+                    vote.nonce,
+                ],
+            )
+        )
+        with _patch_reward_vote_signers() as domain:
+            vote.signature = sign_struct_hash(account, domain, struct_hash)
+
+            assert await _verify_votes([vote]) == [vote]
+
+
+class TestGetRewardVotes:
+    def test_get_reward_votes(self):
         oracles = [
             Oracle(public_key=faker.ecies_public_key(), endpoints=[f'https://example{i}.com'])
             for i in range(5)
@@ -99,54 +180,54 @@ class TestFetchRewardVotes:
         vote_3 = create_vote(oracle=oracles[3])
 
         with mock.patch(
-            'src.rewards.service._fetch_vote_from_endpoint',
+            'src.rewards.service._get_vote_from_endpoint',
             side_effect=[RuntimeError(), vote_1, vote_2, vote_3, RuntimeError()],
         ):
-            votes = await _fetch_reward_votes(oracles)
+            votes = _get_reward_votes(_polled_snapshot(oracles), oracles)
 
         assert {v.signature for v in votes} == {v.signature for v in (vote_1, vote_2, vote_3)}
 
 
-class TestFetchVoteFromOracle:
-    async def test_all_endpoints_unavailable(self, client_session):
+class TestGetVoteFromOracle:
+    def test_all_endpoints_unavailable(self):
         oracle = create_oracle(num_endpoints=3)
 
         with mock.patch(
-            'src.rewards.service._fetch_vote_from_endpoint', side_effect=RuntimeError()
+            'src.rewards.service._get_vote_from_endpoint', side_effect=RuntimeError()
         ), pytest.raises(RuntimeError):
-            await _fetch_vote_from_oracle(client_session, oracle)
+            _get_vote_from_oracle(_polled_snapshot([oracle]), oracle)
 
-    async def test_single_endpoint_available(self, client_session):
+    def test_single_endpoint_available(self):
         oracle = create_oracle(num_endpoints=3)
         vote = create_vote(oracle=oracle)
 
         with mock.patch(
-            'src.rewards.service._fetch_vote_from_endpoint',
+            'src.rewards.service._get_vote_from_endpoint',
             side_effect=[
                 RuntimeError(),
                 RuntimeError(),
                 vote,
             ],
         ):
-            fetched_vote = await _fetch_vote_from_oracle(client_session, oracle)
+            fetched_vote = _get_vote_from_oracle(_polled_snapshot([oracle]), oracle)
 
         assert fetched_vote == vote
 
-    async def test_max_nonce(self, client_session):
+    def test_max_nonce(self):
         oracle = create_oracle(num_endpoints=4)
         vote_1 = create_vote(oracle=oracle, nonce=5)
         vote_2 = create_vote(oracle=oracle, nonce=6)
         vote_3 = create_vote(oracle=oracle, nonce=5)
 
         with mock.patch(
-            'src.rewards.service._fetch_vote_from_endpoint',
+            'src.rewards.service._get_vote_from_endpoint',
             side_effect=[RuntimeError(), vote_1, vote_2, vote_3],
         ):
-            fetched_vote = await _fetch_vote_from_oracle(client_session, oracle)
+            fetched_vote = _get_vote_from_oracle(_polled_snapshot([oracle]), oracle)
 
         assert fetched_vote == vote_2
 
-    async def test_max_nonce_max_timestamp(self, client_session):
+    def test_max_nonce_max_timestamp(self):
         oracle = create_oracle(num_endpoints=4)
         vote_1 = create_vote(oracle=oracle, nonce=5)
         vote_2 = create_vote(
@@ -155,14 +236,88 @@ class TestFetchVoteFromOracle:
         vote_3 = create_vote(oracle=oracle, nonce=5, update_timestamp=vote_1.body.update_timestamp)
 
         with mock.patch(
-            'src.rewards.service._fetch_vote_from_endpoint',
+            'src.rewards.service._get_vote_from_endpoint',
             side_effect=[RuntimeError(), vote_1, vote_2, vote_3],
         ):
-            fetched_vote = await _fetch_vote_from_oracle(client_session, oracle)
+            fetched_vote = _get_vote_from_oracle(_polled_snapshot([oracle]), oracle)
 
         assert fetched_vote == vote_2
 
 
+class TestGetVoteFromEndpoint:
+    def test_unchanged_vote_is_not_parsed_again(self):
+        oracle = create_oracle()
+        vote = create_vote(oracle=oracle)
+        url = urljoin(oracle.endpoints[0], REWARD_VOTE_URL_PATH)
+        response = FetchedResponse(
+            data={
+                'nonce': vote.nonce,
+                'signature': Web3.to_hex(vote.signature),
+                'root': vote.body.root,
+                'ipfs_hash': vote.body.ipfs_hash,
+                'avg_reward_per_second': vote.body.avg_reward_per_second,
+                'update_timestamp': vote.body.update_timestamp,
+            },
+            content_hash=faker.sha256(),
+        )
+        snapshot = OraclesSnapshot(block_number=BlockNumber(100), responses={url: response})
+
+        with mock.patch('src.rewards.service._parse_vote', wraps=_parse_vote) as parse_mock:
+            assert _get_vote_from_oracle(snapshot, oracle) == vote
+
+            # the same body polled for the next block
+            snapshot.responses[url] = replace(response, changed=False)
+            assert _get_vote_from_oracle(snapshot, oracle) == vote
+
+        parse_mock.assert_called_once()
+
+
+class TestFindEarliestWinner:
+    def test_skips_timestamp_without_enough_votes(self):
+        ts = Timestamp(random.randint(100, 10000))
+        late_votes = [create_vote(update_timestamp=Timestamp(ts + 100)) for _ in range(3)]
+        early_vote = create_vote(update_timestamp=ts)
+
+        with _clean_rewards_cache() as cache:
+            cache.update(late_votes + [early_vote], rewards_threshold=3)
+            winner_votes, winner = _find_earliest_winner(cache)
+
+        assert winner == late_votes[0].body
+        assert winner_votes == late_votes
+
+    def test_counts_oracle_once(self):
+        oracle = create_oracle()
+        vote = create_vote(oracle=oracle)
+        resigned_vote = replace(vote, signature=random.randbytes(16))
+        other_vote = create_vote(update_timestamp=vote.body.update_timestamp)
+
+        with _clean_rewards_cache() as cache:
+            cache.update([vote, resigned_vote, other_vote], rewards_threshold=3)
+            assert _find_earliest_winner(cache) == (None, None)
+
+            # the threshold is lowered by the protocol config
+            cache.update([], rewards_threshold=2)
+            winner_votes, winner = _find_earliest_winner(cache)
+
+        assert winner == vote.body
+        # the latest signature of the oracle is kept
+        assert winner_votes == [resigned_vote, other_vote]
+
+    def test_winner_is_set_when_threshold_is_reached(self):
+        votes = [create_vote() for _ in range(3)]
+        for vote in votes[1:]:
+            vote.body = votes[0].body
+
+        with _clean_rewards_cache() as cache:
+            cache.update(votes[:2], rewards_threshold=3)
+            timestamp_votes = cache.data[votes[0].body.update_timestamp]
+            assert timestamp_votes.winner is None
+
+            cache.update(votes[2:], rewards_threshold=3)
+            assert timestamp_votes.winner == votes[0].body
+            assert timestamp_votes.winner_votes == votes
+
+
 class TestRewardsCache:
     """
     Ordered, stateful test: each method builds on the cache state left by the
@@ -188,26 +343,26 @@ class TestRewardsCache:
             vote7=create_vote(update_timestamp=ts3),
         )
         namespace.vote8 = deepcopy(namespace.vote7)
-        with patch.object(cache, 'data', {}), patch.object(cache, 'cache_size', 2):
+        with _clean_rewards_cache(), patch.object(cache, 'cache_size', 2):
             yield namespace
 
     async def test_empty_initially(self, ctx):
         assert not ctx.cache.rewards()
 
     async def test_first_vote(self, ctx):
-        ctx.cache.update([ctx.vote1])
+        ctx.cache.update([ctx.vote1], rewards_threshold=3)
         assert ctx.cache.rewards() == [[ctx.vote1]]
 
     async def test_new_timestamp_bucket(self, ctx):
-        ctx.cache.update([ctx.vote2])
+        ctx.cache.update([ctx.vote2], rewards_threshold=3)
         assert ctx.cache.rewards() == [[ctx.vote1], [ctx.vote2]]
 
     async def test_same_timestamp_appends(self, ctx):
-        ctx.cache.update([ctx.vote3])
+        ctx.cache.update([ctx.vote3], rewards_threshold=3)
         assert ctx.cache.rewards() == [[ctx.vote1, ctx.vote3], [ctx.vote2]]
 
     async def test_batch_update(self, ctx):
-        ctx.cache.update([ctx.vote4, ctx.vote5, ctx.vote6])
+        ctx.cache.update([ctx.vote4, ctx.vote5, ctx.vote6], rewards_threshold=3)
         assert ctx.cache.rewards() == [
             [ctx.vote1, ctx.vote3, ctx.vote4],
             [ctx.vote2, ctx.vote5, ctx.vote6],
@@ -216,9 +371,126 @@ class TestRewardsCache:
     async def test_evicts_oldest_and_dedups(self, ctx):
         # cache_size is 2: adding a third timestamp evicts the oldest bucket,
         # and the duplicate vote8 is not stored twice.
-        ctx.cache.update([ctx.vote7, ctx.vote8])
+        ctx.cache.update([ctx.vote7, ctx.vote8], rewards_threshold=3)
         assert ctx.cache.rewards() == [[ctx.vote2, ctx.vote5, ctx.vote6], [ctx.vote7]]
 
     async def test_clear(self, ctx):
         ctx.cache.clear()
         assert not ctx.cache.rewards()
+
+
+class TestRewardsCacheStorage:
+    async def test_votes_survive_restart(self, tmp_path):
+        path = str(tmp_path / 'rewards.db')
+        votes = [create_vote() for _ in range(3)]
+        for vote in votes[1:]:
+            vote.body = votes[0].body
+        votes[0].body = replace(votes[0].body, avg_reward_per_second=2**70)
+        votes[1].body = votes[2].body = votes[0].body
+
+        with _clean_rewards_cache() as cache:
+            await cache.load(RewardsCacheStorage(path))
+            cache.update(votes[:2], rewards_threshold=3)
+            await cache.flush()
+
+        with _clean_rewards_cache() as cache:
+            await cache.load(RewardsCacheStorage(path))
+            assert cache.rewards() == [votes[:2]]
+
+            cache.update(votes[2:], rewards_threshold=3)
+            winner_votes, winner = _find_earliest_winner(cache)
+
+        assert winner == votes[0].body
+        assert winner_votes == votes
+
+    async def test_load_is_bounded_to_cache_size(self, tmp_path):
+        storage = RewardsCacheStorage(str(tmp_path / 'rewards.db'))
+        votes = [create_vote(update_timestamp=Timestamp(ts)) for ts in (300, 100, 200)]
+        storage.save(votes)
+
+        with _clean_rewards_cache() as cache, patch.object(cache, 'cache_size', 2):
+            await cache.load(storage)
+            assert cache.timestamps == [200, 300]
+
+        # the evicted timestamps are removed from the file
+        assert storage.load() == [votes[0], votes[2]]
+
+    async def test_stale_nonce_votes_are_dropped_after_restart(self, tmp_path):
+        storage = RewardsCacheStorage(str(tmp_path / 'rewards.db'))
+        stale_vote = create_vote(nonce=1, update_timestamp=Timestamp(100))
+        vote = create_vote(nonce=2, update_timestamp=Timestamp(200))
+        storage.save([stale_vote, vote])
+
+        with _clean_rewards_cache() as cache:
+            await cache.load(storage)
+            assert cache.rewards() == [[stale_vote], [vote]]
+
+            cache.set_nonce(2)
+            await cache.flush()
+            assert cache.rewards() == [[vote]]
+
+        assert storage.load() == [vote]
+
+    async def test_clear_removes_persisted_votes(self, tmp_path):
+        storage = RewardsCacheStorage(str(tmp_path / 'rewards.db'))
+
+        with _clean_rewards_cache() as cache:
+            await cache.load(storage)
+            cache.update([create_vote()], rewards_threshold=3)
+            await cache.flush()
+            assert storage.load()
+
+            cache.clear()
+            await cache.flush()
+            assert not storage.load()
+
+
+def _sign_vote(vote: RewardVote, account: LocalAccount) -> bytes:
+    typed_data = reward_vote_signers.get_typed_data(
+        {
+            'rewardsRoot': vote.body.root,
+            'rewardsIpfsHash': vote.body.ipfs_hash,
+            'avgRewardPerSecond': vote.body.avg_reward_per_second,
+            'updateTimestamp': vote.body.update_timestamp,
+            'nonce': vote.nonce,
+        }
+    )
+    return account.sign_message(encode_typed_data(full_message=typed_data)).signature
+
+
+def _patch_reward_vote_signers() -> ContextManager:
+    return patch.object(
+        reward_vote_signers,
+        'domain',
+        {
+            'name': 'KeeperOracles',
+            'version': '1',
+            'chainId': 1,
+            'verifyingContract': Web3.to_checksum_address('0x' + '11' * 20),
+        },
+    )
+
+
+def _polled_snapshot(oracles: list[Oracle]) -> OraclesSnapshot:
+    # the votes are mocked, the snapshot only marks all the endpoints as polled
+    return OraclesSnapshot(
+        block_number=BlockNumber(100),
+        responses={
+            urljoin(endpoint, REWARD_VOTE_URL_PATH): RuntimeError()
+            for oracle in oracles
+            for endpoint in oracle.endpoints
+        },
+    )
+
+
+@contextmanager
+def _clean_rewards_cache() -> Iterator[RewardsCache]:
+    cache = RewardsCache()
+    cache.clear()
+    try:
+        yield cache
+    finally:
+        # the persisted votes are kept, as on restart
+        cache.storage = None
+        cache.nonce = None
+        cache.clear()
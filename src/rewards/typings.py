@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from eth_typing import ChecksumAddress, HexStr
 from web3.types import Timestamp
@@ -22,3 +22,50 @@ class RewardVote:
     nonce: int
     signature: bytes
     body: RewardVoteBody
+
+
+@dataclass
+class TimestampVotes:
+    """
+    Votes cached for an update timestamp, tallied on insert.
+    The winner is set as soon as a body is voted by the threshold of oracles.
+    """
+
+    # votes for every body by oracle address
+    body_votes: dict[RewardVoteBody, dict[ChecksumAddress, RewardVote]] = field(
+        default_factory=dict
+    )
+    # the first body voted by the threshold of oracles, None while the threshold is not reached
+    winner: RewardVoteBody | None = None
+
+    @property
+    def winner_votes(self) -> list[RewardVote]:
+        if self.winner is None:
+            return []
+        return list(self.body_votes[self.winner].values())
+
+    def votes(self) -> list[RewardVote]:
+        return [vote for signers in self.body_votes.values() for vote in signers.values()]
+
+    def add(self, vote: RewardVote, threshold: int | None) -> bool:
+        """
+        Adds the vote and returns whether it was not cached yet.
+        The winner is not tallied while the threshold is None.
+        """
+        signers = self.body_votes.setdefault(vote.body, {})
+        if signers.get(vote.oracle_address) == vote:
+            return False
+        # a repeated vote of the oracle only refreshes its signature
+        signers[vote.oracle_address] = vote
+        if self.winner is None and threshold is not None and len(signers) >= threshold:
+            self.winner = vote.body
+        return True
+
+    def set_threshold(self, threshold: int) -> None:
+        if self.winner is not None and len(self.body_votes[self.winner]) >= threshold:
+            return
+        self.winner = max(
+            (body for body, signers in self.body_votes.items() if len(signers) >= threshold),
+            key=lambda body: len(self.body_votes[body]),
+            default=None,
+        )